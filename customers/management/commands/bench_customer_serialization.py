@@ -0,0 +1,56 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from customers.models import Customer
+from customers.renderers import FastJSONRenderer, orjson
+from customers.serializers import CustomerSerializer, CustomerValuesSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Serialize customers through CustomerSerializer + JSONRenderer and through "
+        "the .values() fast path + FastJSONRenderer, check the bytes match and report rows/sec"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=3, help="Best of N runs per path")
+
+    def run(self, build):
+        best = None
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            body = build()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return body, best
+
+    def report(self, label, rows, elapsed, baseline=None):
+        line = f"{label:<28} {rows / elapsed:10.0f} rows/s  {elapsed * 1000:8.1f}ms"
+        if baseline:
+            line += f"  {baseline / elapsed:5.1f}x"
+        self.stdout.write(line)
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        queryset = Customer.objects.filter(deleted_at__isnull=True).order_by('-created_at', '-id')[:options['rows']]
+        fast = CustomerValuesSerializer()
+        instances = list(queryset.all())
+        rows = list(queryset.values(*fast.value_fields))
+        if not rows:
+            raise CommandError("No customers to serialize")
+
+        drf, drf_time = self.run(lambda: JSONRenderer().render(CustomerSerializer(instances, many=True).data))
+        fast_body, fast_time = self.run(lambda: FastJSONRenderer().render(fast.many(rows)))
+        if drf != fast_body:
+            raise CommandError("Fast path output differs from CustomerSerializer")
+
+        # Including the queries, as the list view runs them (.all() skips the result cache)
+        _, drf_total = self.run(lambda: JSONRenderer().render(CustomerSerializer(queryset.all(), many=True).data))
+        _, fast_total = self.run(lambda: FastJSONRenderer().render(fast.many(queryset.values(*fast.value_fields))))
+
+        self.stdout.write(f"{len(rows)} customers, {len(drf)} bytes, identical output; orjson={'yes' if orjson else 'no'}")
+        self.report("serializer + JSONRenderer", len(rows), drf_time)
+        self.report("values + FastJSONRenderer", len(rows), fast_time, drf_time)
+        self.report("with query: serializer", len(rows), drf_total)
+        self.report("with query: values", len(rows), fast_total, drf_total)
@@ -0,0 +1,43 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+from customers.services.purge_service import CustomerPurge
+
+
+class Command(BaseCommand):
+    help = (
+        "Permanently delete customers soft-deleted more than CUSTOMER_PURGE_RETENTION_DAYS ago, "
+        "with their carts and orders, in bounded batches; safe to interrupt and re-run"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=settings.CUSTOMER_PURGE_RETENTION_DAYS)
+        parser.add_argument('--batch-size', type=int, default=500, help="Customers per batch")
+        parser.add_argument('--row-batch-size', type=int, default=5000, help="Rows per DELETE statement")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the customers that would be purged")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['retention_days'])
+        purge = CustomerPurge(cutoff, options['batch_size'], options['row_batch_size'])
+        if options['dry_run']:
+            self.stdout.write(f"{purge.candidates().count()} customers soft-deleted before {cutoff.isoformat()}")
+            return
+
+        start = time.perf_counter()
+
+        def progress(deleted):
+            rows = sum(deleted.values())
+            self.stdout.write(
+                f"{deleted.get('customers', 0)} customers, {rows} rows, "
+                f"{rows / (time.perf_counter() - start):.0f} rows/s"
+            )
+
+        deleted = purge.run(on_batch=progress if options['verbosity'] > 1 else None)
+        elapsed = time.perf_counter() - start
+        rows = sum(deleted.values())
+        for label, count in deleted.items():
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(f"Purged {rows} rows in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/s), "
+                          f"customers soft-deleted before {cutoff.isoformat()}")
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:11
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently so the customer table stays writable
+    atomic = False
+
+    dependencies = [
+        ('customers', '0004_customer_live_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='customer',
+            index=django.contrib.postgres.indexes.GistIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Lower('email'), 'C'), name='gist_trgm_ops'), condition=models.Q(('deleted_at__isnull', True)), name='customer_live_email_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='customer',
+            index=django.contrib.postgres.indexes.GistIndex(django.contrib.postgres.indexes.OpClass(models.Func(models.F('phone'), models.Value('[^0-9]+'), models.Value(''), models.Value('g'), function='REGEXP_REPLACE', output_field=models.CharField()), name='gist_trgm_ops'), condition=models.Q(('deleted_at__isnull', True)), name='customer_live_phone_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:17
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('customers', '0005_customer_search_trgm'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='customer',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Lower('email'), 'C'), name='customer_email_key_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='customer',
+            index=models.Index(models.Func(models.F('phone'), models.Value('[^0-9]+'), models.Value(''), models.Value('g'), function='REGEXP_REPLACE', output_field=models.CharField()), name='customer_phone_key_idx'),
+        ),
+    ]
@@ -1,9 +1,22 @@
 import uuid
 from django.db import models
 from users.models import User 
+from django.contrib.postgres.indexes import GistIndex, OpClass
+from django.db.models.functions import Collate, Lower
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+def search_email():
+    # Lowercased under the "C" collation: LIKE and pg_trgm cannot use the ICU column collation
+    return Collate(Lower('email'), 'C')
+
+
+def search_phone():
+    # Digits only, so "+1 (555) 010-2030" and "5550102030" match each other
+    return models.Func(models.F('phone'), models.Value('[^0-9]+'), models.Value(''), models.Value('g'),
+                       function='REGEXP_REPLACE', output_field=models.CharField())
+
+
 class Customer(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     email = models.EmailField(_('email address'), blank=True, null=True, db_index=True, db_collation="und-x-icu")
@@ -26,6 +39,20 @@ class Customer(models.Model):
             models.Index(fields=['phone']),
             models.Index(fields=['is_guest']),
             models.Index(fields=['linked_user']),
+            # Keyset pagination of live customers (CustomerListView)
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(deleted_at__isnull=True),
+                         name='customer_live_created_idx'),
+            models.Index(fields=['is_guest', '-created_at', '-id'], condition=models.Q(deleted_at__isnull=True),
+                         name='customer_live_guest_idx'),
+            # Substring search (customers.services.search_service): GiST rather than GIN
+            # so the index also returns matches in trigram distance order
+            GistIndex(OpClass(search_email(), name='gist_trgm_ops'), condition=models.Q(deleted_at__isnull=True),
+                      name='customer_live_email_trgm_idx'),
+            GistIndex(OpClass(search_phone(), name='gist_trgm_ops'), condition=models.Q(deleted_at__isnull=True),
+                      name='customer_live_phone_trgm_idx'),
+            # Exact lookups by the same keys (customers.services.upsert_service)
+            models.Index(search_email(), name='customer_email_key_idx'),
+            models.Index(search_phone(), name='customer_phone_key_idx'),
         ]
 
     def __str__(self):
@@ -1,6 +1,11 @@
+from decimal import Decimal, getcontext
 from .models import Customer
 from users.models import Profile
-from rest_framework import serializers
+from django.conf import settings
+from django.utils import timezone
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 
 class ProfileSerializer(serializers.ModelSerializer):
     class Meta:
@@ -42,4 +47,83 @@ class CustomerSerializer(serializers.ModelSerializer):
                 setattr(profile, attr, value)
             profile.save()
             
-        return customer
\ No newline at end of file
+        return customer
+
+
+def compile_converter(field, tz):
+    """A plain function equivalent to field.to_representation for one column value"""
+    if isinstance(field, (serializers.UUIDField, serializers.PrimaryKeyRelatedField)):
+        return lambda value: None if value is None else str(value)
+    if (isinstance(field, serializers.DecimalField) and field.decimal_places is not None
+            and getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+            and not field.localize and not field.normalize_output):
+        exponent = Decimal('.1') ** field.decimal_places
+        context = getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+        return lambda value: None if value is None else f"{value.quantize(exponent, field.rounding, context):f}"
+    if (isinstance(field, serializers.DateTimeField) and settings.USE_TZ
+            and str(getattr(field, 'format', api_settings.DATETIME_FORMAT)).lower() == ISO_8601):
+        tz = field.timezone if hasattr(field, 'timezone') else tz
+
+        def convert(value):
+            if value is None:
+                return None
+            value = value.astimezone(tz).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return convert
+    if isinstance(field, (serializers.CharField, serializers.BooleanField, serializers.IntegerField)):
+        # Columns of these types are already what the field would return
+        return None
+    return lambda value: None if value is None else field.to_representation(value)
+
+
+class ValuesSerializer:
+    """
+    Read-only rendering of a ModelSerializer from .values() rows.
+
+    Field names, order and output match `serializer_class` exactly; each
+    column gets a precompiled converter instead of going through DRF's
+    per-field get_attribute/to_representation machinery. Fields that are
+    not model attributes (e.g. CustomerSerializer.profile) are always
+    skipped by DRF when reading, so they are skipped here too.
+    """
+    serializer_class = None
+
+    def __init__(self):
+        model = self.serializer_class.Meta.model
+        columns = {field.name: field.attname for field in model._meta.concrete_fields}
+        self.columns = []
+        self.fields = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if field.source not in columns:
+                if hasattr(model, field.source):
+                    raise ImproperlyConfigured(f"{name} is not a concrete column of {model.__name__}")
+                continue
+            self.columns.append((name, columns[field.source]))
+            self.fields.append(field)
+
+    @property
+    def value_fields(self):
+        return [column for _, column in self.columns]
+
+    def compile(self):
+        """Converters for the active timezone, resolved once rather than per value"""
+        tz = timezone.get_current_timezone()
+        return [
+            (name, column, compile_converter(field, tz))
+            for (name, column), field in zip(self.columns, self.fields)
+        ]
+
+    def many(self, rows):
+        converters = self.compile()
+        return [
+            {name: convert(row[column]) if convert else row[column] for name, column, convert in converters}
+            for row in rows
+        ]
+
+
+class CustomerValuesSerializer(ValuesSerializer):
+    serializer_class = CustomerSerializer
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.db import connection
+from cart.models import Cart, CartItem
+from orders.models import Order, OrderItem
+from customers.models import Customer
+from users.models import User
+
+# Deletes a batch of orders and takes their value off the linked users,
+# as orders.signals would have; counts the deleted orders
+DELETE_ORDERS_SQL = """
+    WITH deleted AS (
+        {delete} RETURNING "customer_id", "total_amount", "payment_status"
+    ), purged AS (
+        SELECT "customer_id", sum("total_amount") FILTER (WHERE "payment_status" = ANY(%s)) AS value
+        FROM deleted GROUP BY "customer_id"
+    ), users AS (
+        UPDATE "{users}" u SET "lifetime_value" = u."lifetime_value" - p.value
+        FROM purged p JOIN "{customers}" c ON c."id" = p."customer_id"
+        WHERE u."id" = c."linked_user_id" AND p.value <> 0
+    )
+    SELECT count(*) FROM deleted
+"""
+
+
+class CustomerPurge:
+    """
+    Permanently deletes customers soft-deleted before `cutoff`.
+
+    Dependents go bottom-up (cart items, carts, order items, orders, then
+    the customers) as plain DELETE ... WHERE id IN (SELECT ... LIMIT n)
+    statements, each committed on its own, so no row is loaded into
+    Python and no transaction grows with the customer's history. Every
+    statement re-checks that the customer is still soft-deleted past the
+    cutoff, and an interrupted run leaves no orphans: the next run picks
+    up the remaining customers and their remaining rows.
+
+    Raw DELETEs skip orders.signals, so each batch of orders also takes
+    its value off the linked User.lifetime_value in the same statement;
+    once the customer is gone verify_customer_metrics could not see it.
+    """
+
+    def __init__(self, cutoff, batch_size=500, row_batch_size=5000):
+        self.cutoff = cutoff
+        self.batch_size = batch_size
+        self.row_batch_size = row_batch_size
+        self.deleted = {}
+
+    def candidates(self):
+        return Customer.objects.filter(deleted_at__lt=self.cutoff)
+
+    def steps(self, customer_ids):
+        """(label, queryset) pairs in the order their rows must go"""
+        customers = self.candidates().filter(pk__in=customer_ids).values('pk')
+        return [
+            ('cart items', CartItem.objects.filter(cart__customer__in=customers)),
+            ('carts', Cart.objects.filter(customer__in=customers)),
+            ('order items', OrderItem.objects.filter(order__customer__in=customers)),
+            ('orders', Order.objects.filter(customer__in=customers)),
+            ('customers', Customer.objects.filter(pk__in=customers)),
+        ]
+
+    def delete_in_batches(self, queryset):
+        """Delete the queryset's rows row_batch_size at a time; returns the row count"""
+        table = queryset.model._meta.db_table
+        pk = queryset.model._meta.pk.column
+        sql, params = queryset.order_by().values('pk')[:self.row_batch_size].query.sql_with_params()
+        delete = f'DELETE FROM "{table}" WHERE "{pk}" IN ({sql})'
+        if queryset.model is Order:
+            delete = DELETE_ORDERS_SQL.format(
+                delete=delete, users=User._meta.db_table, customers=Customer._meta.db_table
+            )
+            params = (*params, list(settings.CUSTOMER_LIFETIME_VALUE_STATUSES))
+
+        deleted = 0
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute(delete, params)
+                count = cursor.fetchone()[0] if queryset.model is Order else cursor.rowcount
+                deleted += count
+                if count < self.row_batch_size:
+                    return deleted
+
+    def purge_batch(self, customer_ids):
+        for label, queryset in self.steps(customer_ids):
+            self.deleted[label] = self.deleted.get(label, 0) + self.delete_in_batches(queryset)
+
+    def run(self, on_batch=None):
+        """Purge batch after batch until no candidates are left; returns rows deleted per table"""
+        while True:
+            customer_ids = list(self.candidates().order_by('deleted_at', 'id').values_list('id', flat=True)[:self.batch_size])
+            if not customer_ids:
+                return self.deleted
+            self.purge_batch(customer_ids)
+            if on_batch:
+                on_batch(self.deleted)
@@ -0,0 +1,45 @@
+import re
+from django.conf import settings
+from django.contrib.postgres.search import TrigramDistance
+from customers.models import Customer, search_email, search_phone
+
+PHONE_QUERY = re.compile(r'^[\d\s()+.-]+$')
+MIN_QUERY_LENGTH = 3  # shorter terms have no trigram for the index to use
+
+
+class CustomerSearch:
+    """
+    Substring search over customer email and phone.
+
+    Matches are found with LIKE '%term%' on the normalized expressions the
+    partial pg_trgm GiST indexes are built on, and ordered by trigram
+    distance (`<->`). The index returns them nearest first, so the scan
+    stops after the top-k whether the term is common or rare, and the
+    results are the best matches overall rather than of a sample.
+    """
+
+    @staticmethod
+    def normalize(query):
+        """(expression, needle) to search for, or None if the query is too short"""
+        query = query.strip()
+        if PHONE_QUERY.match(query):
+            expression, needle = search_phone(), re.sub(r'\D', '', query)
+        else:
+            expression, needle = search_email(), query.lower()
+        if len(needle) < MIN_QUERY_LENGTH:
+            return None
+        return expression, needle
+
+    @staticmethod
+    def search(query, limit=None):
+        """Live customers matching `query`, best match first"""
+        normalized = CustomerSearch.normalize(query)
+        if normalized is None:
+            return Customer.objects.none()
+        expression, needle = normalized
+        limit = limit or settings.CUSTOMER_SEARCH_LIMIT
+
+        # Ties on distance are broken by recency in an incremental sort over the index order
+        return Customer.objects.filter(deleted_at__isnull=True).annotate(
+            term=expression, distance=TrigramDistance(expression, needle)
+        ).filter(term__contains=needle).order_by('distance', '-created_at', '-id')[:limit]
@@ -0,0 +1,177 @@
+import re
+import uuid
+from django.conf import settings
+from django.db import connection, transaction
+from django.core.validators import validate_email
+from django.core.exceptions import ValidationError
+from django.contrib.auth.base_user import BaseUserManager
+from customers.models import Customer, search_email, search_phone
+from users.services.identifier_service import IdentifierService
+
+PHONE_PATTERN = re.compile(r'^\+?\d{7,15}$')
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+UPSERT_FIELDS = ('email', 'phone', 'is_guest')
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+class CustomerUpsert:
+    """
+    Creates or updates many customers from integration payloads.
+
+    Rows are validated in one pass and merged by normalized email (or,
+    without one, by phone digits), so a customer sent twice is written
+    once. A phone number only matches a stored customer when the row or
+    that customer has no email. Each chunk takes transaction-scoped advisory locks on its keys,
+    resolves them to live customers through the same expressions the
+    trigram indexes cover, and writes with a single INSERT ... ON CONFLICT
+    (id) DO UPDATE; concurrent syncs of the same customer serialize on the
+    lock instead of creating duplicates.
+    """
+
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or settings.CUSTOMER_UPSERT_CHUNK_SIZE
+
+    @staticmethod
+    def clean(record):
+        """(values, errors) for one payload row"""
+        if not isinstance(record, dict):
+            return None, {'non_field_errors': ["Expected an object"]}
+        values = {}
+        errors = {}
+
+        email = (record.get('email') or '').strip()
+        if email:
+            try:
+                validate_email(email)
+                values['email'] = BaseUserManager.normalize_email(email)
+            except ValidationError:
+                errors['email'] = ["Enter a valid email address."]
+
+        phone = IdentifierService.normalize_phone(str(record.get('phone') or ''))
+        if phone:
+            if PHONE_PATTERN.match(phone):
+                values['phone'] = phone
+            else:
+                errors['phone'] = ["Enter a phone number of 7 to 15 digits."]
+
+        if 'is_guest' in record:
+            values['is_guest'] = parse_bool(record['is_guest'])
+        if not errors and 'email' not in values and 'phone' not in values:
+            errors['non_field_errors'] = ["Either email or phone is required."]
+        return (None, errors) if errors else (values, None)
+
+    @staticmethod
+    def keys(values):
+        return (values['email'].lower() if values.get('email') else None,
+                re.sub(r'\D', '', values['phone']) if values.get('phone') else None)
+
+    def merge(self, records):
+        """Validate every row; returns (customers to write, results with row indexes)"""
+        results = []
+        entities = []
+        by_email = {}
+        by_phone = {}
+        for index, record in enumerate(records):
+            values, errors = self.clean(record)
+            if errors:
+                results.append({'index': index, 'status': 'invalid', 'errors': errors})
+                continue
+            email_key, phone_key = self.keys(values)
+            entity = by_email.get(email_key) if email_key else None
+            if entity is None and phone_key:
+                entity = by_phone.get(phone_key)
+                if entity and email_key and entity['values'].get('email'):
+                    # Same phone, different emails: two customers
+                    entity = None
+            if entity is None:
+                entity = {'values': {}, 'rows': []}
+                entities.append(entity)
+            # Later rows for the same customer win, field by field
+            entity['values'].update(values)
+            entity['rows'].append(index)
+            email_key, phone_key = self.keys(entity['values'])
+            if email_key:
+                by_email.setdefault(email_key, entity)
+            if phone_key:
+                by_phone.setdefault(phone_key, entity)
+        return entities, results
+
+    @staticmethod
+    def lock(keys):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(hashtextextended(k, 0)) FROM unnest(%s::text[]) k ORDER BY k",
+                [sorted(keys)]
+            )
+
+    @staticmethod
+    def existing(entities):
+        """{email key or phone key: (id, email, phone, is_guest)} of the oldest live customer per key"""
+        emails = {CustomerUpsert.keys(entity['values'])[0] for entity in entities} - {None}
+        phones = {CustomerUpsert.keys(entity['values'])[1] for entity in entities} - {None}
+        found = {}
+        live = Customer.objects.filter(deleted_at__isnull=True)
+        columns = ('key', 'created_at', 'id') + UPSERT_FIELDS
+        rows = []
+        if emails:
+            rows += [('email',) + row for row in live.annotate(key=search_email()).filter(key__in=emails).values_list(*columns)]
+        if phones:
+            rows += [('phone',) + row for row in live.annotate(key=search_phone()).filter(key__in=phones).values_list(*columns)]
+        # Sorted here rather than in SQL so the planner stays on the key indexes
+        for kind, key, _, *customer in sorted(rows, key=lambda row: row[2], reverse=True):
+            found[(kind, key)] = tuple(customer)
+        return found
+
+    def write_chunk(self, entities):
+        """Upsert one chunk; returns [(entity, id, created)]"""
+        written = []
+        with transaction.atomic():
+            self.lock([f"customer:{kind}:{key}" for entity in entities
+                       for kind, key in zip(('email', 'phone'), self.keys(entity['values'])) if key])
+            found = self.existing(entities)
+
+            # Entities that resolve to the same stored customer (e.g. one row by its email, another
+            # by its phone) become one row: ON CONFLICT cannot update a row twice in one statement
+            customers = {}
+            for entity in entities:
+                email_key, phone_key = self.keys(entity['values'])
+                match = found.get(('email', email_key))
+                phone_match = found.get(('phone', phone_key))
+                # A phone match only stands in for an email match when one side has no email
+                if match is None and phone_match and not (email_key and phone_match[1]):
+                    match = phone_match
+                if match:
+                    customer = customers.get(match[0])
+                    if customer is None:
+                        # Fields the payload left out keep their stored values
+                        customer = customers[match[0]] = Customer(id=match[0], **dict(zip(UPSERT_FIELDS, match[1:])))
+                    for field, value in entity['values'].items():
+                        setattr(customer, field, value)
+                else:
+                    customer = Customer(id=uuid.uuid4(), **entity['values'])
+                    customers[customer.id] = customer
+                written.append((entity, customer.id, match is None))
+
+            Customer.objects.bulk_create(
+                list(customers.values()), update_conflicts=True, unique_fields=['id'], update_fields=list(UPSERT_FIELDS)
+            )
+        return written
+
+    def run(self, records):
+        """Per-row results, in payload order, plus created/updated/invalid counts"""
+        entities, results = self.merge(records)
+        stats = {'created': 0, 'updated': 0, 'invalid': len(results)}
+        for start in range(0, len(entities), self.chunk_size):
+            statuses = {}
+            for entity, customer_id, created in self.write_chunk(entities[start:start + self.chunk_size]):
+                status = statuses.setdefault(customer_id, 'created' if created else 'updated')
+                results.extend({'index': index, 'status': status, 'id': str(customer_id)} for index in entity['rows'])
+            for status in statuses.values():
+                stats[status] += 1
+        results.sort(key=lambda result: result['index'])
+        return dict(stats, results=results)
@@ -0,0 +1,166 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from customers.models import Customer
+from customers.serializers import CustomerValuesSerializer
+from customers.services.purge_service import CustomerPurge
+from customers.services.search_service import CustomerSearch
+from orders.models import Order
+from users.models import User
+from users.tests import FakeRedisMixin
+from customers.services.upsert_service import CustomerUpsert
+
+
+class CustomerUpsertTests(TestCase):
+    def test_creates_and_merges_duplicate_rows(self):
+        result = CustomerUpsert().run([
+            {'email': 'Ann@Example.com', 'is_guest': 'false'},
+            {'email': 'ann@example.com', 'phone': '+1 555 010 2030'},
+            {'email': 'not-an-email'},
+        ])
+
+        self.assertEqual((result['created'], result['updated'], result['invalid']), (1, 0, 1))
+        customer = Customer.objects.get()
+        self.assertEqual((customer.phone, customer.is_guest), ('+15550102030', False))
+        self.assertEqual([row['status'] for row in result['results']], ['created', 'created', 'invalid'])
+
+    def test_rows_matching_one_customer_by_email_and_by_phone(self):
+        stored = Customer.objects.create(email='ann@example.com', phone='+15550102030')
+
+        # Kept apart by merge() (the first row has no phone), both resolve to the stored customer
+        result = CustomerUpsert().run([
+            {'email': 'ann@example.com', 'is_guest': 'false'},
+            {'phone': '+1 (555) 010-2030', 'is_guest': 'true'},
+        ])
+
+        self.assertEqual((result['created'], result['updated']), (0, 1))
+        self.assertEqual([(row['status'], row['id']) for row in result['results']],
+                         [('updated', str(stored.id)), ('updated', str(stored.id))])
+        stored.refresh_from_db()
+        self.assertEqual((stored.email, stored.phone, stored.is_guest), ('ann@example.com', '+15550102030', True))
+        self.assertEqual(Customer.objects.count(), 1)
+
+
+class CustomerSearchTests(TestCase):
+    def test_closest_live_matches_first(self):
+        for email in ('annabel.smith@example.com', 'ann@example.com', 'joann@example.com', 'bob@example.com'):
+            Customer.objects.create(email=email)
+        Customer.objects.create(email='ann@example.org', deleted_at=timezone.now())
+
+        emails = [customer.email for customer in CustomerSearch.search('ANN')]
+
+        self.assertEqual(emails[0], 'ann@example.com')
+        self.assertEqual(sorted(emails), ['ann@example.com', 'annabel.smith@example.com', 'joann@example.com'])
+        self.assertEqual(len(CustomerSearch.search('ann', limit=1)), 1)
+        self.assertEqual(list(CustomerSearch.search('an')), [])
+
+
+class CustomerPurgeTests(FakeRedisMixin, TestCase):
+    def create_customer(self, email, *orders):
+        user = User.objects.create_user(email=email)
+        customer = Customer.objects.create(email=email, linked_user=user)
+        for total_amount, payment_status in orders:
+            Order.objects.create(customer=customer, currency='USD', total_amount=total_amount, payment_status=payment_status)
+        user.refresh_from_db()
+        return user, customer
+
+    def test_purged_orders_leave_the_linked_users_lifetime_value(self):
+        user, customer = self.create_customer('ann@example.com', ('30.00', 'paid'), ('12.50', 'paid'), ('99.00', 'pending'))
+        other, _ = self.create_customer('bob@example.com', ('20.00', 'paid'))
+        self.assertEqual(user.lifetime_value, Decimal('42.50'))
+        Customer.objects.filter(pk=customer.pk).update(deleted_at=timezone.now() - timedelta(days=10))
+
+        deleted = CustomerPurge(timezone.now(), row_batch_size=1).run()
+
+        self.assertEqual((deleted['orders'], deleted['customers']), (3, 1))
+        user.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((user.lifetime_value, other.lifetime_value), (Decimal('0.00'), Decimal('20.00')))
+
+
+def csv_rows(rows):
+    """What csv.writer makes of serialized rows, as read back by csv.reader"""
+    return [list(rows[0])] + [['' if value is None else str(value) for value in row.values()] for row in rows]
+
+
+@override_settings(EXPORT_BUFFER_SIZE=256)
+class CustomerExportTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        admin = User.objects.create_superuser(email='admin@corp.example', password='correct-horse-7')
+        self.token = AccessToken.for_user(admin)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {self.token}"
+        for index in range(12):
+            Customer.objects.create(
+                email=f"customer{index}@example.com", phone='+15550102030' if index % 2 else None,
+                is_guest=bool(index % 3), lifetime_value=Decimal(index) / 4, order_count=index,
+                first_order_date=timezone.now() - timedelta(days=index) if index % 2 else None,
+                created_at=timezone.now() - timedelta(minutes=index),
+            )
+        Customer.objects.create(email='gone@example.com', deleted_at=timezone.now())
+
+    def expected(self):
+        serializer = CustomerValuesSerializer()
+        queryset = Customer.objects.filter(deleted_at__isnull=True).order_by('-created_at', '-id')
+        return serializer.many(queryset.values(*serializer.value_fields))
+
+    def export(self, **params):
+        response = self.client.get(reverse('customer-export'), params)
+        return response, b''.join(response.streaming_content)
+
+    def test_jsonl_matches_the_values_serializer(self):
+        response, content = self.export(output='jsonl')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line) for line in content.decode().splitlines()], self.expected())
+
+    def test_csv_matches_the_values_serializer(self):
+        response, content = self.export()
+
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="customers.csv"')
+        self.assertEqual(list(csv.reader(io.StringIO(content.decode()))), csv_rows(self.expected()))
+
+    def test_gzip_round_trips(self):
+        for output in ('csv', 'jsonl'):
+            with self.subTest(output=output):
+                _, plain = self.export(output=output)
+                response, compressed = self.export(output=output, gzip='1')
+
+                self.assertEqual(response['Content-Type'], 'application/gzip')
+                self.assertEqual(response['Content-Disposition'], f'attachment; filename="customers.{output}.gz"')
+                self.assertEqual(gzip.decompress(compressed), plain)
+
+    def test_asgi_request_streams_the_same_export(self):
+        _, plain = self.export(output='jsonl')
+
+        async def export():
+            response = await AsyncClient().get(reverse('customer-export'), {'output': 'jsonl'},
+                                               headers={'Authorization': f"Bearer {self.token}"})
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        self.assertEqual(async_to_sync(export)(), plain)
+
+    def test_unknown_output_is_rejected(self):
+        response = self.client.get(reverse('customer-export'), {'output': 'xml'})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_writes_the_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'customers.csv.gz')
+            call_command('export_customers', gzip=True, output=path, chunk_size=5, stderr=io.StringIO())
+            with gzip.open(path, 'rt', newline='') as f:
+                rows = list(csv.reader(f))
+
+        self.assertEqual(rows, csv_rows(self.expected()))
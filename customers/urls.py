@@ -2,6 +2,9 @@ from django.urls import path
 
 from .views import (
     CustomerListView,
+    CustomerBulkUpsertView,
+    CustomerExportView,
+    CustomerSearchView,
     CustomerDetailView,
     CurrentCustomerView,
     CustomerRestoreView,
@@ -12,6 +15,9 @@ from .views import (
 urlpatterns = [
     path('', CustomerListView.as_view(), name='customer-list'),
     path('me/', CurrentCustomerView.as_view(), name='current-customer'),
+    path('search/', CustomerSearchView.as_view(), name='customer-search'),
+    path('export/', CustomerExportView.as_view(), name='customer-export'),
+    path('bulk/', CustomerBulkUpsertView.as_view(), name='customer-bulk-upsert'),
     path('<uuid:id>/', CustomerDetailView.as_view(), name='customer-detail'),
     path('<uuid:id>/', CustomerSoftDeleteView.as_view(), name='customer-soft-delete'),
     path('<uuid:id>/restore/', CustomerRestoreView.as_view(), name='customer-restore'),
@@ -1,17 +1,93 @@
 from .models import Customer
+from django.conf import settings
 from django.utils import timezone
-from .serializers import CustomerSerializer
+from django.utils.translation import gettext as _
+from .serializers import CustomerSerializer, CustomerValuesSerializer
+from .pagination import KeysetPagination
+from .renderers import FastJSONRenderer
+from .services.search_service import CustomerSearch
+from .services.upsert_service import CustomerUpsert
+from keya.exports import StreamingExport, export_options
 from rest_framework.response import Response
 from rest_framework import generics, status, permissions
+from rest_framework.renderers import BrowsableAPIRenderer
 
 class IsAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_staff
 
-class CustomerListView(generics.ListCreateAPIView):
+class CustomerFilterMixin:
     queryset = Customer.objects.filter(deleted_at__isnull=True)
+
+    def get_queryset(self):
+        # Exact matches only, so each filter stays on its index
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if 'is_guest' in params:
+            queryset = queryset.filter(is_guest=params['is_guest'].lower() in ('1', 'true', 'yes'))
+        if params.get('email'):
+            queryset = queryset.filter(email=params['email'])
+        if params.get('phone'):
+            queryset = queryset.filter(phone=params['phone'])
+        return queryset
+
+class CustomerListView(CustomerFilterMixin, generics.ListCreateAPIView):
     serializer_class = CustomerSerializer
     permission_classes = [IsAdmin]
+    pagination_class = KeysetPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def list(self, request, *args, **kwargs):
+        # Read path: .values() rows through precompiled converters, same output as CustomerSerializer
+        serializer = CustomerValuesSerializer()
+        queryset = self.filter_queryset(self.get_queryset()).values(*serializer.value_fields)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(serializer.many(page))
+
+class CustomerExportView(CustomerFilterMixin, generics.GenericAPIView):
+    """Stream the (filtered) customer list as CSV or JSON Lines, optionally gzipped"""
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        output, compress = export_options(request.query_params)
+        if output is None:
+            return Response({"error": _("Export format must be csv or jsonl")}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.get_queryset().order_by('-created_at', '-id')
+        export = StreamingExport(queryset, CustomerValuesSerializer(), output, compress)
+        return export.response(request, 'customers')
+
+class CustomerBulkUpsertView(generics.GenericAPIView):
+    """Create or update up to CUSTOMER_UPSERT_MAX_ROWS customers, matched by email or phone"""
+    permission_classes = [IsAdmin]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def post(self, request):
+        records = request.data.get('customers') if isinstance(request.data, dict) else request.data
+        if not isinstance(records, list) or not records:
+            return Response({"error": _("Expected a non-empty list of customers")}, status=status.HTTP_400_BAD_REQUEST)
+        if len(records) > settings.CUSTOMER_UPSERT_MAX_ROWS:
+            return Response({"error": _("At most %(max)d customers per request") % {'max': settings.CUSTOMER_UPSERT_MAX_ROWS}},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(CustomerUpsert().run(records), status=status.HTTP_200_OK)
+
+class CustomerSearchView(generics.GenericAPIView):
+    """Top-k customers whose email or phone contains `q`"""
+    permission_classes = [IsAdmin]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        if CustomerSearch.normalize(query) is None:
+            return Response({"error": _("Search for at least 3 characters")}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', settings.CUSTOMER_SEARCH_LIMIT)),
+                        settings.CUSTOMER_SEARCH_MAX_LIMIT)
+        except ValueError:
+            limit = settings.CUSTOMER_SEARCH_LIMIT
+
+        serializer = CustomerValuesSerializer()
+        customers = CustomerSearch.search(query, max(limit, 1)).values(*serializer.value_fields)
+        return Response({'results': serializer.many(customers)})
 
 class CurrentCustomerView(generics.RetrieveUpdateAPIView):
     serializer_class = CustomerSerializer
@@ -3,5 +3,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'keya.settings')
+# Route login/registration to the async views that hash off the event loop
+os.environ.setdefault('ASYNC_AUTH_VIEWS', 'True')
 
 application = get_asgi_application()
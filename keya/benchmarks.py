@@ -0,0 +1,28 @@
+import time
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def time_calls(func, iterations):
+    """Call func repeatedly and return per-call latencies in milliseconds"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def format_latency(label, samples):
+    """One summary line with p50/p99 latency in milliseconds"""
+    return (
+        f"{label:<28} n={len(samples):<6} "
+        f"p50={percentile(samples, 50):8.3f}ms p99={percentile(samples, 99):8.3f}ms"
+    )
@@ -0,0 +1,147 @@
+import io
+import csv
+import json
+import zlib
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to json.dumps
+    orjson = None
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def export_options(params):
+    """(output, compress) from `?output=csv|jsonl&gzip=1`; output is None when unknown"""
+    output = params.get('output', 'csv').lower()
+    compress = params.get('gzip', '').lower() in ('1', 'true', 'yes')
+    return (output if output in CONTENT_TYPES else None), compress
+
+
+class AsyncChunks:
+    """
+    Async iterator over a sync chunk generator, for ASGI responses.
+
+    StreamingHttpResponse would otherwise consume a sync iterator into a
+    list before sending anything. Each step runs through thread-sensitive
+    sync_to_async, i.e. in the request's thread, where the generator's
+    transaction and database connection live.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        chunk = await sync_to_async(next)(self.chunks, None)
+        if chunk is None:
+            raise StopAsyncIteration
+        return chunk
+
+    def close(self):
+        # Called by response.close() in the request's thread
+        self.chunks.close()
+
+
+class StreamingExport:
+    """
+    CSV or JSON Lines export of a queryset rendered by a ValuesSerializer.
+
+    Rows are read through a server-side cursor (`.iterator()`) inside a
+    transaction: outside one, Django declares the cursor WITH HOLD and
+    PostgreSQL materializes the whole result before returning the first
+    row. Only `chunk_size` rows and one output block of about
+    EXPORT_BUFFER_SIZE bytes are held in memory at a time, whatever the
+    table size, and the first block is sent as soon as it fills.
+    """
+
+    def __init__(self, queryset, serializer, output='csv', compress=False, chunk_size=None):
+        if output not in CONTENT_TYPES:
+            raise ValueError(f"Unknown export format: {output}")
+        self.output = output
+        self.compress = compress
+        self.chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+        self.converters = serializer.compile()
+        self.names = [name for name, _, _ in self.converters]
+        self.queryset = queryset.values_list(*[column for _, column, _ in self.converters])
+        self.row_count = 0
+
+    def rows(self):
+        converters = [convert for _, _, convert in self.converters]
+        with transaction.atomic(using=self.queryset.db):
+            for row in self.queryset.iterator(chunk_size=self.chunk_size):
+                self.row_count += 1
+                yield [convert(value) if convert else value for value, convert in zip(row, converters)]
+
+    def encode_csv(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.names)
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() >= settings.EXPORT_BUFFER_SIZE:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode()
+
+    def encode_jsonl(self, rows):
+        names = self.names
+        dumps = orjson.dumps if orjson else lambda value: json.dumps(value, ensure_ascii=False).encode()
+        block, size = [], 0
+        for row in rows:
+            line = dumps(dict(zip(names, row)))
+            block.append(line)
+            size += len(line) + 1
+            if size >= settings.EXPORT_BUFFER_SIZE:
+                block.append(b'')
+                yield b'\n'.join(block)
+                block, size = [], 0
+        if block:
+            block.append(b'')
+            yield b'\n'.join(block)
+
+    def chunks(self):
+        """The export as a generator of bytes blocks"""
+        encode = self.encode_csv if self.output == 'csv' else self.encode_jsonl
+        if not self.compress:
+            yield from encode(self.rows())
+            return
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)  # gzip container
+        for chunk in encode(self.rows()):
+            chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+        yield compressor.flush()
+
+    def write(self, stream):
+        """Write the export to a binary stream; returns the number of bytes written"""
+        size = 0
+        for chunk in self.chunks():
+            stream.write(chunk)
+            size += len(chunk)
+        return size
+
+    def filename(self, name):
+        return f"{name}.{self.output}" + ('.gz' if self.compress else '')
+
+    def response(self, request, name):
+        """StreamingHttpResponse downloading the export as `name`.<format>[.gz]"""
+        chunks = self.chunks()
+        if isinstance(getattr(request, '_request', request), ASGIRequest):
+            chunks = AsyncChunks(chunks)
+        response = StreamingHttpResponse(
+            chunks, content_type='application/gzip' if self.compress else CONTENT_TYPES[self.output]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self.filename(name)}"'
+        return response
@@ -54,6 +54,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'users.middleware.SessionActivityMiddleware',
 ]
 
 ROOT_URLCONF = 'keya.urls'
@@ -121,7 +122,7 @@ STATIC_URL = 'static/'
 # Token Authentication
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     )
 }
 
@@ -131,9 +132,37 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
 }
 
+# Cached (id, is_active, is_staff, is_verified, deleted_at) used by CachedJWTAuthentication
+USER_SNAPSHOT_TTL = 300  # 5 minutes
+
+# DeviceSession.last_activity is buffered in Redis and written by flush_session_activity
+SESSION_ACTIVITY_RESOLUTION = 30  # seconds between buffered writes per session and process
+SESSION_ACTIVITY_FLUSH_INTERVAL = 60  # seconds
+DEVICE_SESSION_IDLE_TIMEOUT = 60 * 60 * 24 * 30  # 30 days
+
+# Compiled RBAC permission sets (rbac.services.permission_resolver)
+RBAC_CACHE_TTL = 60 * 60  # Redis copy; invalidated by rbac.signals
+RBAC_LOCAL_CACHE_TTL = 5  # in-process copy; bounds staleness after changes made by other processes
+# Embed compiled permissions in access tokens; any RBAC change makes older claims fall back to the resolver
+RBAC_TOKEN_CLAIMS = env.bool('RBAC_TOKEN_CLAIMS', default=False)
+# Bulk role assignment endpoints (rbac.views)
+RBAC_BULK_CHUNK_SIZE = 1000  # users per transaction and cache invalidation
+RBAC_BULK_MAX_USER_IDS = 100000  # users per request, listed or matched by a filter
+
+# Customer search (customers.services.search_service)
+CUSTOMER_SEARCH_LIMIT = 20  # default top-k
+CUSTOMER_SEARCH_MAX_LIMIT = 100
+CUSTOMER_PURGE_RETENTION_DAYS = env.int('CUSTOMER_PURGE_RETENTION_DAYS', default=90)  # soft-deleted customers kept this long
+CUSTOMER_UPSERT_MAX_ROWS = 10000  # per bulk upsert request
+CUSTOMER_UPSERT_CHUNK_SIZE = 1000  # customers per transaction
+# Streaming CSV/JSONL exports (keya.exports)
+EXPORT_CHUNK_SIZE = 2000  # rows per server-side cursor fetch
+EXPORT_BUFFER_SIZE = 64 * 1024  # bytes per streamed block
+# Orders counted in Customer/User.lifetime_value (orders.services.customer_metrics_service)
+CUSTOMER_LIFETIME_VALUE_STATUSES = ('paid', 'partially_refunded')
+
 AUTHENTICATION_BACKENDS = [
     'users.backends.EmailPhoneAuthBackend',
-    'django.contrib.auth.backends.ModelBackend',
 ]
 
 # Email settings
@@ -145,6 +174,44 @@ EMAIL_HOST_USER = env('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL')
 
+# Redis outboxes (users.services.outbox), drained by `manage.py process_outbox <queue>`
+OUTBOX_PROCESSING_TIMEOUT = 300  # seconds a claimed item may take before --recover requeues it
+OUTBOX_DEAD_LETTER_LIMIT = 1000  # newest dead letters kept per outbox
+OUTBOX_DEAD_LETTER_TTL = 7 * 24 * 60 * 60  # dead-letter list expires this long after the last one
+
+# Outbox drained by `manage.py process_outbox email`
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_BACKOFF = 5  # seconds, doubled on each retry
+
+# SMS settings (outbox drained by `manage.py process_outbox sms`)
+# Twilio unless set; ConsoleTransport (which logs the message, OTP included) only by default under DEBUG
+SMS_TRANSPORT = env('SMS_TRANSPORT', default='users.services.sms_service.{}'.format(
+    'ConsoleTransport' if DEBUG else 'TwilioTransport'
+))
+SMS_RATE_LIMIT = env.int('SMS_RATE_LIMIT', default=10)  # messages/sec per provider, 0 disables
+SMS_OUTBOX_MAX_ATTEMPTS = 5
+SMS_OUTBOX_BACKOFF = 5  # seconds, doubled on each retry
+TWILIO_ACCOUNT_SID = env('TWILIO_ACCOUNT_SID', default=None)
+TWILIO_AUTH_TOKEN = env('TWILIO_AUTH_TOKEN', default=None)
+TWILIO_PHONE_NUMBER = env('TWILIO_PHONE_NUMBER', default=None)
+
+# AuthHistory events (outbox drained by `manage.py process_outbox auth_history`,
+# monthly partitions maintained by `manage.py manage_auth_history_partitions`)
+AUTH_HISTORY_OUTBOX_MAX_ATTEMPTS = 5
+AUTH_HISTORY_OUTBOX_BACKOFF = 5  # seconds, doubled on each retry
+AUTH_HISTORY_PARTITIONS_AHEAD = 3  # months
+AUTH_HISTORY_RETENTION_MONTHS = env.int('AUTH_HISTORY_RETENTION_MONTHS', default=12)
+# Expired partitions are moved to this schema instead of dropped when set
+AUTH_HISTORY_ARCHIVE_SCHEMA = env('AUTH_HISTORY_ARCHIVE_SCHEMA', default=None)
+
+# Uploads to POST /api/v1/admin/users/import/, imported by `manage.py process_outbox user_import`
+USER_IMPORT_UPLOAD_DIR = 'user-imports'  # in default_storage, which the workers must share
+USER_IMPORT_CHUNK_SIZE = 5000  # records per committed chunk
+USER_IMPORT_JOB_TTL = 7 * 24 * 60 * 60  # how long a job's status can be polled
+USER_IMPORT_OUTBOX_MAX_ATTEMPTS = 3  # a retried import resumes after its last committed chunk
+USER_IMPORT_OUTBOX_BACKOFF = 60  # seconds, doubled on each retry
+USER_IMPORT_OUTBOX_PROCESSING_TIMEOUT = 6 * 60 * 60  # imports run far longer than a message send
+
 # Redis cache configuration
 CACHES = {
     "default": {
@@ -157,4 +224,32 @@ CACHES = {
     }
 }
 
-OTP_EXPIRY = 300  # 5 minutes
\ No newline at end of file
+# Used where no SecurityPolicy of type login_attempt overrides them
+LOGIN_ATTEMPT_POLICY_DEFAULTS = {
+    'max_attempts': 5,  # failures per user within the window
+    'max_attempts_per_ip': 50,
+    'window_seconds': 900,
+    'lockout_seconds': 900,
+}
+
+# Base config per SecurityPolicy type, merged under the matching policies by rbac PolicyResolver
+SECURITY_POLICY_DEFAULTS = {
+    'login_attempt': LOGIN_ATTEMPT_POLICY_DEFAULTS,
+    'password': {},
+    'mfa': {},
+    'session': {},
+}
+SECURITY_POLICY_CACHE_TTL = 60 * 60  # invalidated by rbac.signals
+
+OTP_EXPIRY = 300  # 5 minutes
+OTP_MAX_ATTEMPTS = 5  # verify attempts before the OTP is burnt
+OTP_RESEND_COOLDOWN = 60  # seconds between OTP requests per identifier
+
+# Identifier (email/phone) -> user id lookup cache used at login
+IDENTIFIER_CACHE_TTL = 300  # 5 minutes
+IDENTIFIER_NEGATIVE_CACHE_TTL = 30  # unknown identifiers
+
+# Async auth views (enabled by keya/asgi.py) hash passwords on a bounded pool
+ASYNC_AUTH_VIEWS = env.bool('ASYNC_AUTH_VIEWS', default=False)
+PASSWORD_HASHING_WORKERS = env.int('PASSWORD_HASHING_WORKERS', default=os.cpu_count() or 1)
+PASSWORD_HASHING_MAX_PENDING = env.int('PASSWORD_HASHING_MAX_PENDING', default=64)  # beyond this, 429
@@ -5,4 +5,6 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/', include('users.urls')),
     path('api/v1/customers/', include('customers.urls')),
+    path('api/v1/orders/', include('orders.urls')),
+    path('api/v1/rbac/', include('rbac.urls')),
 ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:48
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built concurrently so memberships stay writable
+    atomic = False
+
+    dependencies = [
+        ('memberships', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='usermembership',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['ends_at', 'id'], name='membership_active_ends_idx'),
+        ),
+    ]
@@ -44,6 +44,9 @@ class UserMembership(models.Model):
         indexes = [
             models.Index(fields=['user', 'status']),
             models.Index(fields=['ends_at']),
+            # Keyset order of the active memberships sweep_expired_grants expires
+            models.Index(fields=['ends_at', 'id'], condition=models.Q(status='active'),
+                         name='membership_active_ends_idx'),
         ]
 
     def __str__(self):
@@ -0,0 +1,40 @@
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from keya.exports import CONTENT_TYPES, StreamingExport
+from orders.models import Order
+from orders.serializers import OrderValuesSerializer
+from orders.views import parse_order_filters
+
+
+class Command(BaseCommand):
+    help = "Stream orders to a CSV or JSON Lines file (or stdout) in constant memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(CONTENT_TYPES), default='csv')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--output', help="File path; stdout when omitted")
+        parser.add_argument('--chunk-size', type=int, default=None, help="Rows per cursor fetch")
+        parser.add_argument('--since', help="ISO 8601 datetime, inclusive")
+        parser.add_argument('--until', help="ISO 8601 datetime, exclusive")
+        parser.add_argument('--payment-status')
+        parser.add_argument('--shipping-status')
+        parser.add_argument('--customer', help="Customer id")
+
+    def handle(self, *args, **options):
+        try:
+            filters = parse_order_filters({
+                param: options[param] for param in ('since', 'until', 'payment_status', 'shipping_status', 'customer')
+            })
+        except ValueError as e:
+            raise CommandError(str(e))
+        export = StreamingExport(Order.objects.filter(**filters).order_by('created_at', 'id'), OrderValuesSerializer(),
+                                 options['format'], options['gzip'], options['chunk_size'])
+
+        start = time.perf_counter()
+        if options['output']:
+            with open(options['output'], 'wb') as stream:
+                size = export.write(stream)
+        else:
+            size = export.write(sys.stdout.buffer)
+        self.stderr.write(f"Exported {export.row_count} orders ({size} bytes) in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,70 @@
+import time
+from uuid import UUID
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connections
+from django.core.management.base import BaseCommand
+from customers.models import Customer
+from orders.services.customer_metrics_service import CustomerMetricsAudit
+
+DRIFT_KINDS = ('order_count', 'lifetime_value', 'order dates', 'user lifetime_value')
+
+
+def chunk_bounds(chunk_size):
+    """Yield [low, high) customer id ranges of chunk_size customers, the last one open-ended"""
+    ids = Customer.objects.order_by('pk').values_list('pk', flat=True)
+    low = UUID(int=0)
+    while True:
+        high = ids.filter(pk__gt=low)[chunk_size - 1:chunk_size].first()
+        if high is None:
+            yield low, None
+            return
+        # Exclusive bound just past the chunk's last id
+        high = UUID(int=high.int + 1)
+        yield low, high
+        low = high
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute customer order_count, lifetime_value and order dates (and linked "
+        "User.lifetime_value) from orders in parallel chunks and report, or --repair, drift"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Customers per chunk")
+        parser.add_argument('--workers', type=int, default=4, help="Chunks checked concurrently, one connection each")
+        parser.add_argument('--repair', action='store_true', help="Rewrite drifted rows from orders_order")
+
+    def handle(self, *args, **options):
+        repair = options['repair']
+
+        def check(bounds):
+            try:
+                drift = CustomerMetricsAudit.verify(*bounds)
+                if repair and drift:
+                    CustomerMetricsAudit.repair([row[0] for row in drift])
+                return drift
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        drifted = Counter()
+        customers = 0
+        examples = []
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for drift in executor.map(check, chunk_bounds(options['chunk_size'])):
+                customers += len(drift)
+                for row in drift:
+                    drifted.update(kind for kind, flag in zip(DRIFT_KINDS, row[1:]) if flag)
+                examples.extend(str(row[0]) for row in drift[:5 - len(examples)])
+        elapsed = time.perf_counter() - start
+
+        total = Customer.objects.count()
+        self.stdout.write(f"Checked {total} customers in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f}/s)")
+        self.stdout.write(f"{customers} customers drifted" + (", repaired" if repair and customers else ""))
+        for kind in DRIFT_KINDS:
+            if drifted[kind]:
+                self.stdout.write(f"  {kind}: {drifted[kind]}")
+        if examples:
+            self.stdout.write("e.g. " + ", ".join(examples))
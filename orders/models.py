@@ -1,5 +1,5 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from customers.models import Customer 
 from users.models import Profile, Address
@@ -45,6 +45,11 @@ class Order(models.Model):
     def __str__(self):
         return f"Order {self.id} for {self.customer.email}"
 
+    def save(self, *args, **kwargs):
+        # orders.signals updates the customer's metrics inside this transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
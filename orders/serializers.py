@@ -0,0 +1,13 @@
+from rest_framework import serializers
+from customers.serializers import ValuesSerializer
+from .models import Order
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Order
+        fields = '__all__'
+
+
+class OrderValuesSerializer(ValuesSerializer):
+    serializer_class = OrderSerializer
@@ -0,0 +1,147 @@
+from decimal import Decimal
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Greatest, Least
+from customers.models import Customer
+from users.models import User
+
+
+def order_state(order):
+    """What an order contributes to its customer's metrics"""
+    # An unsaved or just-created instance still holds whatever it was given, e.g. '25.00'
+    value = Decimal(order['total_amount'] or 0) if order['payment_status'] in settings.CUSTOMER_LIFETIME_VALUE_STATUSES else Decimal(0)
+    return {'customer_id': order['customer_id'], 'value': value, 'created_at': order['created_at']}
+
+
+class CustomerMetrics:
+    """
+    Keeps Customer.order_count, lifetime_value, first/last_order_date and
+    the linked User.lifetime_value in step with orders.
+
+    orders.signals applies the difference between an order's state before
+    and after each save or delete as conditional F() updates, inside the
+    order's own transaction. Every order counts towards order_count and
+    the order dates; lifetime_value sums the orders whose payment_status is
+    in CUSTOMER_LIFETIME_VALUE_STATUSES, so a refund takes the value off
+    again. Writes that skip signals (queryset.update(), bulk_create, raw
+    SQL) are caught by verify_customer_metrics, which starts from customers:
+    deleting customers with their orders (CustomerPurge) must adjust the
+    linked users itself.
+    """
+    FIELDS = ('customer_id', 'payment_status', 'total_amount', 'created_at')
+
+    @staticmethod
+    def add_value(customer_id, delta):
+        if not delta:
+            return
+        Customer.objects.filter(pk=customer_id).update(lifetime_value=F('lifetime_value') + delta)
+        User.objects.filter(customer_profile=customer_id).update(lifetime_value=F('lifetime_value') + delta)
+
+    @staticmethod
+    def add(state):
+        # LEAST/GREATEST skip NULLs on PostgreSQL, so a first order just sets both dates
+        Customer.objects.filter(pk=state['customer_id']).update(
+            order_count=F('order_count') + 1,
+            first_order_date=Least('first_order_date', state['created_at']),
+            last_order_date=Greatest('last_order_date', state['created_at']),
+        )
+        CustomerMetrics.add_value(state['customer_id'], state['value'])
+
+    @staticmethod
+    def remove(state):
+        from orders.models import Order
+        orders = Order.objects.filter(customer=OuterRef('pk')).values('created_at')
+        # The other orders' dates are not known here; the (customer, created_at) index has them
+        Customer.objects.filter(pk=state['customer_id']).update(
+            order_count=Greatest(F('order_count') - 1, 0),
+            first_order_date=Subquery(orders.order_by('created_at')[:1]),
+            last_order_date=Subquery(orders.order_by('-created_at')[:1]),
+        )
+        CustomerMetrics.add_value(state['customer_id'], -state['value'])
+
+    @staticmethod
+    def apply(before, after):
+        """Apply the change from order state `before` to `after` (either may be None)"""
+        if before and after and before['customer_id'] == after['customer_id'] \
+                and before['created_at'] == after['created_at']:
+            CustomerMetrics.add_value(after['customer_id'], after['value'] - before['value'])
+            return
+        if before:
+            CustomerMetrics.remove(before)
+        if after:
+            CustomerMetrics.add(after)
+
+
+class CustomerMetricsAudit:
+    """
+    Recomputes customer metrics from orders_order for one range of
+    customer ids and reports (or repairs) rows that drifted.
+    """
+    DRIFT_SQL = """
+        WITH expected AS (
+            SELECT c."id",
+                   count(o."id") AS order_count,
+                   coalesce(sum(o."total_amount") FILTER (WHERE o."payment_status" = ANY(%(statuses)s)), 0) AS lifetime_value,
+                   min(o."created_at") AS first_order_date,
+                   max(o."created_at") AS last_order_date
+            FROM "customers_customer" c
+            LEFT JOIN "orders_order" o ON o."customer_id" = c."id"
+            WHERE c."id" >= %(low)s AND (%(high)s::uuid IS NULL OR c."id" < %(high)s)
+            GROUP BY c."id"
+        )
+        SELECT c."id",
+               c."order_count" IS DISTINCT FROM e.order_count,
+               c."lifetime_value" IS DISTINCT FROM e.lifetime_value,
+               c."first_order_date" IS DISTINCT FROM e.first_order_date
+                   OR c."last_order_date" IS DISTINCT FROM e.last_order_date,
+               u."id" IS NOT NULL AND u."lifetime_value" IS DISTINCT FROM e.lifetime_value
+        FROM expected e
+        JOIN "customers_customer" c ON c."id" = e."id"
+        LEFT JOIN "users_user" u ON u."id" = c."linked_user_id"
+        WHERE c."order_count" IS DISTINCT FROM e.order_count
+           OR c."lifetime_value" IS DISTINCT FROM e.lifetime_value
+           OR c."first_order_date" IS DISTINCT FROM e.first_order_date
+           OR c."last_order_date" IS DISTINCT FROM e.last_order_date
+           OR (u."id" IS NOT NULL AND u."lifetime_value" IS DISTINCT FROM e.lifetime_value)
+    """
+
+    REPAIR_SQL = """
+        WITH expected AS (
+            SELECT c."id",
+                   count(o."id") AS order_count,
+                   coalesce(sum(o."total_amount") FILTER (WHERE o."payment_status" = ANY(%(statuses)s)), 0) AS lifetime_value,
+                   min(o."created_at") AS first_order_date,
+                   max(o."created_at") AS last_order_date
+            FROM "customers_customer" c
+            LEFT JOIN "orders_order" o ON o."customer_id" = c."id"
+            WHERE c."id" = ANY(%(ids)s)
+            GROUP BY c."id"
+        ), fixed AS (
+            UPDATE "customers_customer" c
+            SET "order_count" = e.order_count, "lifetime_value" = e.lifetime_value,
+                "first_order_date" = e.first_order_date, "last_order_date" = e.last_order_date
+            FROM expected e WHERE c."id" = e."id"
+            RETURNING c."linked_user_id", c."lifetime_value"
+        )
+        UPDATE "users_user" u SET "lifetime_value" = fixed."lifetime_value"
+        FROM fixed WHERE u."id" = fixed."linked_user_id"
+    """
+
+    @staticmethod
+    def verify(low, high):
+        """[(customer id, count drift, value drift, date drift, user value drift)] for ids in [low, high)"""
+        params = {'statuses': list(settings.CUSTOMER_LIFETIME_VALUE_STATUSES), 'low': low, 'high': high}
+        with connection.cursor() as cursor:
+            cursor.execute(CustomerMetricsAudit.DRIFT_SQL, params)
+            return cursor.fetchall()
+
+    @staticmethod
+    def repair(customer_ids):
+        """Recompute the given customers with their rows locked, so concurrent order writes queue behind"""
+        with transaction.atomic():
+            list(Customer.objects.select_for_update().filter(pk__in=customer_ids).order_by('pk').values_list('pk'))
+            with connection.cursor() as cursor:
+                cursor.execute(CustomerMetricsAudit.REPAIR_SQL, {
+                    'statuses': list(settings.CUSTOMER_LIFETIME_VALUE_STATUSES), 'ids': list(customer_ids),
+                })
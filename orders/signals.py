@@ -0,0 +1,32 @@
+from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from orders.models import Order
+from orders.services.customer_metrics_service import CustomerMetrics, order_state
+
+
+def locked_state(order):
+    # The committed row, locked until the order's transaction ends, so
+    # concurrent saves of one order apply their deltas one after another
+    row = Order.objects.select_for_update().filter(pk=order.pk).values(*CustomerMetrics.FIELDS).first()
+    return order_state(row) if row else None
+
+
+def current_state(order):
+    return order_state({field: getattr(order, field) for field in CustomerMetrics.FIELDS})
+
+
+@receiver(pre_save, sender=Order)
+@receiver(pre_delete, sender=Order)
+def remember_order_state(sender, instance, **kwargs):
+    instance._metrics_before = None if instance._state.adding else locked_state(instance)
+
+
+@receiver(post_save, sender=Order)
+def apply_order_metrics(sender, instance, **kwargs):
+    CustomerMetrics.apply(getattr(instance, '_metrics_before', None), current_state(instance))
+    instance._metrics_before = None
+
+
+@receiver(post_delete, sender=Order)
+def remove_order_metrics(sender, instance, **kwargs):
+    CustomerMetrics.apply(getattr(instance, '_metrics_before', None), None)
@@ -0,0 +1,141 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from customers.models import Customer
+from orders.models import Order
+from orders.serializers import OrderValuesSerializer
+from orders.services.customer_metrics_service import CustomerMetricsAudit
+from users.models import User
+from users.tests import FakeRedisMixin
+
+
+class CustomerMetricsTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.ann = Customer.objects.create(email='ann@example.com', linked_user=User.objects.create_user(email='ann@example.com'))
+        self.bob = Customer.objects.create(email='bob@example.com', linked_user=User.objects.create_user(email='bob@example.com'))
+
+    def create_order(self, customer, total_amount, payment_status='pending', days_ago=0):
+        return Order.objects.create(
+            customer=customer, currency='USD', total_amount=total_amount, payment_status=payment_status,
+            created_at=self.now - timedelta(days=days_ago)
+        )
+
+    def assertMetrics(self, customer, order_count, lifetime_value, first_days_ago=None, last_days_ago=None):
+        customer.refresh_from_db()
+        customer.linked_user.refresh_from_db()
+        dates = [None if days is None else self.now - timedelta(days=days) for days in (first_days_ago, last_days_ago)]
+        self.assertEqual(
+            (customer.order_count, customer.lifetime_value, customer.first_order_date, customer.last_order_date),
+            (order_count, Decimal(lifetime_value), *dates)
+        )
+        self.assertEqual(customer.linked_user.lifetime_value, Decimal(lifetime_value))
+
+    def test_order_changes_keep_the_metrics_in_step(self):
+        old = self.create_order(self.ann, '40.00', 'paid', days_ago=10)
+        order = self.create_order(self.ann, '25.00', days_ago=2)
+        self.assertMetrics(self.ann, 2, '40.00', 10, 2)
+
+        order.payment_status = 'paid'
+        order.save()
+        self.assertMetrics(self.ann, 2, '65.00', 10, 2)
+
+        order.payment_status = 'refunded'
+        order.save()
+        self.assertMetrics(self.ann, 2, '40.00', 10, 2)
+
+        order.payment_status = 'paid'
+        order.customer = self.bob
+        order.save()
+        self.assertMetrics(self.ann, 1, '40.00', 10, 10)
+        self.assertMetrics(self.bob, 1, '25.00', 2, 2)
+
+        old.created_at = self.now - timedelta(days=1)
+        old.save()
+        self.assertMetrics(self.ann, 1, '40.00', 1, 1)
+
+        old.delete()
+        self.assertMetrics(self.ann, 0, '0.00')
+        order.delete()
+        self.assertMetrics(self.bob, 0, '0.00')
+
+    def test_drift_is_reported_and_repaired(self):
+        self.create_order(self.ann, '40.00', 'paid', days_ago=3)
+        self.create_order(self.bob, '10.00', 'paid')
+        # queryset.update() skips the signals
+        Order.objects.filter(customer=self.ann).update(payment_status='refunded')
+        self.assertEqual(CustomerMetricsAudit.verify(uuid.UUID(int=0), None), [(self.ann.pk, False, True, False, True)])
+
+        CustomerMetricsAudit.repair([self.ann.pk])
+
+        self.assertEqual(CustomerMetricsAudit.verify(uuid.UUID(int=0), None), [])
+        self.assertMetrics(self.ann, 1, '0.00', 3, 3)
+        self.assertMetrics(self.bob, 1, '10.00', 0, 0)
+
+
+@override_settings(EXPORT_BUFFER_SIZE=256)
+class OrderExportTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        admin = User.objects.create_superuser(email='admin@corp.example', password='correct-horse-7')
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {AccessToken.for_user(admin)}"
+        self.now = timezone.now()
+        self.ann = Customer.objects.create(email='ann@example.com')
+        bob = Customer.objects.create(email='bob@example.com')
+        for index in range(10):
+            Order.objects.create(
+                customer=self.ann if index % 2 else bob, currency='USD', total_amount=Decimal('9.99') * index,
+                payment_status='paid' if index % 3 else 'pending', created_at=self.now - timedelta(days=index),
+            )
+
+    def expected(self, **filters):
+        serializer = OrderValuesSerializer()
+        queryset = Order.objects.filter(**filters).order_by('created_at', 'id')
+        return serializer.many(queryset.values(*serializer.value_fields))
+
+    def test_filtered_jsonl_matches_the_values_serializer(self):
+        since = self.now - timedelta(days=5)
+
+        response = self.client.get(reverse('order-export'), {
+            'output': 'jsonl', 'gzip': 'true', 'customer': str(self.ann.pk), 'since': since.isoformat(),
+        })
+
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="orders.jsonl.gz"')
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        expected = self.expected(customer=self.ann, created_at__gte=since)
+        self.assertEqual(len(expected), 3)
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_bad_parameters_are_rejected(self):
+        for params in ({'output': 'xml'}, {'since': 'yesterday'}, {'until': '2024-13-01T00:00'}, {'customer': '42'}):
+            with self.subTest(params=params):
+                response = self.client.get(reverse('order-export'), params)
+
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+    def test_command_writes_the_filtered_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'orders.jsonl')
+            call_command('export_orders', format='jsonl', output=path, payment_status='paid', chunk_size=2,
+                         stderr=io.StringIO())
+            with open(path) as f:
+                rows = [json.loads(line) for line in f]
+
+        self.assertEqual(rows, self.expected(payment_status='paid'))
+
+    def test_command_rejects_bad_filters(self):
+        with self.assertRaises(CommandError):
+            call_command('export_orders', customer='42', stderr=io.StringIO())
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .views import OrderExportView
+
+urlpatterns = [
+    path('export/', OrderExportView.as_view(), name='order-export'),
+]
@@ -0,0 +1,49 @@
+from uuid import UUID
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext as _
+from rest_framework import generics, status
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from keya.exports import StreamingExport, export_options
+from .models import Order
+from .serializers import OrderValuesSerializer
+
+
+def parse_order_filters(params):
+    """ORM filters from the export query parameters; raises ValueError on malformed ones"""
+    filters = {}
+    for param, lookup in (('since', 'created_at__gte'), ('until', 'created_at__lt')):
+        if params.get(param):
+            value = parse_datetime(params[param])
+            if value is None:
+                raise ValueError(_("%(param)s must be an ISO 8601 datetime") % {'param': param})
+            filters[lookup] = value
+    for field in ('payment_status', 'shipping_status'):
+        if params.get(field):
+            filters[field] = params[field]
+    if params.get('customer'):
+        try:
+            filters['customer_id'] = UUID(params['customer'])
+        except ValueError:
+            raise ValueError(_("customer must be a customer id"))
+    return filters
+
+
+class OrderExportView(generics.GenericAPIView):
+    """Stream orders as CSV or JSON Lines, optionally gzipped and filtered by date, status or customer"""
+    permission_classes = [IsAdminUser]
+    queryset = Order.objects.all()
+
+    def get(self, request):
+        output, compress = export_options(request.query_params)
+        if output is None:
+            return Response({"error": _("Export format must be csv or jsonl")}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            filters = parse_order_filters(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Walks the created_at index, so rows stream without sorting the whole table first
+        queryset = self.get_queryset().filter(**filters).order_by('created_at', 'id')
+        export = StreamingExport(queryset, OrderValuesSerializer(), output, compress)
+        return export.response(request, 'orders')
@@ -0,0 +1,46 @@
+import time
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+from rbac.models import UserPermission, UserRole
+from memberships.models import UserMembership
+from rbac.services.expiry_sweeper import ExpirySweep
+from rbac.services.permission_resolver import PermissionResolver
+
+
+def get_sweeps(now):
+    return [
+        # (sweep, invalidates compiled permissions)
+        (ExpirySweep('user roles', UserRole, 'expires_at'), True),
+        (ExpirySweep('user permissions', UserPermission, 'expires_at'), True),
+        (ExpirySweep(
+            'memberships', UserMembership, 'ends_at',
+            assignments={'status': 'expired', 'updated_at': now},
+            extra_where=('"status" = %s', ['active']),
+        ), False),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Delete expired user roles and permissions and expire ended memberships in keyset-ordered chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Rows per transaction")
+        parser.add_argument('--interval', type=float, default=None,
+                            help="Keep sweeping every N seconds instead of running once")
+
+    def handle(self, *args, **options):
+        while True:
+            now = timezone.now()
+            for sweep, invalidates in get_sweeps(now):
+                swept = 0
+                affected = set()
+                for rows, user_ids in sweep.chunks(now, options['chunk_size']):
+                    if invalidates:
+                        # One cache delete and version bump per chunk instead of per row
+                        PermissionResolver.invalidate_users(user_ids)
+                    swept += rows
+                    affected |= user_ids
+                self.stdout.write(f"{sweep.name}: {swept} rows, {len(affected)} users")
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
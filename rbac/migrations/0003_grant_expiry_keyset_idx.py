@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-17 19:58
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built concurrently so grants stay writable
+    atomic = False
+
+    dependencies = [
+        ('rbac', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='userpermission',
+            index=models.Index(condition=models.Q(('expires_at__isnull', False)), fields=['expires_at', 'id'], name='userpermission_expiring_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userrole',
+            index=models.Index(condition=models.Q(('expires_at__isnull', False)), fields=['expires_at', 'id'], name='userrole_expiring_idx'),
+        ),
+    ]
@@ -85,6 +85,9 @@ class UserRole(models.Model):
         indexes = [
             models.Index(fields=['user', 'role']),
             models.Index(fields=['expires_at']),
+            # Keyset order of sweep_expired_grants; grants without an expiry never match it
+            models.Index(fields=['expires_at', 'id'], condition=models.Q(expires_at__isnull=False),
+                         name='userrole_expiring_idx'),
         ]
 
     def __str__(self):
@@ -105,6 +108,9 @@ class UserPermission(models.Model):
         indexes = [
             models.Index(fields=['user', 'permission']),
             models.Index(fields=['grant_type']),
+            # Keyset order of sweep_expired_grants; grants without an expiry never match it
+            models.Index(fields=['expires_at', 'id'], condition=models.Q(expires_at__isnull=False),
+                         name='userpermission_expiring_idx'),
         ]
 
     def __str__(self):
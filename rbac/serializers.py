@@ -0,0 +1,35 @@
+from django.conf import settings
+from rest_framework import serializers
+
+
+class UserFilterSerializer(serializers.Serializer):
+    is_active = serializers.BooleanField(required=False)
+    is_verified = serializers.BooleanField(required=False)
+    is_staff = serializers.BooleanField(required=False)
+    country = serializers.CharField(required=False, max_length=2)
+    email_domain = serializers.CharField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+    def validate_email_domain(self, value):
+        return '@' + value.lstrip('@')
+
+
+class BulkRoleAssignmentSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(
+        child=serializers.UUIDField(), required=False, allow_empty=False,
+        max_length=settings.RBAC_BULK_MAX_USER_IDS
+    )
+    filter = UserFilterSerializer(required=False)
+    scope_id = serializers.UUIDField(required=False, allow_null=True, default=None)
+
+    def validate(self, data):
+        if ('user_ids' in data) == ('filter' in data):
+            raise serializers.ValidationError("Provide either user_ids or filter")
+        if 'filter' in data and not data['filter']:
+            raise serializers.ValidationError({'filter': "At least one condition is required"})
+        return data
+
+
+class BulkRoleGrantSerializer(BulkRoleAssignmentSerializer):
+    expires_at = serializers.DateTimeField(required=False, allow_null=True, default=None)
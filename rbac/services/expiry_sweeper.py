@@ -0,0 +1,62 @@
+from django.db import connection, transaction
+
+
+class ExpirySweep:
+    """
+    Expires rows of one table whose `time_field` has passed.
+
+    Rows are claimed in (time_field, id) keyset order straight off the
+    time_field index, a chunk per transaction, and are either deleted or
+    updated with `assignments`. Each chunk returns the affected user ids
+    so callers can invalidate caches once per chunk.
+    """
+
+    def __init__(self, name, model, time_field, assignments=None, extra_where=None):
+        self.name = name
+        self.model = model
+        self.time_field = time_field
+        self.assignments = assignments
+        self.extra_where = extra_where
+
+    def chunks(self, now, chunk_size):
+        """Yield (rows swept, user ids affected) per chunk until none are left"""
+        cursor_position = None
+        while True:
+            rows = self.sweep_chunk(now, chunk_size, cursor_position)
+            if not rows:
+                return
+            cursor_position = max((expires_at, row_id) for _, expires_at, row_id in rows)
+            yield len(rows), {user_id for user_id, _, _ in rows}
+            if len(rows) < chunk_size:
+                return
+
+    def sweep_chunk(self, now, chunk_size, after=None):
+        table = self.model._meta.db_table
+        column = self.model._meta.get_field(self.time_field).column
+        where = [f'"{column}" <= %s']
+        params = [now]
+        if after is not None:
+            where.append(f'("{column}", "id") > (%s, %s)')
+            params.extend(after)
+        if self.extra_where:
+            where.append(self.extra_where[0])
+            params.extend(self.extra_where[1])
+
+        batch = (
+            f'SELECT "id", "{column}" FROM "{table}" WHERE {" AND ".join(where)} '
+            f'ORDER BY "{column}", "id" LIMIT %s FOR UPDATE SKIP LOCKED'
+        )
+        params.append(chunk_size)
+        returning = f'RETURNING t."user_id", batch."{column}", batch."id"'
+
+        if self.assignments is None:
+            sql = f'WITH batch AS ({batch}) DELETE FROM "{table}" t USING batch WHERE t."id" = batch."id" {returning}'
+        else:
+            columns = ', '.join(f'"{self.model._meta.get_field(name).column}" = %s' for name in self.assignments)
+            sql = f'WITH batch AS ({batch}) UPDATE "{table}" t SET {columns} FROM batch WHERE t."id" = batch."id" {returning}'
+            # The CTE comes first in the statement, so its parameters do too
+            params = params + list(self.assignments.values())
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
@@ -0,0 +1,277 @@
+import time
+import threading
+from django.conf import settings
+from django.utils import timezone
+from django.core.cache import cache
+from django.db.models import Q
+from rbac.models import Permission, RolePermission, UserPermission, UserRole
+from users.services.redis_utils import bump_generations, cache_generation, cache_set_if_generation
+
+VERSION_KEY = 'rbac:version'
+# Bumped on every invalidation; access tokens carrying older claims are ignored
+GRANTS_VERSION_KEY = 'rbac:grants-version'
+MAX_LOCAL_ENTRIES = 10000
+
+
+class CompiledPermissions:
+    """
+    A user's effective permissions as bitsets over the permission catalogue.
+
+    `global_mask` holds what applies in every scope (unscoped roles and
+    direct grants); `scoped` adds the roles assigned for one scope_id.
+    Deny grants are already cleared from every mask.
+    """
+
+    def __init__(self, global_mask=0, scoped=None, expires_at=None):
+        self.global_mask = global_mask
+        self.scoped = scoped or {}
+        # Earliest expiry among the grants used; the compiled set is stale after it
+        self.expires_at = expires_at
+        # {code: bit} the masks were built against, set by PermissionResolver.get()
+        self.catalogue = {}
+
+    def mask(self, scope=None):
+        if scope is None:
+            return self.global_mask
+        return self.scoped.get(str(scope), self.global_mask)
+
+    def has(self, code, scope=None):
+        bit = self.catalogue.get(code)
+        return bit is not None and bool(self.mask(scope) >> bit & 1)
+
+    def codes(self, scope=None):
+        mask = self.mask(scope)
+        return sorted(code for code, bit in self.catalogue.items() if mask >> bit & 1)
+
+    def to_dict(self):
+        return {'g': self.global_mask, 's': self.scoped, 'e': self.expires_at}
+
+    def to_claims(self, grants_version, catalogue_version):
+        """Compact token claims: hex masks, the versions they are valid for and the expiry"""
+        claims = {'v': grants_version, 'c': catalogue_version, 'g': format(self.global_mask, 'x')}
+        if self.scoped:
+            claims['s'] = {scope: format(mask, 'x') for scope, mask in self.scoped.items()}
+        if self.expires_at:
+            claims['e'] = int(self.expires_at)
+        return claims
+
+    @classmethod
+    def from_claims(cls, claims):
+        scoped = {scope: int(mask, 16) for scope, mask in claims.get('s', {}).items()}
+        return cls(int(claims['g'], 16), scoped, claims.get('e'))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['g'], data['s'], data['e'])
+
+
+class PermissionResolver:
+    """
+    Resolves RBAC permissions from compiled per-user bitsets.
+
+    Compiled sets are cached in Redis under the current RBAC version and
+    kept in process for RBAC_LOCAL_CACHE_TTL seconds, so a check is a dict
+    lookup and a bit test. rbac.signals invalidates the users affected by
+    a change; catalogue changes bump the version and invalidate everyone.
+    A set compiled while an invalidation of its user committed is not
+    cached: invalidate_users() bumps a per-user generation that get()
+    reads before compiling and re-checks when writing the entry.
+    """
+    _lock = threading.Lock()
+    _local = {}
+    _catalogue = (None, {})
+    _grants_version = (0, None)
+
+    @staticmethod
+    def version():
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, 1, timeout=None)
+            version = cache.get(VERSION_KEY)
+        return version
+
+    @classmethod
+    def grants_version(cls, fresh=False):
+        """Current grants version, re-read from Redis every RBAC_LOCAL_CACHE_TTL seconds"""
+        now = time.time()
+        expiry, version = cls._grants_version
+        if fresh or version is None or expiry <= now:
+            version = cache.get(GRANTS_VERSION_KEY)
+            if version is None:
+                cache.add(GRANTS_VERSION_KEY, 1, timeout=None)
+                version = cache.get(GRANTS_VERSION_KEY)
+            cls._grants_version = (now + settings.RBAC_LOCAL_CACHE_TTL, version)
+        return version
+
+    @staticmethod
+    def create_cache_key(user_id, version):
+        return f"rbac:perms:v{version}:{user_id}"
+
+    @staticmethod
+    def create_generation_key(user_id):
+        return f"rbac:perms:generation:{user_id}"
+
+    @classmethod
+    def store(cls, user_id, key, compile_, timeout):
+        """Compile and cache a set unless the user was invalidated meanwhile"""
+        generation_key = cls.create_generation_key(user_id)
+        generation = cache_generation(generation_key)
+        compiled = compile_()
+        if compiled.expires_at:
+            timeout = max(1, min(timeout, int(compiled.expires_at - time.time())))
+        cache_set_if_generation(generation_key, generation, key, compiled.to_dict(), timeout)
+        return compiled
+
+    @classmethod
+    def catalogue(cls, version=None):
+        """{permission code: bit index}, stable for a given version"""
+        version = version or cls.version()
+        cached_version, bits = cls._catalogue
+        if cached_version == version:
+            return bits
+
+        key = f"rbac:catalogue:v{version}"
+        codes = cache.get(key)
+        if codes is None:
+            codes = list(Permission.objects.order_by('code').values_list('code', flat=True))
+            cache.set(key, codes, timeout=None)
+        bits = {code: index for index, code in enumerate(codes)}
+        cls._catalogue = (version, bits)
+        return bits
+
+    @classmethod
+    def compile(cls, user_id, version=None):
+        """Build a user's CompiledPermissions from the RBAC tables"""
+        bits = cls.catalogue(version)
+        now = timezone.now()
+        active = Q(expires_at__isnull=True) | Q(expires_at__gt=now)
+        expiries = []
+
+        # Codes missing from the catalogue were added after it was built; the
+        # version bump that follows a new Permission rebuilds this set anyway
+        def bit(code):
+            return 1 << bits[code] if code in bits else 0
+
+        roles = list(UserRole.objects.filter(active, user_id=user_id).values_list('role_id', 'scope_id', 'expires_at'))
+        role_masks = {}
+        for role_id, code in RolePermission.objects.filter(
+            role_id__in={role_id for role_id, _, _ in roles}
+        ).values_list('role_id', 'permission__code'):
+            role_masks[role_id] = role_masks.get(role_id, 0) | bit(code)
+
+        global_mask = 0
+        scoped = {}
+        for role_id, scope_id, expires_at in roles:
+            mask = role_masks.get(role_id, 0)
+            if scope_id is None:
+                global_mask |= mask
+            else:
+                scoped[str(scope_id)] = scoped.get(str(scope_id), 0) | mask
+            if expires_at:
+                expiries.append(expires_at)
+
+        grants = denies = 0
+        for code, grant_type, expires_at in UserPermission.objects.filter(active, user_id=user_id).values_list(
+            'permission__code', 'grant_type', 'expires_at'
+        ):
+            if grant_type == '-':
+                denies |= bit(code)
+            else:
+                grants |= bit(code)
+            if expires_at:
+                expiries.append(expires_at)
+
+        # Explicit denies win over any role or grant, in every scope
+        global_mask = (global_mask | grants) & ~denies
+        scoped = {scope: (mask | global_mask) & ~denies for scope, mask in scoped.items()}
+        expires_at = min(expiries).timestamp() if expiries else None
+        return CompiledPermissions(global_mask, scoped, expires_at)
+
+    @classmethod
+    def get(cls, user_id, local=True):
+        """CompiledPermissions for a user, from process memory, Redis or the database"""
+        user_id = str(user_id)
+        now = time.time()
+        entry = cls._local.get(user_id)
+        if local and entry is not None and entry[0] > now:
+            return entry[1]
+
+        version = cls.version()
+        key = cls.create_cache_key(user_id, version)
+        data = cache.get(key)
+        compiled = CompiledPermissions.from_dict(data) if data is not None else None
+        # Missing, or a grant expired while cached
+        if compiled is None or (compiled.expires_at and compiled.expires_at <= now):
+            compiled = cls.store(user_id, key, lambda: cls.compile(user_id, version), settings.RBAC_CACHE_TTL)
+        compiled.catalogue = cls.catalogue(version)
+
+        local_expiry = now + settings.RBAC_LOCAL_CACHE_TTL
+        if compiled.expires_at:
+            local_expiry = min(local_expiry, compiled.expires_at)
+        with cls._lock:
+            if len(cls._local) > MAX_LOCAL_ENTRIES:
+                cls._local.clear()
+            cls._local[user_id] = (local_expiry, compiled)
+        return compiled
+
+    @classmethod
+    def has_perm(cls, user, code, scope=None):
+        """Whether the user holds permission `code` in `scope` (or globally)"""
+        if user is None or not user.is_authenticated:
+            return False
+        return cls.get(user.pk).has(code, scope)
+
+    @classmethod
+    def token_claims(cls, user_id):
+        """Claims embedding the user's permissions in a token (RBAC_TOKEN_CLAIMS)"""
+        # Read the version first: a change landing after it makes the claims stale, never wrong
+        grants_version = cls.grants_version(fresh=True)
+        return cls.get(user_id, local=False).to_claims(grants_version, cls.version())
+
+    @classmethod
+    def from_token(cls, token):
+        """
+        CompiledPermissions carried by a validated token, or None when the
+        token has none or they may be stale (RBAC changed or a grant expired)
+        """
+        claims = token.get('perms') if hasattr(token, 'get') else None
+        if not claims or claims.get('v') != cls.grants_version():
+            return None
+        if claims.get('e') and claims['e'] <= time.time():
+            return None
+        compiled = CompiledPermissions.from_claims(claims)
+        compiled.catalogue = cls.catalogue(claims['c'])
+        return compiled
+
+    @classmethod
+    def permissions(cls, user_id, scope=None):
+        """Permission codes the user holds in `scope`"""
+        return cls.get(user_id).codes(scope)
+
+    @classmethod
+    def invalidate_users(cls, user_ids):
+        user_ids = {str(user_id) for user_id in user_ids}
+        if not user_ids:
+            return
+        # Bumped first: a compile already under way then cannot store the set deleted next
+        bump_generations([cls.create_generation_key(user_id) for user_id in user_ids], settings.RBAC_CACHE_TTL)
+        version = cls.version()
+        cache.delete_many([cls.create_cache_key(user_id, version) for user_id in user_ids])
+        cls.bump_grants_version()
+        with cls._lock:
+            for user_id in user_ids:
+                cls._local.pop(user_id, None)
+
+    @classmethod
+    def invalidate_all(cls):
+        """Bump the RBAC version so every compiled set and the catalogue are rebuilt"""
+        cls.version()
+        cache.incr(VERSION_KEY)
+        cls.bump_grants_version()
+        with cls._lock:
+            cls._local.clear()
+
+    @classmethod
+    def bump_grants_version(cls):
+        cls.grants_version(fresh=True)
+        cls._grants_version = (0, cache.incr(GRANTS_VERSION_KEY))
@@ -0,0 +1,188 @@
+import time
+import hashlib
+from django.conf import settings
+from django.utils import timezone
+from django.core.cache import cache
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from rbac.models import SecurityPolicy, UserRole
+from users.services.redis_utils import (
+    acache_add, acache_generation, acache_get, acache_set, acache_set_if_generation,
+    bump_generations, cache_generation, cache_set_if_generation,
+)
+
+
+class PolicyResolver:
+    """
+    Effective SecurityPolicy config per (user, policy_type).
+
+    Configs merge in order: policies that apply to all users, then those
+    assigned to any of the user's roles, then those assigned to the user,
+    each group by policy name, later keys winning. The first two groups
+    depend only on the user's role set, so they are cached once per
+    (policy_type, role-set hash) and shared by every user with the same
+    roles. Per user only the role-set hash and any direct overlay are
+    cached. rbac.signals drops exactly the entries a change affects.
+
+    Each cache entry is written only if nothing invalidated it while it was
+    compiled: role-set entries are keyed by the type's version, and user
+    profiles are guarded by a per-user generation bumped by invalidate_users().
+    """
+
+    @staticmethod
+    def version(policy_type):
+        key = f"policy:version:{policy_type}"
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, 1, timeout=None)
+            version = cache.get(key)
+        return version
+
+    @staticmethod
+    def create_user_key(policy_type, version, user_id):
+        return f"policy:{policy_type}:v{version}:user:{user_id}"
+
+    @staticmethod
+    def create_roles_key(policy_type, version, roles_hash):
+        return f"policy:{policy_type}:v{version}:roles:{roles_hash}"
+
+    @staticmethod
+    def create_generation_key(policy_type, user_id):
+        return f"policy:{policy_type}:generation:{user_id}"
+
+    @staticmethod
+    def profile_timeout(profile):
+        ttl = settings.SECURITY_POLICY_CACHE_TTL
+        if profile['expires_at']:
+            return max(1, min(ttl, int(profile['expires_at'] - time.time())))
+        return ttl
+
+    @staticmethod
+    def roles_hash(role_ids):
+        return hashlib.sha1(','.join(sorted(map(str, role_ids))).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def merge(configs, base=None):
+        merged = dict(base or {})
+        for config in configs:
+            merged.update(config or {})
+        return merged
+
+    @staticmethod
+    def compile_roles(policy_type, role_ids):
+        """Merged config of the all-users and role-assigned policies"""
+        policies = SecurityPolicy.objects.filter(policy_type=policy_type)
+        configs = list(policies.filter(applies_to='all').order_by('name').values_list('config', flat=True))
+        if role_ids:
+            configs += list(policies.filter(
+                applies_to='roles', assignments__role_id__in=role_ids
+            ).distinct().order_by('name').values_list('config', flat=True))
+        return PolicyResolver.merge(configs, settings.SECURITY_POLICY_DEFAULTS.get(policy_type))
+
+    @staticmethod
+    def compile_user(policy_type, user_id):
+        """The user's active role ids, overlay config and when the role set next changes"""
+        active = Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())
+        roles = list(UserRole.objects.filter(active, user_id=user_id).values_list('role_id', 'expires_at'))
+        expiries = [expires_at.timestamp() for _, expires_at in roles if expires_at]
+
+        overlay = list(SecurityPolicy.objects.filter(
+            policy_type=policy_type, applies_to='users', assignments__user_id=user_id
+        ).order_by('name').values_list('config', flat=True))
+
+        return {
+            'roles': sorted({str(role_id) for role_id, _ in roles}),
+            'overlay': PolicyResolver.merge(overlay) if overlay else None,
+            'expires_at': min(expiries) if expiries else None,
+        }
+
+    @staticmethod
+    def resolve(user, policy_type):
+        """Effective config dict for a user (or for anonymous requests when user is None)"""
+        version = PolicyResolver.version(policy_type)
+        ttl = settings.SECURITY_POLICY_CACHE_TTL
+
+        profile = {'roles': [], 'overlay': None, 'expires_at': None}
+        if user is not None:
+            user_key = PolicyResolver.create_user_key(policy_type, version, user.pk)
+            profile = cache.get(user_key)
+            if profile is None or (profile['expires_at'] and profile['expires_at'] <= time.time()):
+                generation_key = PolicyResolver.create_generation_key(policy_type, user.pk)
+                generation = cache_generation(generation_key)
+                profile = PolicyResolver.compile_user(policy_type, user.pk)
+                cache_set_if_generation(
+                    generation_key, generation, user_key, profile, PolicyResolver.profile_timeout(profile)
+                )
+
+        roles_key = PolicyResolver.create_roles_key(policy_type, version, PolicyResolver.roles_hash(profile['roles']))
+        config = cache.get(roles_key)
+        if config is None:
+            config = PolicyResolver.compile_roles(policy_type, profile['roles'])
+            cache.set(roles_key, config, timeout=ttl)
+
+        if profile['overlay']:
+            config = PolicyResolver.merge([profile['overlay']], config)
+        return config
+
+    @staticmethod
+    async def aversion(policy_type):
+        key = f"policy:version:{policy_type}"
+        version = await acache_get(key)
+        if version is None:
+            await acache_add(key, 1)
+            version = await acache_get(key)
+        return version
+
+    @staticmethod
+    async def aresolve(user, policy_type):
+        """Async counterpart of resolve(); only a cache miss compiles, on a worker thread"""
+        version = await PolicyResolver.aversion(policy_type)
+        ttl = settings.SECURITY_POLICY_CACHE_TTL
+
+        profile = {'roles': [], 'overlay': None, 'expires_at': None}
+        if user is not None:
+            user_key = PolicyResolver.create_user_key(policy_type, version, user.pk)
+            profile = await acache_get(user_key)
+            if profile is None or (profile['expires_at'] and profile['expires_at'] <= time.time()):
+                generation_key = PolicyResolver.create_generation_key(policy_type, user.pk)
+                generation = await acache_generation(generation_key)
+                profile = await sync_to_async(PolicyResolver.compile_user)(policy_type, user.pk)
+                await acache_set_if_generation(
+                    generation_key, generation, user_key, profile, PolicyResolver.profile_timeout(profile)
+                )
+
+        roles_key = PolicyResolver.create_roles_key(policy_type, version, PolicyResolver.roles_hash(profile['roles']))
+        config = await acache_get(roles_key)
+        if config is None:
+            config = await sync_to_async(PolicyResolver.compile_roles)(policy_type, profile['roles'])
+            await acache_set(roles_key, config, ttl)
+
+        if profile['overlay']:
+            config = PolicyResolver.merge([profile['overlay']], config)
+        return config
+
+    @staticmethod
+    def invalidate_users(user_ids, policy_types=None):
+        """Drop cached profiles after users' roles or direct assignments change"""
+        policy_types = policy_types or settings.SECURITY_POLICY_DEFAULTS.keys()
+        # Bumped first: a compile already under way then cannot store the profile deleted next
+        bump_generations([
+            PolicyResolver.create_generation_key(policy_type, user_id)
+            for policy_type in policy_types for user_id in user_ids
+        ], settings.SECURITY_POLICY_CACHE_TTL)
+        keys = []
+        for policy_type in policy_types:
+            version = PolicyResolver.version(policy_type)
+            keys += [PolicyResolver.create_user_key(policy_type, version, user_id) for user_id in user_ids]
+        cache.delete_many(keys)
+
+    @staticmethod
+    def invalidate_type(policy_type):
+        """Bump a policy type's version after its policies or role assignments change"""
+        PolicyResolver.version(policy_type)
+        cache.incr(f"policy:version:{policy_type}")
+
+    @staticmethod
+    def invalidate_all():
+        for policy_type in settings.SECURITY_POLICY_DEFAULTS:
+            PolicyResolver.invalidate_type(policy_type)
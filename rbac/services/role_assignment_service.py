@@ -0,0 +1,120 @@
+import uuid
+from itertools import islice
+from django.conf import settings
+from django.db import connection, transaction
+from users.models import User
+from rbac.models import UserRole
+from audit.models import AuditLog
+from users.middleware import get_session_id
+from users.services.login_throttle_service import get_client_ip
+from rbac.services.permission_resolver import PermissionResolver
+from rbac.services.policy_resolver import PolicyResolver
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def invalidate_on_commit(user_ids):
+    """One cache invalidation for a whole chunk once it commits"""
+    def invalidate():
+        PermissionResolver.invalidate_users(user_ids)
+        PolicyResolver.invalidate_users(user_ids)
+    transaction.on_commit(invalidate)
+
+
+class BulkRoleAssignment:
+    """
+    Grants or revokes one role for many users, a chunk per transaction.
+
+    Rows are inserted with bulk_create and deleted with a single DELETE
+    per chunk, so no per-row signals fire; the affected users' caches are
+    invalidated once per chunk instead. Each chunk that changed anything
+    writes its own AuditLog entry (with at most chunk_size user ids) in the
+    same transaction, and audit() adds a summary with the request and the
+    total, so no entry or in-memory list grows with the operation.
+    """
+
+    def __init__(self, role, scope_id=None, chunk_size=None, request=None, requested=None):
+        self.role = role
+        self.scope_id = scope_id
+        self.chunk_size = chunk_size or settings.RBAC_BULK_CHUNK_SIZE
+        self.request = request
+        # What was asked for (ids count or filter), recorded on every entry
+        self.requested = requested or {}
+        self.operation_id = uuid.uuid4().hex
+        self.chunks = 0
+
+    def assign(self, user_ids, expires_at=None):
+        """Assign the role to every existing user in user_ids; returns how many were newly assigned"""
+        assigned = 0
+        for chunk in chunked(user_ids, self.chunk_size):
+            with transaction.atomic():
+                users = set(User.objects.filter(id__in=chunk).values_list('id', flat=True))
+                # NULL scope_ids never conflict in the unique constraint, so
+                # existing assignments are filtered out up front
+                users -= set(UserRole.objects.filter(
+                    role=self.role, scope_id=self.scope_id, user_id__in=users
+                ).values_list('user_id', flat=True))
+                UserRole.objects.bulk_create([
+                    UserRole(user_id=user_id, role=self.role, scope_id=self.scope_id, expires_at=expires_at)
+                    for user_id in users
+                ], ignore_conflicts=True)
+                if users:
+                    invalidate_on_commit(users)
+                    self.audit_chunk('assign', users)
+            assigned += len(users)
+        return assigned
+
+    def revoke(self, user_ids):
+        """Remove the role from every user in user_ids; returns how many held it"""
+        revoked = 0
+        table = UserRole._meta.db_table
+        for chunk in chunked(user_ids, self.chunk_size):
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM "{table}" WHERE "role_id" = %s AND "scope_id" IS NOT DISTINCT FROM %s '
+                    f'AND "user_id" = ANY(%s) RETURNING "user_id"',
+                    [self.role.pk, self.scope_id, list(chunk)]
+                )
+                users = {user_id for user_id, in cursor.fetchall()}
+                if users:
+                    invalidate_on_commit(users)
+                    self.audit_chunk('revoke', users)
+            revoked += len(users)
+        return revoked
+
+    def log(self, operation, values):
+        request = self.request
+        user = getattr(request, 'user', None)
+        return AuditLog.objects.create(
+            entity_type='Role',
+            entity_id=self.role.pk,
+            action='create' if operation == 'assign' else 'delete',
+            new_values=dict(
+                values,
+                operation=f'bulk_{operation}',
+                operation_id=self.operation_id,
+                scope_id=str(self.scope_id) if self.scope_id else None,
+            ),
+            actor=user if user is not None and user.is_authenticated else None,
+            ip_address=get_client_ip(request),
+            device_session_id=get_session_id(request),
+            api_endpoint=getattr(request, 'path', None),
+            context={'requested': self.requested},
+        )
+
+    def audit_chunk(self, operation, user_ids):
+        """The users one chunk changed, committed with the chunk"""
+        self.chunks += 1
+        return self.log(operation, {
+            'chunk': self.chunks,
+            'count': len(user_ids),
+            'user_ids': sorted(str(user_id) for user_id in user_ids),
+        })
+
+    def audit(self, operation, count):
+        """Summary entry for the whole operation; the chunk entries share its operation_id"""
+        return self.log(operation, {'count': count, 'chunks': self.chunks})
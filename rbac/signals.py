@@ -0,0 +1,66 @@
+from django.db import transaction
+from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_save
+from rbac.models import Permission, PolicyAssignment, RolePermission, SecurityPolicy, UserPermission, UserRole
+from rbac.services.permission_resolver import PermissionResolver
+from rbac.services.policy_resolver import PolicyResolver
+
+# Invalidation waits for the commit so that a request recompiling right
+# after it sees the new rows. A recompile that read the old rows before the
+# commit is caught by the resolvers themselves: they only cache what they
+# compiled if the user's generation (or the version) did not move meanwhile
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+@receiver(post_save, sender=UserPermission)
+@receiver(post_delete, sender=UserPermission)
+def invalidate_user_permissions(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: PermissionResolver.invalidate_users([user_id]))
+
+
+@receiver(post_save, sender=RolePermission)
+@receiver(post_delete, sender=RolePermission)
+def invalidate_role_permissions(sender, instance, **kwargs):
+    # Only the users holding the role see a different permission set
+    role_id = instance.role_id
+    transaction.on_commit(lambda: PermissionResolver.invalidate_users(
+        UserRole.objects.filter(role_id=role_id).values_list('user_id', flat=True).distinct()
+    ))
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_catalogue(sender, instance, **kwargs):
+    # Added, renamed or removed codes shift the bit positions every compiled set uses
+    transaction.on_commit(PermissionResolver.invalidate_all)
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+def invalidate_user_policies(sender, instance, **kwargs):
+    # A different role set points the user at another shared policy entry
+    user_id = instance.user_id
+    transaction.on_commit(lambda: PolicyResolver.invalidate_users([user_id]))
+
+
+@receiver(post_save, sender=SecurityPolicy)
+@receiver(post_delete, sender=SecurityPolicy)
+def invalidate_security_policy(sender, instance, **kwargs):
+    # policy_type may have changed too, so every type is rebuilt
+    transaction.on_commit(PolicyResolver.invalidate_all)
+
+
+@receiver(post_save, sender=PolicyAssignment)
+@receiver(post_delete, sender=PolicyAssignment)
+def invalidate_policy_assignment(sender, instance, **kwargs):
+    policy_type = SecurityPolicy.objects.filter(pk=instance.policy_id).values_list('policy_type', flat=True).first()
+    if policy_type is None:
+        # Deleted with its policy, which invalidates on its own
+        return
+    user_id = instance.user_id
+    if user_id:
+        transaction.on_commit(lambda: PolicyResolver.invalidate_users([user_id], [policy_type]))
+    else:
+        transaction.on_commit(lambda: PolicyResolver.invalidate_type(policy_type))
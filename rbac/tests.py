@@ -0,0 +1,106 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from audit.models import AuditLog
+from rbac.models import Permission, PolicyAssignment, Role, SecurityPolicy, UserPermission, UserRole
+from rbac.services.permission_resolver import PermissionResolver
+from rbac.services.policy_resolver import PolicyResolver
+from users.models import User
+from users.tests import FakeRedisMixin
+
+
+class ResolverCacheRaceTests(FakeRedisMixin, TestCase):
+    """A compile that read the rows before a change commits must not be cached after its invalidation"""
+
+    def setUp(self):
+        super().setUp()
+        for patcher in (
+            mock.patch.dict(PermissionResolver._local, clear=True),
+            mock.patch.object(PermissionResolver, '_catalogue', (None, {})),
+            mock.patch.object(PermissionResolver, '_grants_version', (0, None)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(email='ann@example.com', password='correct-horse-7')
+        self.permission = Permission.objects.create(code='order:refund', name='Refund', category='order')
+
+    def commit_during(self, compile_, change):
+        """Wrap compile_ so that `change` commits (running its invalidation) after the rows were read"""
+        def racing(*args):
+            result = compile_(*args)
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            return result
+        return racing
+
+    def test_permissions_compiled_before_a_grant_are_not_cached(self):
+        grant = lambda: UserPermission.objects.create(user=self.user, permission=self.permission, grant_type='+')
+        with mock.patch.object(PermissionResolver, 'compile',
+                               side_effect=self.commit_during(PermissionResolver.compile, grant)):
+            self.assertFalse(PermissionResolver.get(self.user.pk, local=False).has('order:refund'))
+
+        self.assertTrue(PermissionResolver.get(self.user.pk, local=False).has('order:refund'))
+
+    def test_unchanged_permissions_are_cached(self):
+        PermissionResolver.get(self.user.pk, local=False)
+
+        with self.assertNumQueries(0):
+            PermissionResolver.get(self.user.pk, local=False)
+
+    def test_policy_profiles_compiled_before_an_assignment_are_not_cached(self):
+        policy = SecurityPolicy.objects.create(
+            name='Long passwords', policy_type='password', applies_to='users', config={'min_length': 16}
+        )
+        assign = lambda: PolicyAssignment.objects.create(policy=policy, user=self.user)
+
+        for resolve in (PolicyResolver.resolve, async_to_sync(PolicyResolver.aresolve)):
+            with self.subTest(resolve=resolve):
+                with mock.patch.object(PolicyResolver, 'compile_user',
+                                       side_effect=self.commit_during(PolicyResolver.compile_user, assign)):
+                    self.assertEqual(resolve(self.user, 'password'), {})
+
+                self.assertEqual(resolve(self.user, 'password'), {'min_length': 16})
+                PolicyAssignment.objects.all().delete()
+                PolicyResolver.invalidate_users([self.user.pk])
+
+
+@override_settings(RBAC_BULK_CHUNK_SIZE=2, RBAC_BULK_MAX_USER_IDS=5)
+class BulkRoleAssignmentTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        admin = User.objects.create_superuser(email='admin@corp.example', password='correct-horse-7')
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {AccessToken.for_user(admin)}"
+        self.role = Role.objects.create(name='Support')
+        self.users = [User.objects.create_user(email=f"user{index}@example.com") for index in range(5)]
+
+    def post(self, name, data):
+        return self.client.post(reverse(name, args=[self.role.pk]), data, content_type='application/json')
+
+    def test_filter_assignment_is_audited_per_chunk(self):
+        response = self.post('role-bulk-assign', {'filter': {'email_domain': 'example.com'}})
+
+        self.assertEqual(response.json()['assigned'], 5)
+        self.assertEqual(UserRole.objects.filter(role=self.role).count(), 5)
+        entries = list(AuditLog.objects.filter(entity_id=self.role.pk).order_by('id'))
+        *chunks, summary = entries
+        self.assertEqual([entry.new_values['count'] for entry in chunks], [2, 2, 1])
+        self.assertEqual(
+            sorted(user_id for entry in chunks for user_id in entry.new_values['user_ids']),
+            sorted(str(user.pk) for user in self.users)
+        )
+        self.assertNotIn('user_ids', summary.new_values)
+        self.assertEqual((summary.new_values['count'], summary.new_values['chunks']), (5, 3))
+        self.assertEqual(summary.context['requested'], {'filter': {'email_domain': '@example.com'}})
+        self.assertEqual({entry.new_values['operation_id'] for entry in entries}, {summary.new_values['operation_id']})
+
+    def test_filter_matching_too_many_users_is_rejected(self):
+        User.objects.create_user(email='user5@example.com')
+
+        response = self.post('role-bulk-revoke', {'filter': {'email_domain': 'example.com'}})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('filter', response.json())
+        self.assertFalse(AuditLog.objects.exists())
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .views import BulkRoleAssignView, BulkRoleRevokeView
+
+urlpatterns = [
+    path('roles/<uuid:id>/assignments/bulk/', BulkRoleAssignView.as_view(), name='role-bulk-assign'),
+    path('roles/<uuid:id>/assignments/bulk/revoke/', BulkRoleRevokeView.as_view(), name='role-bulk-revoke'),
+]
@@ -0,0 +1,91 @@
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from users.models import User
+from rbac.models import Role
+from rbac.serializers import BulkRoleAssignmentSerializer, BulkRoleGrantSerializer
+from rbac.services.role_assignment_service import BulkRoleAssignment
+
+USER_FILTER_LOOKUPS = {
+    'email_domain': 'email__iendswith',
+    'created_after': 'created_at__gte',
+    'created_before': 'created_at__lt',
+}
+
+
+def filter_users(data):
+    lookups = {USER_FILTER_LOOKUPS.get(name, name): value for name, value in data['filter'].items()}
+    return User.objects.filter(**lookups).order_by()
+
+
+def check_filter_size(data):
+    """
+    Error response when a filter matches more users than one request may
+    change (RBAC_BULK_MAX_USER_IDS, as for explicit ids), else None
+    """
+    limit = settings.RBAC_BULK_MAX_USER_IDS
+    # Counted up to one past the limit rather than over every match
+    if 'filter' in data and filter_users(data)[:limit + 1].count() > limit:
+        return Response({'filter': [
+            f"Matches more than {limit} users; narrow it, e.g. with created_after/created_before"
+        ]}, status=status.HTTP_400_BAD_REQUEST)
+    return None
+
+
+def get_target_user_ids(data, chunk_size):
+    """The requested user ids, streamed from the database when given as a filter"""
+    if 'user_ids' in data:
+        return list(dict.fromkeys(data['user_ids']))
+    return filter_users(data).values_list('id', flat=True).iterator(chunk_size=chunk_size)
+
+
+def describe_request(data):
+    """What was asked for, for the audit entry"""
+    if 'filter' in data:
+        return {'filter': {name: str(value) for name, value in data['filter'].items()}}
+    return {'user_ids': len(data['user_ids'])}
+
+
+class BulkRoleAssignView(APIView):
+    """Assign a role to a list of users, or to every user matching a filter"""
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, id):
+        role = get_object_or_404(Role, pk=id)
+        serializer = BulkRoleGrantSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        error = check_filter_size(data)
+        if error:
+            return error
+
+        bulk = BulkRoleAssignment(role, data['scope_id'], request=request, requested=describe_request(data))
+        assigned = bulk.assign(get_target_user_ids(data, bulk.chunk_size), data['expires_at'])
+        bulk.audit('assign', assigned)
+        return Response({'role': str(role.pk), 'assigned': assigned}, status=status.HTTP_200_OK)
+
+
+class BulkRoleRevokeView(APIView):
+    """Remove a role from a list of users, or from every user matching a filter"""
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, id):
+        role = get_object_or_404(Role, pk=id)
+        serializer = BulkRoleAssignmentSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        error = check_filter_size(data)
+        if error:
+            return error
+
+        bulk = BulkRoleAssignment(role, data['scope_id'], request=request, requested=describe_request(data))
+        revoked = bulk.revoke(get_target_user_ids(data, bulk.chunk_size))
+        bulk.audit('revoke', revoked)
+        return Response({'role': str(role.pk), 'revoked': revoked}, status=status.HTTP_200_OK)
@@ -0,0 +1,64 @@
+from django.db import router
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+# Bump when SNAPSHOT_FIELDS changes so old cache entries are ignored
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FIELDS = ('id', 'is_active', 'is_staff', 'is_verified', 'deleted_at')
+
+
+def create_snapshot_key(user_id):
+    """Create a Redis key for a user's authentication snapshot"""
+    return f"user-snapshot:v{SNAPSHOT_VERSION}:{user_id}"
+
+
+def invalidate_user_snapshot(user_id):
+    cache.delete(create_snapshot_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that builds request.user from a small cached
+    snapshot instead of loading the whole users row on every request.
+
+    The returned user only has SNAPSHOT_FIELDS loaded; other fields are
+    deferred and fetched on first access, and saving it only writes the
+    loaded fields.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Needs the password hash, which is not part of the snapshot
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = create_snapshot_key(user_id)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = self.user_model._default_manager.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).values(*SNAPSHOT_FIELDS).first()
+            if snapshot is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            cache.set(key, snapshot, timeout=settings.USER_SNAPSHOT_TTL)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not snapshot['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if snapshot['deleted_at'] is not None:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        # from_db() expects partial values in concrete field order
+        field_names = [field.attname for field in self.user_model._meta.concrete_fields if field.attname in snapshot]
+        return self.user_model.from_db(
+            router.db_for_read(self.user_model),
+            field_names,
+            [snapshot[name] for name in field_names],
+        )
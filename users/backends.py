@@ -1,22 +1,34 @@
-from django.db.models import Q
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
+from users.services.identifier_service import IdentifierService
+from users.services.login_throttle_service import LoginThrottle, get_client_ip
+from users.services.auth_history_service import record_auth_event
 
 class EmailPhoneAuthBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
-        User = get_user_model()
-        try:
-            # Try to find user by email or phone
-            user = User.objects.get(Q(email=username) | Q(phone=username))
-            
-            # Check password and user status
-            if user.check_password(password) and self.user_can_authenticate(user):
-                return user
+        if username is None or password is None:
             return None
-        except User.DoesNotExist:
+
+        ip = get_client_ip(request)
+
+        # Resolve the identifier against its own indexed column (cached)
+        user = IdentifierService.resolve(username)
+
+        # Locked out users/IPs are rejected before any hashing (raises LoginLocked,
+        # a PermissionDenied, which stops authenticate() trying other backends)
+        LoginThrottle.check(user, ip)
+
+        if user is None:
+            # Run the hasher anyway so unknown identifiers take as long as known ones
+            get_user_model()().set_password(password)
+            LoginThrottle.record_failure(None, ip)
             return None
-        except User.MultipleObjectsReturned:
-            # Handle case where same value exists in both email and phone fields
-            return User.objects.filter(
-                Q(email=username) | Q(phone=username)
-            ).first()
\ No newline at end of file
+
+        # Check password and user status
+        if user.check_password(password) and self.user_can_authenticate(user):
+            LoginThrottle.record_success(user)
+            record_auth_event(user, 'login', 'password', True, ip)
+            return user
+        LoginThrottle.record_failure(user, ip)
+        record_auth_event(user, 'login', 'password', False, ip)
+        return None
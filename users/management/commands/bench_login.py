@@ -0,0 +1,46 @@
+from django.db.models import Q
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from keya.benchmarks import format_latency, time_calls
+from users.backends import EmailPhoneAuthBackend
+from users.services.identifier_service import IdentifierService
+
+
+class Command(BaseCommand):
+    help = "Compare p50/p99 login latency of the legacy OR lookup and the cached identifier resolver"
+
+    def add_arguments(self, parser):
+        parser.add_argument('identifier', help="Email or phone of an existing user")
+        parser.add_argument('password', help="That user's password")
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        identifier = options['identifier']
+        password = options['password']
+        iterations = options['iterations']
+        backend = EmailPhoneAuthBackend()
+
+        def legacy_lookup():
+            return User.objects.get(Q(email=identifier) | Q(phone=identifier))
+
+        def legacy_login():
+            user = legacy_lookup()
+            return user.check_password(password) and backend.user_can_authenticate(user)
+
+        def resolver_login():
+            return backend.authenticate(None, username=identifier, password=password)
+
+        if resolver_login() is None:
+            self.stderr.write(self.style.ERROR("Credentials do not authenticate"))
+            return
+
+        cache.delete(IdentifierService.create_cache_key(*IdentifierService.normalize(identifier)))
+        cold = time_calls(lambda: IdentifierService.resolve(identifier), 1)
+
+        self.stdout.write(format_latency("lookup before (OR query)", time_calls(legacy_lookup, iterations)))
+        self.stdout.write(format_latency("lookup after (cold)", cold))
+        self.stdout.write(format_latency("lookup after (cached)", time_calls(lambda: IdentifierService.resolve(identifier), iterations)))
+        self.stdout.write(format_latency("login before", time_calls(legacy_login, iterations)))
+        self.stdout.write(format_latency("login after", time_calls(resolver_login, iterations)))
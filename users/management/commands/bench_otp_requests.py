@@ -0,0 +1,52 @@
+import json
+import time
+import uuid
+from collections import Counter
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from keya.benchmarks import format_latency
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent OTP requests at a running server, e.g. one sync worker "
+        "vs one uvicorn worker, and report throughput and latency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api/v1/auth/otp/request/')
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def handle(self, *args, **options):
+        run = uuid.uuid4().hex[:8]
+        statuses = Counter()
+
+        def request_otp(index):
+            # A fresh identifier per request so the resend cooldown never applies
+            body = json.dumps({'email': f"bench-{run}-{index}@bench.invalid", 'purpose': 'email-login'}).encode()
+            request = Request(options['url'], data=body, headers={'Content-Type': 'application/json'})
+            start = time.perf_counter()
+            try:
+                with urlopen(request, timeout=options['timeout']) as response:
+                    response.read()
+                    status = response.status
+            except HTTPError as exc:
+                status = exc.code
+            except OSError as exc:
+                status = type(exc).__name__
+            return status, (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            results = list(executor.map(request_otp, range(options['requests'])))
+        elapsed = time.perf_counter() - start
+
+        statuses.update(status for status, _ in results)
+        self.stdout.write(format_latency(f"otp request x{options['concurrency']}", [latency for _, latency in results]))
+        self.stdout.write(f"throughput: {len(results) / elapsed:.0f} req/s")
+        self.stdout.write("statuses: " + ", ".join(f"{status}={count}" for status, count in sorted(statuses.items(), key=str)))
+        self.stdout.write("Queued bench OTP emails go to @bench.invalid; drain or clear the email outbox afterwards.")
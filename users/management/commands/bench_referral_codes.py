@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from keya.benchmarks import format_latency, time_calls
+from users.services.referral_service import ReferralCodeService
+
+
+class Command(BaseCommand):
+    help = "Compare referral code allocation from the pool with the per-save existence-query loop"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        iterations = options['iterations']
+        user = User()
+
+        self.stdout.write(f"users_user rows: {User.objects.count()}")
+        ReferralCodeService.refill(ReferralCodeService.pool_size() + iterations)
+
+        # The legacy loop's cost is one indexed lookup per attempt, so it grows with the table
+        self.stdout.write(format_latency("query loop", time_calls(user._generate_referral_code, iterations)))
+        self.stdout.write(format_latency("pool (SPOP)", time_calls(ReferralCodeService.allocate, iterations)))
@@ -0,0 +1,34 @@
+import os
+from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import get_hasher
+from keya.benchmarks import percentile, time_calls
+
+
+class Command(BaseCommand):
+    help = "Measure password hashing cost on this machine and the login rate it can sustain"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int, default=20)
+        parser.add_argument('--target-ms', type=float, default=None,
+                            help="Suggest an iteration count that makes one hash take this long")
+
+    def handle(self, *args, **options):
+        hasher = get_hasher()
+        salt = hasher.salt()
+        samples = time_calls(lambda: hasher.encode('calibration-password', salt), options['samples'])
+
+        median = percentile(samples, 50)
+        cores = os.cpu_count() or 1
+        per_core = 1000 / median if median else 0
+
+        self.stdout.write(f"Hasher:            {hasher.algorithm}")
+        iterations = getattr(hasher, 'iterations', None)
+        if iterations:
+            self.stdout.write(f"Iterations:        {iterations}")
+        self.stdout.write(f"Hash time:         p50={median:.1f}ms p99={percentile(samples, 99):.1f}ms")
+        self.stdout.write(f"Logins/sec/core:   {per_core:.1f}")
+        self.stdout.write(f"Logins/sec total:  {per_core * cores:.1f} ({cores} cores)")
+
+        if options['target_ms'] and iterations:
+            suggested = int(iterations * options['target_ms'] / median)
+            self.stdout.write(f"Suggested iterations for {options['target_ms']:.0f}ms: {suggested}")
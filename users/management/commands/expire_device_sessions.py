@@ -0,0 +1,38 @@
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+from users.models import DeviceSession
+from users.services.session_activity_service import SessionActivityTracker
+from users.services.token_service import RefreshTokenStore
+
+
+class Command(BaseCommand):
+    help = "Deactivate device sessions idle for longer than DEVICE_SESSION_IDLE_TIMEOUT"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--idle-seconds', type=int, default=settings.DEVICE_SESSION_IDLE_TIMEOUT)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['idle_seconds'])
+        candidates = DeviceSession.objects.filter(is_active=True, last_activity__lt=cutoff).only('id', 'last_activity')
+
+        expired = 0
+        last_id = None
+        while True:
+            batch = candidates.order_by('id')
+            if last_id is not None:
+                batch = batch.filter(id__gt=last_id)
+            batch = list(batch[:options['batch_size']])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            # Activity still sitting in the write-behind buffer keeps a session alive
+            idle = [session.id for session in SessionActivityTracker.refresh(batch) if session.last_activity < cutoff]
+            # update() leaves last_activity alone, unlike save() with auto_now
+            expired += DeviceSession.objects.filter(id__in=idle, is_active=True).update(is_active=False)
+            RefreshTokenStore.revoke(*idle)
+
+        self.stdout.write(f"Expired {expired} sessions idle since {cutoff.isoformat()}")
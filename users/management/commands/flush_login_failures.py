@@ -0,0 +1,19 @@
+import time
+from django.core.management.base import BaseCommand
+from users.services.login_throttle_service import LoginThrottle
+
+
+class Command(BaseCommand):
+    help = "Write login failure counts aggregated in Redis back to users_user"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help="Keep flushing every N seconds instead of running once")
+
+    def handle(self, *args, **options):
+        while True:
+            updated = LoginThrottle.flush()
+            self.stdout.write(f"Updated {updated} users")
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
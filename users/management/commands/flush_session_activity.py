@@ -0,0 +1,32 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from users.services.session_activity_service import SessionActivityTracker
+
+
+class Command(BaseCommand):
+    help = "Write DeviceSession activity buffered in Redis back to users_devicesession"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help=f"Keep flushing every N seconds (e.g. {settings.SESSION_ACTIVITY_FLUSH_INTERVAL}) "
+                                 "instead of running once")
+        parser.add_argument('--stats', action='store_true',
+                            help="Print requests seen vs rows written and exit")
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            stats = SessionActivityTracker.stats()
+            ratio = stats['requests'] / stats['flushed_rows'] if stats['flushed_rows'] else 0
+            self.stdout.write(
+                f"requests={stats['requests']} rows_written={stats['flushed_rows']} "
+                f"reduction={ratio:.1f}x"
+            )
+            return
+
+        while True:
+            updated = SessionActivityTracker.flush()
+            self.stdout.write(f"Updated {updated} sessions")
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,51 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from users.services.user_import_service import UserImporter, read_records
+
+
+class Command(BaseCommand):
+    help = "Bulk import users (with profiles) from a CSV or JSONL file using COPY"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--processes', type=int, default=None, help="Password hashing processes")
+        parser.add_argument('--checkpoint', help="Progress file (default: <path>.checkpoint)")
+        parser.add_argument('--resume', action='store_true', help="Skip records committed by a previous run")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        checkpoint = options['checkpoint'] or f"{path}.checkpoint"
+
+        skip = 0
+        if options['resume'] and os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                skip = int(f.read().strip() or 0)
+            self.stdout.write(f"Resuming after {skip} records")
+
+        def on_progress(stats):
+            # Only written after a chunk has committed
+            with open(checkpoint, 'w') as f:
+                f.write(str(stats['processed']))
+            rate = (stats['processed'] - skip) / stats['elapsed'] if stats['elapsed'] else 0
+            self.stdout.write(
+                f"processed={stats['processed']} inserted={stats['inserted']} "
+                f"skipped={stats['skipped']} invalid={stats['invalid']} ({rate:.0f} records/sec)"
+            )
+
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                importer = UserImporter(
+                    chunk_size=options['chunk_size'],
+                    processes=options['processes'],
+                    on_progress=on_progress,
+                )
+                stats = importer.run(read_records(f, fmt), skip=skip)
+        except FileNotFoundError:
+            raise CommandError(f"File not found: {path}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: inserted {stats['inserted']}, skipped {stats['skipped']} existing, {stats['invalid']} invalid"
+        ))
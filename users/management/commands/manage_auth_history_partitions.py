@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from users.services.auth_history_service import AuthHistoryPartitions
+
+
+class Command(BaseCommand):
+    help = "Create upcoming monthly AuthHistory partitions and expire old ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=settings.AUTH_HISTORY_PARTITIONS_AHEAD,
+                            help="Months of partitions to keep created ahead of the current one")
+        parser.add_argument('--retention-months', type=int, default=settings.AUTH_HISTORY_RETENTION_MONTHS,
+                            help="Months of history to keep attached, 0 to never expire")
+        parser.add_argument('--archive-schema', default=settings.AUTH_HISTORY_ARCHIVE_SCHEMA,
+                            help="Move expired partitions to this schema instead of dropping them")
+        parser.add_argument('--list', action='store_true', help="Print attached partitions and exit")
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for month, name in sorted(AuthHistoryPartitions.existing().items()):
+                self.stdout.write(f"{month:%Y-%m}  {name}")
+            return
+
+        for name in AuthHistoryPartitions.create_ahead(options['ahead']):
+            self.stdout.write(f"Created {name}")
+
+        if options['retention_months']:
+            action = f"Archived to {options['archive_schema']}:" if options['archive_schema'] else "Dropped"
+            for name in AuthHistoryPartitions.expire(options['retention_months'], options['archive_schema']):
+                self.stdout.write(f"{action} {name}")
@@ -0,0 +1,65 @@
+import signal
+import threading
+from django.core.management.base import BaseCommand
+from users.services.outbox import run_worker
+from users.services.sms_service import SmsOutboxWorker
+from users.services.email_service import EmailOutboxWorker
+from users.services.auth_history_service import AuthHistoryOutboxWorker
+from users.services.user_import_service import UserImportOutboxWorker
+
+WORKERS = {
+    'email': EmailOutboxWorker,
+    'sms': SmsOutboxWorker,
+    'auth_history': AuthHistoryOutboxWorker,
+    'user_import': UserImportOutboxWorker,
+}
+
+
+class Command(BaseCommand):
+    help = "Deliver queued messages and events from a Redis outbox with a pool of workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('queue', choices=sorted(WORKERS))
+        parser.add_argument('--workers', type=int, default=2, help="Worker threads, each with its own connection")
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty")
+        parser.add_argument('--recover', action='store_true',
+                            help="Requeue items claimed longer than the outbox's processing timeout ago "
+                                 "(stranded by crashed workers) before starting")
+        parser.add_argument('--stats', action='store_true', help="Print queue sizes and exit")
+
+    def handle(self, *args, **options):
+        worker_class = WORKERS[options['queue']]
+        outbox = worker_class.outbox
+
+        if options['stats']:
+            for name, value in outbox.stats().items():
+                self.stdout.write(f"{name}: {value}")
+            return
+
+        if options['recover']:
+            self.stdout.write(f"Requeued {outbox.recover()} stranded items")
+
+        stop_event = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+        threads = [
+            threading.Thread(
+                target=run_worker,
+                args=(worker_class(), options['batch_size'], stop_event),
+                kwargs={'poll_interval': options['poll_interval'], 'exit_when_empty': options['once']},
+                name=f"outbox-{outbox.name}-{index}",
+            )
+            for index in range(options['workers'])
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            stop_event.set()
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from users.services.referral_service import ReferralCodeService
+
+
+class Command(BaseCommand):
+    help = "Top up the pre-generated referral code pool (run periodically)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', type=int, default=100000, help="Pool size to fill up to")
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        added = ReferralCodeService.refill(options['target'], batch_size=options['batch_size'])
+        self.stdout.write(f"Added {added} codes, pool size is now {ReferralCodeService.pool_size()}")
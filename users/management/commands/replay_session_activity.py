@@ -0,0 +1,61 @@
+import time
+import random
+from django.db import connection
+from django.core.management.base import BaseCommand
+from django.test.utils import CaptureQueriesContext
+from users.models import DeviceSession, User
+from users.services.session_activity_service import SessionActivityTracker
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay synthetic authenticated traffic through the session activity tracker "
+        "and compare database writes against one UPDATE per request"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=100000)
+        parser.add_argument('--duration', type=float, default=3600,
+                            help="Simulated seconds the requests are spread over")
+        parser.add_argument('--flush-interval', type=float, default=60,
+                            help="Simulated seconds between flushes")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        user = User.objects.create_user(email=f"replay-{time.time_ns()}@bench.invalid")
+        sessions = DeviceSession.objects.bulk_create([
+            DeviceSession(user=user, device_hash='replay', ip_address='127.0.0.1', user_agent='replay')
+            for _ in range(options['sessions'])
+        ])
+        session_ids = [str(session.id) for session in sessions]
+        # Skewed traffic: a few sessions are much busier than the rest
+        weights = [1 / (rank + 1) for rank in range(len(session_ids))]
+
+        SessionActivityTracker.flush()
+        SessionActivityTracker.reset_stats()
+        start = time.time()
+        step = options['duration'] / options['requests']
+        next_flush = start + options['flush_interval']
+        statements = 0
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                for index, session_id in enumerate(rng.choices(session_ids, weights, k=options['requests'])):
+                    now = start + index * step
+                    SessionActivityTracker.touch(session_id, now=now)
+                    if now >= next_flush:
+                        SessionActivityTracker.flush()
+                        next_flush += options['flush_interval']
+                SessionActivityTracker.flush()
+            statements = sum(1 for query in queries.captured_queries if query['sql'].lstrip().startswith('UPDATE'))
+            stats = SessionActivityTracker.stats()
+        finally:
+            user.delete()
+
+        requests = options['requests']
+        self.stdout.write(f"requests:          {requests}")
+        self.stdout.write(f"baseline UPDATEs:  {requests} (one per request)")
+        self.stdout.write(f"buffered UPDATEs:  {statements} statements, {stats['flushed_rows']} rows")
+        if stats['flushed_rows']:
+            self.stdout.write(f"row write reduction: {requests / stats['flushed_rows']:.1f}x")
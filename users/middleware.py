@@ -0,0 +1,41 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from users.services.session_activity_service import SessionActivityTracker
+
+
+def get_session_id(request):
+    # DRF copies the validated token onto the underlying HttpRequest
+    token = getattr(request, 'auth', None)
+    return token.get('sid') if hasattr(token, 'get') else None
+
+
+class SessionActivityMiddleware:
+    """
+    Records DeviceSession activity for requests authenticated with a
+    token carrying a `sid` claim, without writing to the database.
+
+    Async-capable so the async views behind keya/asgi.py are not pushed
+    onto a thread by this middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        session_id = get_session_id(request)
+        if session_id:
+            SessionActivityTracker.touch(session_id)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        session_id = get_session_id(request)
+        if session_id:
+            await sync_to_async(SessionActivityTracker.touch, thread_sensitive=False)(session_id)
+        return response
@@ -0,0 +1,96 @@
+from django.db import migrations
+
+# Rebuilds users_authhistory as a table range-partitioned by month on
+# "timestamp". Postgres requires the partition key in the primary key, so
+# the table's key becomes (id, timestamp); Django keeps treating id as the
+# primary key, which stays unique through the shared sequence. Partitions
+# are named users_authhistory_pYYYY_MM with UTC month bounds, matching
+# users.services.auth_history_service.AuthHistoryPartitions.
+
+INDEXES_SQL = """
+CREATE INDEX "users_authh_user_id_5dfc30_idx" ON "users_authhistory" ("user_id", "timestamp");
+CREATE INDEX "users_authh_success_124d01_idx" ON "users_authhistory" ("success", "action");
+CREATE INDEX "users_authh_ip_addr_ac23e5_idx" ON "users_authhistory" ("ip_address");
+CREATE INDEX "users_authhistory_device_id_id_2bd3684d" ON "users_authhistory" ("device_id_id");
+CREATE INDEX "users_authhistory_user_id_aa553a66" ON "users_authhistory" ("user_id");
+ALTER TABLE "users_authhistory" ADD CONSTRAINT "users_authhistory_device_id_id_2bd3684d_fk_users_dev"
+    FOREIGN KEY ("device_id_id") REFERENCES "users_devicesession" ("id") DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE "users_authhistory" ADD CONSTRAINT "users_authhistory_user_id_aa553a66_fk_users_user_id"
+    FOREIGN KEY ("user_id") REFERENCES "users_user" ("id") DEFERRABLE INITIALLY DEFERRED;
+"""
+
+COLUMNS = '"id", "timestamp", "action", "method", "provider", "success", "ip_address", "device_id_id", "user_id"'
+
+PARTITION_SQL = f"""
+ALTER TABLE "users_authhistory" RENAME TO "users_authhistory_legacy";
+ALTER TABLE "users_authhistory_legacy" ALTER COLUMN "id" DROP IDENTITY;
+
+CREATE SEQUENCE "users_authhistory_id_seq";
+CREATE TABLE "users_authhistory" (
+    "id" bigint NOT NULL DEFAULT nextval('users_authhistory_id_seq'),
+    "timestamp" timestamp with time zone NOT NULL,
+    "action" varchar(20) NOT NULL,
+    "method" varchar(20) NOT NULL,
+    "provider" varchar(20) NULL,
+    "success" boolean NOT NULL,
+    "ip_address" inet NOT NULL,
+    "device_id_id" uuid NULL,
+    "user_id" uuid NOT NULL,
+    PRIMARY KEY ("id", "timestamp")
+) PARTITION BY RANGE ("timestamp");
+ALTER SEQUENCE "users_authhistory_id_seq" OWNED BY "users_authhistory"."id";
+
+-- One partition per month from the oldest existing row to three months ahead
+DO $$
+DECLARE
+    month timestamp;
+    last_month timestamp := date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months';
+BEGIN
+    SELECT date_trunc('month', COALESCE(min("timestamp"), now()) AT TIME ZONE 'UTC')
+    INTO month FROM "users_authhistory_legacy";
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF "users_authhistory" FOR VALUES FROM (%L) TO (%L)',
+            'users_authhistory_p' || to_char(month, 'YYYY_MM'),
+            to_char(month, 'YYYY-MM-DD') || ' 00:00:00+00',
+            to_char(month + interval '1 month', 'YYYY-MM-DD') || ' 00:00:00+00'
+        );
+        month := month + interval '1 month';
+    END LOOP;
+END $$;
+
+INSERT INTO "users_authhistory" ({COLUMNS}) SELECT {COLUMNS} FROM "users_authhistory_legacy";
+SELECT setval('users_authhistory_id_seq', COALESCE((SELECT max("id") FROM "users_authhistory"), 0) + 1, false);
+DROP TABLE "users_authhistory_legacy";
+{INDEXES_SQL}
+"""
+
+UNPARTITION_SQL = f"""
+ALTER TABLE "users_authhistory" RENAME TO "users_authhistory_partitioned";
+CREATE TABLE "users_authhistory" (
+    "id" bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    "timestamp" timestamp with time zone NOT NULL,
+    "action" varchar(20) NOT NULL,
+    "method" varchar(20) NOT NULL,
+    "provider" varchar(20) NULL,
+    "success" boolean NOT NULL,
+    "ip_address" inet NOT NULL,
+    "device_id_id" uuid NULL,
+    "user_id" uuid NOT NULL
+);
+INSERT INTO "users_authhistory" ({COLUMNS}) SELECT {COLUMNS} FROM "users_authhistory_partitioned";
+SELECT setval(pg_get_serial_sequence('users_authhistory', 'id'), COALESCE((SELECT max("id") FROM "users_authhistory"), 0) + 1, false);
+DROP TABLE "users_authhistory_partitioned";
+{INDEXES_SQL}
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_address_deleted_at'),
+    ]
+
+    operations = [
+        migrations.RunSQL(PARTITION_SQL, UNPARTITION_SQL),
+    ]
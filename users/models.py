@@ -4,15 +4,22 @@ from django.utils import timezone
 from django.core.validators import RegexValidator
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
+from users.services.referral_service import ReferralCodeService
+from users.services.identifier_service import IdentifierService
 
 
 class UserManager(BaseUserManager):
-    def create_user(self, email, password=None, **extra_fields):
+    def create_user(self, email, password=None, encoded_password=None, **extra_fields):
         if not email:
             raise ValueError(_('The Email field must be set'))
         email = self.normalize_email(email)
+        if extra_fields.get('phone'):
+            extra_fields['phone'] = IdentifierService.normalize_phone(extra_fields['phone'])
         user = self.model(email=email, **extra_fields)
-        user.set_password(password)
+        if encoded_password:
+            user.password = encoded_password
+        else:
+            user.set_password(password)
         user.save(using=self._db)
         return user
 
@@ -102,15 +109,13 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def save(self, *args, **kwargs):
         if not self.referral_code:
-            self.referral_code = self._generate_referral_code()
+            # Pre-generated pool first; only fall back to the query loop if it ran dry
+            self.referral_code = ReferralCodeService.allocate() or self._generate_referral_code()
         super().save(*args, **kwargs)
 
     def _generate_referral_code(self):
-        # Simple referral code generation, consider more robust methods
-        import random
-        import string
         while True:
-            code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=10))
+            code = ReferralCodeService.generate_code()
             if not User.objects.filter(referral_code=code).exists():
                 return code
 
@@ -211,6 +216,8 @@ class DeviceSession(models.Model):
         return f"Session for {self.user.email} on {self.ip_address}"
 
 
+# Monthly range-partitioned on timestamp (migration 0003); the table's primary key
+# is (id, timestamp). Rows are written in batches through the auth_history outbox.
 class AuthHistory(models.Model):
     id = models.BigAutoField(primary_key=True) # BIGSERIAL in schema implies BigAutoField
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='auth_history')
@@ -3,7 +3,7 @@ from django.contrib.auth import authenticate
 from django.utils.translation import gettext as _
 from users.models import Profile, User
 
-class EmailAuthSerializer(serializers.Serializer):
+class EmailCredentialsSerializer(serializers.Serializer):
     email = serializers.EmailField(required=True)
     password = serializers.CharField(
         write_only=True,
@@ -11,6 +11,7 @@ class EmailAuthSerializer(serializers.Serializer):
         style={'input_type': 'password'}
     )
 
+class EmailAuthSerializer(EmailCredentialsSerializer):
     def validate(self, attrs):
         email = attrs.get('email')
         password = attrs.get('password')
@@ -40,7 +41,7 @@ class EmailAuthSerializer(serializers.Serializer):
         attrs['user'] = user
         return attrs
 
-class PhoneAuthSerializer(serializers.Serializer):
+class PhoneCredentialsSerializer(serializers.Serializer):
     phone = serializers.CharField(required=True)
     password = serializers.CharField(
         write_only=True,
@@ -48,6 +49,7 @@ class PhoneAuthSerializer(serializers.Serializer):
         style={'input_type': 'password'}
     )
 
+class PhoneAuthSerializer(PhoneCredentialsSerializer):
     def validate(self, attrs):
         phone = attrs.get('phone')
         password = attrs.get('password')
@@ -106,10 +108,13 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         
         email = validated_data.pop('email')
         password = validated_data.pop('password')
+        # Set when the password was already hashed off the request thread
+        encoded_password = validated_data.pop('encoded_password', None)
         
         user = User.objects.create_user(
             email=email,
             password=password,
+            encoded_password=encoded_password,
             **validated_data
         )
         
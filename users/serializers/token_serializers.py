@@ -0,0 +1,7 @@
+from rest_framework import serializers
+
+class TokenRefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+class TokenRevokeSerializer(TokenRefreshSerializer):
+    all = serializers.BooleanField(required=False, default=False)
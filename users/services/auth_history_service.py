@@ -0,0 +1,171 @@
+import re
+import logging
+from datetime import date, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.db import connection, transaction
+from users.models import AuthHistory
+from users.services.outbox import Outbox
+
+logger = logging.getLogger(__name__)
+
+auth_history_outbox = Outbox(
+    'auth-history',
+    max_attempts=settings.AUTH_HISTORY_OUTBOX_MAX_ATTEMPTS,
+    backoff=settings.AUTH_HISTORY_OUTBOX_BACKOFF,
+)
+
+PARTITION_NAME = re.compile(r'_p(\d{4})_(\d{2})$')
+
+
+def build_auth_event(user, action, method, success, ip_address, device_session=None, provider=None):
+    return {
+        'user_id': str(user.pk),
+        'timestamp': timezone.now().isoformat(),
+        'action': action,
+        'method': method,
+        'provider': provider,
+        'success': success,
+        'ip_address': ip_address or '0.0.0.0',
+        'device_id': str(device_session.pk) if device_session else None,
+    }
+
+
+def record_auth_event(user, *args, **kwargs):
+    """
+    Queue an AuthHistory row; the request never waits on the insert.
+    Failing to queue is logged rather than failing the login itself.
+    """
+    try:
+        auth_history_outbox.enqueue(build_auth_event(user, *args, **kwargs))
+    except Exception as e:
+        logger.error(f"Failed to queue auth history for {user.pk}: {str(e)}")
+
+
+async def arecord_auth_event(user, *args, **kwargs):
+    try:
+        await auth_history_outbox.aenqueue(build_auth_event(user, *args, **kwargs))
+    except Exception as e:
+        logger.error(f"Failed to queue auth history for {user.pk}: {str(e)}")
+
+
+class AuthHistoryOutboxWorker:
+    """Writes queued auth events with one bulk INSERT per claimed batch"""
+    outbox = auth_history_outbox
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def build(self, payload):
+        return AuthHistory(
+            user_id=payload['user_id'],
+            timestamp=parse_datetime(payload['timestamp']),
+            action=payload['action'],
+            method=payload['method'],
+            provider=payload['provider'],
+            success=payload['success'],
+            ip_address=payload['ip_address'],
+            device_id_id=payload['device_id'],
+        )
+
+    def deliver(self, payload):
+        self.deliver_batch([payload])
+
+    def deliver_batch(self, payloads):
+        AuthHistory.objects.bulk_create([self.build(payload) for payload in payloads])
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class AuthHistoryPartitions:
+    """
+    Monthly range partitions of users_authhistory (see migration 0003).
+
+    Partitions are named <table>_pYYYY_MM and cover one UTC month, so
+    retention is a DETACH + DROP (or a move to an archive schema) of
+    whole months instead of a DELETE over the live table.
+    """
+    table = AuthHistory._meta.db_table
+
+    @classmethod
+    def partition_name(cls, month):
+        return f"{cls.table}_p{month.year:04d}_{month.month:02d}"
+
+    @classmethod
+    def existing(cls):
+        """{first day of month: partition name} for attached partitions"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT child.relname FROM pg_inherits
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE pg_inherits.inhparent = %s::regclass
+                """,
+                [cls.table]
+            )
+            names = [row[0] for row in cursor.fetchall()]
+
+        partitions = {}
+        for name in names:
+            match = PARTITION_NAME.search(name)
+            if match:
+                partitions[date(int(match[1]), int(match[2]), 1)] = name
+        return partitions
+
+    @classmethod
+    def current_month(cls):
+        now = timezone.now().astimezone(dt_timezone.utc)
+        return date(now.year, now.month, 1)
+
+    @classmethod
+    def create_ahead(cls, months=None):
+        """Create missing partitions from this month to `months` ahead; returns names created"""
+        months = settings.AUTH_HISTORY_PARTITIONS_AHEAD if months is None else months
+        existing = cls.existing()
+        current = cls.current_month()
+
+        created = []
+        with connection.cursor() as cursor:
+            for offset in range(months + 1):
+                month = add_months(current, offset)
+                if month in existing:
+                    continue
+                name = cls.partition_name(month)
+                cursor.execute(
+                    f'CREATE TABLE "{name}" PARTITION OF "{cls.table}" FOR VALUES FROM (%s) TO (%s)',
+                    [f"{month.isoformat()} 00:00:00+00", f"{add_months(month, 1).isoformat()} 00:00:00+00"]
+                )
+                created.append(name)
+        return created
+
+    @classmethod
+    def expire(cls, retention_months=None, archive_schema=None):
+        """
+        Detach partitions that ended more than `retention_months` ago and
+        drop them, or move them to `archive_schema`. Returns names expired.
+        """
+        retention_months = settings.AUTH_HISTORY_RETENTION_MONTHS if retention_months is None else retention_months
+        cutoff = add_months(cls.current_month(), -retention_months)
+
+        expired = []
+        for month, name in sorted(cls.existing().items()):
+            if month >= cutoff:
+                continue
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f'ALTER TABLE "{cls.table}" DETACH PARTITION "{name}"')
+                if archive_schema:
+                    # Archived months are read-only; don't tie them to the live id sequence
+                    cursor.execute(f'ALTER TABLE "{name}" ALTER COLUMN "id" DROP DEFAULT')
+                    cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"')
+                    cursor.execute(f'ALTER TABLE "{name}" SET SCHEMA "{archive_schema}"')
+                else:
+                    cursor.execute(f'DROP TABLE "{name}"')
+            expired.append(name)
+        return expired
@@ -1,9 +1,30 @@
+import logging
+from smtplib import SMTPServerDisconnected
+from functools import lru_cache
 from django.conf import settings
-from django.core.mail import send_mail
 from django.utils.translation import gettext as _
-from django.template.loader import render_to_string
+from django.template.loader import get_template
+from django.core.mail import EmailMultiAlternatives, get_connection
+from users.services.outbox import Outbox
 
-def send_otp_email(email, otp, purpose):
+logger = logging.getLogger(__name__)
+
+email_outbox = Outbox(
+    'email',
+    max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    backoff=settings.EMAIL_OUTBOX_BACKOFF,
+    # Dead letters outlive the OTP's use; the code itself is not kept
+    redact=('otp',),
+)
+
+
+@lru_cache(maxsize=None)
+def get_otp_template():
+    """Compiled OTP email template, loaded once per process"""
+    return get_template('emails/otp_email.html')
+
+
+def build_otp_email(email, otp, purpose, connection=None):
     # Customize subject based on purpose
     subject_map = {
         'email-login': _("Login Verification Code"),
@@ -12,33 +33,84 @@ def send_otp_email(email, otp, purpose):
         'phone-verify': _("Phone Verification Code"),
         'default': _("Your Verification Code"),
     }
-    
+
     subject = subject_map.get(purpose, subject_map['default'])
-    
+
     # Plain text message
     message = _(
         "Your verification code is: {otp}\n\n"
         "This code will expire in {minutes} minutes."
     ).format(otp=otp, minutes=settings.OTP_EXPIRY // 60)
-    
+
     # HTML message
-    html_message = render_to_string('emails/otp_email.html', {
+    html_message = get_otp_template().render({
         'otp': otp,
         'purpose': purpose,
         'expiry_minutes': settings.OTP_EXPIRY // 60
     })
-    
+
+    mail = EmailMultiAlternatives(
+        subject,
+        message,
+        settings.DEFAULT_FROM_EMAIL,
+        [email],
+        connection=connection
+    )
+    mail.attach_alternative(html_message, 'text/html')
+    return mail
+
+
+def send_otp_email(email, otp, purpose):
+    """Send an OTP email immediately over a new connection"""
     try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [email],
-            html_message=html_message,
-            fail_silently=False
-        )
+        build_otp_email(email, otp, purpose).send(fail_silently=False)
         return True
     except Exception as e:
-        # Log error in production
-        print(f"Failed to send email: {str(e)}")
-        return False
\ No newline at end of file
+        logger.error("Failed to send email: %s", e)
+        return False
+
+
+def queue_otp_email(email, otp, purpose):
+    """Hand an OTP email to the outbox; delivery happens in process_outbox"""
+    try:
+        email_outbox.enqueue({'email': email, 'otp': otp, 'purpose': purpose})
+        return True
+    except Exception as e:
+        logger.error("Failed to queue email: %s", e)
+        return False
+
+
+async def aqueue_otp_email(email, otp, purpose):
+    try:
+        await email_outbox.aenqueue({'email': email, 'otp': otp, 'purpose': purpose})
+        return True
+    except Exception as e:
+        logger.error("Failed to queue email: %s", e)
+        return False
+
+
+class EmailOutboxWorker:
+    """Delivers queued OTP emails over one persistent SMTP connection"""
+    outbox = email_outbox
+
+    def __init__(self):
+        self.connection = None
+
+    def open(self):
+        self.connection = get_connection(fail_silently=False)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+    def deliver(self, payload):
+        # Opened explicitly so the backend keeps it open between messages;
+        # a failure here is retried by the outbox like any other
+        self.connection.open()
+        mail = build_otp_email(payload['email'], payload['otp'], payload['purpose'], connection=self.connection)
+        try:
+            mail.send(fail_silently=False)
+        except SMTPServerDisconnected:
+            # Drop the dead connection so the next item reconnects
+            self.connection.close()
+            raise
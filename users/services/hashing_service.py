@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import threading
+from django.conf import settings
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.hashers import make_password, verify_password
+
+logger = logging.getLogger(__name__)
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when too many hashing jobs are already waiting"""
+
+
+class PasswordHashingPool:
+    """
+    Runs password hashing on a bounded thread pool so the event loop
+    never blocks on PBKDF2. Jobs beyond `max_pending` are rejected
+    straight away instead of queueing behind a login storm.
+    """
+
+    def __init__(self, max_workers, max_pending):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hashing')
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self):
+        """Jobs waiting for a free worker"""
+        return max(self.pending - self.max_workers, 0)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'queue_depth': self.queue_depth,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
+    async def run(self, func, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                logger.warning("Password hashing pool saturated (%s pending)", self.pending)
+                raise HashingPoolSaturated()
+            self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    async def verify_password(self, password, encoded):
+        """Return (is_correct, must_update) for a raw password"""
+        return await self.run(verify_password, password, encoded)
+
+    async def make_password(self, password):
+        return await self.run(make_password, password)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    """Process-wide hashing pool, created on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordHashingPool(
+                    max_workers=settings.PASSWORD_HASHING_WORKERS,
+                    max_pending=settings.PASSWORD_HASHING_MAX_PENDING,
+                )
+    return _pool
@@ -0,0 +1,96 @@
+import re
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.contrib.auth.base_user import BaseUserManager
+from users.services.redis_utils import acache_get, acache_set
+
+# Stored in place of a user id so unknown identifiers are cached too
+MISSING = 'missing'
+
+PHONE_SEPARATORS = re.compile(r'[\s\-().]')
+
+
+class IdentifierService:
+    @staticmethod
+    def normalize(identifier):
+        """Return the (field, value) pair an identifier should be looked up by"""
+        identifier = (identifier or '').strip()
+        if '@' in identifier:
+            return 'email', BaseUserManager.normalize_email(identifier)
+        return 'phone', IdentifierService.normalize_phone(identifier)
+
+    @staticmethod
+    def normalize_phone(phone):
+        """Strip formatting characters, keeping an optional leading '+'"""
+        return PHONE_SEPARATORS.sub('', phone or '')
+
+    @staticmethod
+    def create_cache_key(field, value):
+        """Create a Redis key for identifier -> user id lookups"""
+        return f"identifier:{field}:{value}"
+
+    @staticmethod
+    def resolve(identifier):
+        """
+        Return the user matching an email or phone identifier, or None.
+
+        Cache hits cost one primary-key lookup, misses one lookup on the
+        identifier's own indexed column. Unknown identifiers are cached
+        for a shorter period so repeated bad logins skip the database.
+        """
+        User = get_user_model()
+        field, value = IdentifierService.normalize(identifier)
+        if not value:
+            return None
+
+        key = IdentifierService.create_cache_key(field, value)
+        user_id = cache.get(key)
+        if user_id == MISSING:
+            return None
+        if user_id is not None:
+            user = User._default_manager.filter(pk=user_id).first()
+            if user is not None:
+                return user
+
+        user = User._default_manager.filter(**{field: value}).first()
+        if user is None:
+            cache.set(key, MISSING, timeout=settings.IDENTIFIER_NEGATIVE_CACHE_TTL)
+        else:
+            cache.set(key, str(user.pk), timeout=settings.IDENTIFIER_CACHE_TTL)
+        return user
+
+    @staticmethod
+    async def aresolve(identifier):
+        """Async version of resolve() for views served under ASGI, awaiting redis.asyncio directly"""
+        User = get_user_model()
+        field, value = IdentifierService.normalize(identifier)
+        if not value:
+            return None
+
+        key = IdentifierService.create_cache_key(field, value)
+        user_id = await acache_get(key)
+        if user_id == MISSING:
+            return None
+        if user_id is not None:
+            user = await User._default_manager.filter(pk=user_id).afirst()
+            if user is not None:
+                return user
+
+        user = await User._default_manager.filter(**{field: value}).afirst()
+        if user is None:
+            await acache_set(key, MISSING, settings.IDENTIFIER_NEGATIVE_CACHE_TTL)
+        else:
+            await acache_set(key, str(user.pk), settings.IDENTIFIER_CACHE_TTL)
+        return user
+
+    @staticmethod
+    def invalidate(email=None, phone=None):
+        """Drop cached lookups for the given email and/or phone"""
+        keys = []
+        if email:
+            keys.append(IdentifierService.create_cache_key(*IdentifierService.normalize(email)))
+        if phone:
+            keys.append(IdentifierService.create_cache_key('phone', IdentifierService.normalize_phone(phone)))
+        if keys:
+            cache.delete_many(keys)
@@ -0,0 +1,192 @@
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.core.exceptions import PermissionDenied
+from django_redis import get_redis_connection
+from users.services.redis_utils import get_async_redis, make_key, swap_for_flush
+
+FLUSH_CHUNK_SIZE = 1000
+
+
+class LoginLocked(PermissionDenied):
+    """Raised when a user or IP is locked out by the login_attempt policy"""
+
+
+def get_client_ip(request):
+    if request is None:
+        return None
+    return request.META.get('REMOTE_ADDR')
+
+
+class LoginThrottle:
+    """
+    Sliding-window login failure tracking in Redis.
+
+    Lockout decisions never touch the database. Per-user failure counts
+    are also aggregated in Redis and written to users_user in bulk by
+    flush(), so an attack does not turn into one row UPDATE per attempt.
+    """
+
+    @staticmethod
+    def key(*parts):
+        return make_key('login-failures', *parts)
+
+    @staticmethod
+    def get_policy(user=None):
+        """Effective login_attempt policy config"""
+        from rbac.services.policy_resolver import PolicyResolver
+        return PolicyResolver.resolve(user, 'login_attempt')
+
+    @staticmethod
+    def lock_keys(user, ip):
+        keys = []
+        if user is not None:
+            keys.append(LoginThrottle.key('lock', 'user', user.pk))
+        if ip:
+            keys.append(LoginThrottle.key('lock', 'ip', ip))
+        return keys
+
+    @staticmethod
+    def check(user, ip):
+        """Raise LoginLocked if the user or the IP is currently locked out"""
+        keys = LoginThrottle.lock_keys(user, ip)
+        if keys and get_redis_connection('default').exists(*keys):
+            raise LoginLocked()
+
+    @staticmethod
+    async def acheck(user, ip):
+        keys = LoginThrottle.lock_keys(user, ip)
+        if keys and await get_async_redis().exists(*keys):
+            raise LoginLocked()
+
+    @staticmethod
+    async def aget_policy(user=None):
+        from rbac.services.policy_resolver import PolicyResolver
+        return await PolicyResolver.aresolve(user, 'login_attempt')
+
+    @staticmethod
+    def queue_failure(pipe, user, ip, policy):
+        """Queue one failure's window and aggregate writes on a (sync or async) pipeline; returns its subjects"""
+        window = policy['window_seconds']
+        now = time.time()
+        member = f"{now}:{uuid.uuid4().hex[:8]}"
+
+        subjects = []
+        if user is not None:
+            subjects.append(('user', user.pk, policy['max_attempts']))
+        if ip:
+            subjects.append(('ip', ip, policy['max_attempts_per_ip']))
+
+        for kind, subject, _ in subjects:
+            key = LoginThrottle.key('window', kind, subject)
+            pipe.zadd(key, {member: now})
+            pipe.zremrangebyscore(key, '-inf', now - window)
+            pipe.zcard(key)
+            pipe.expire(key, window)
+        if user is not None:
+            # Aggregated for the write-behind flush
+            pipe.hincrby(LoginThrottle.key('pending'), str(user.pk), 1)
+            pipe.hset(LoginThrottle.key('last'), str(user.pk), now)
+        return subjects
+
+    @staticmethod
+    def queue_locks(pipe, subjects, results, policy):
+        """Queue lockouts for the subjects whose window count reached its limit"""
+        for index, (kind, subject, limit) in enumerate(subjects):
+            if results[index * 4 + 2] >= limit:
+                pipe.set(LoginThrottle.key('lock', kind, subject), 1, ex=policy['lockout_seconds'])
+
+    @staticmethod
+    def queue_success(pipe, user):
+        pipe.delete(LoginThrottle.key('window', 'user', user.pk))
+        pipe.hdel(LoginThrottle.key('pending'), str(user.pk))
+        pipe.sadd(LoginThrottle.key('resets'), str(user.pk))
+
+    @staticmethod
+    def record_failure(user, ip):
+        policy = LoginThrottle.get_policy(user)
+        client = get_redis_connection('default')
+        pipe = client.pipeline(transaction=False)
+        subjects = LoginThrottle.queue_failure(pipe, user, ip, policy)
+        results = pipe.execute()
+
+        pipe = client.pipeline(transaction=False)
+        LoginThrottle.queue_locks(pipe, subjects, results, policy)
+        pipe.execute()
+
+    @staticmethod
+    async def arecord_failure(user, ip):
+        """Async counterpart of record_failure() on redis.asyncio"""
+        policy = await LoginThrottle.aget_policy(user)
+        client = get_async_redis()
+        pipe = client.pipeline(transaction=False)
+        subjects = LoginThrottle.queue_failure(pipe, user, ip, policy)
+        results = await pipe.execute()
+
+        pipe = client.pipeline(transaction=False)
+        LoginThrottle.queue_locks(pipe, subjects, results, policy)
+        await pipe.execute()
+
+    @staticmethod
+    def record_success(user):
+        pipe = get_redis_connection('default').pipeline(transaction=False)
+        LoginThrottle.queue_success(pipe, user)
+        pipe.execute()
+
+    @staticmethod
+    async def arecord_success(user):
+        pipe = get_async_redis().pipeline(transaction=False)
+        LoginThrottle.queue_success(pipe, user)
+        await pipe.execute()
+
+    @staticmethod
+    def flush():
+        """Write aggregated failure counts to users_user; returns rows updated"""
+        client = get_redis_connection('default')
+        flushing = swap_for_flush(client, [LoginThrottle.key(name) for name in ('pending', 'last', 'resets')])
+
+        pending = client.hgetall(flushing[0])
+        last = client.hgetall(flushing[1])
+        resets = client.smembers(flushing[2])
+
+        rows = []
+        for user_id in set(pending) | resets:
+            failures = int(pending.get(user_id, 0))
+            last_failed = last.get(user_id)
+            rows.append((
+                user_id.decode(),
+                failures,
+                datetime.fromtimestamp(float(last_failed), tz=dt_timezone.utc) if last_failed else None,
+                user_id in resets,
+            ))
+
+        # Counts are added, not set, so every chunk commits together and the
+        # flushing copies are dropped only after that: a retry never re-adds a chunk
+        updated = 0
+        with transaction.atomic():
+            for offset in range(0, len(rows), FLUSH_CHUNK_SIZE):
+                updated += LoginThrottle.bulk_update(rows[offset:offset + FLUSH_CHUNK_SIZE])
+            transaction.on_commit(lambda: client.delete(*flushing))
+        return updated
+
+    @staticmethod
+    def bulk_update(rows):
+        values = ', '.join(['(%s::uuid, %s::integer, %s::timestamptz, %s::boolean)'] * len(rows))
+        params = [value for row in rows for value in row]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {get_user_model()._meta.db_table} AS u SET
+                    failed_login_attempts = CASE
+                        WHEN v.reset THEN v.failures
+                        ELSE u.failed_login_attempts + v.failures
+                    END,
+                    last_failed_login = COALESCE(v.last_failed, u.last_failed_login)
+                FROM (VALUES {values}) AS v(id, failures, last_failed, reset)
+                WHERE u.id = v.id
+                """,
+                params
+            )
+            return cursor.rowcount
@@ -1,41 +1,160 @@
 import random
 from django.conf import settings
 from django.core.cache import cache
+from django_redis import get_redis_connection
+from users.services.redis_utils import get_async_redis
+from users.services.identifier_service import IdentifierService
+
+# check_otp() results
+OTP_VALID = 1
+OTP_INVALID = 0
+OTP_EXPIRED = -1
+OTP_LOCKED = -2
+
+# KEYS: otp hash, cooldown key
+# ARGV: otp, expiry seconds, cooldown seconds
+# Returns 0 when stored, otherwise the seconds left on the resend cooldown
+STORE_SCRIPT = """
+if not redis.call('SET', KEYS[2], 1, 'NX', 'EX', ARGV[3]) then
+    return math.max(redis.call('TTL', KEYS[2]), 1)
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'code', ARGV[1], 'attempts', 0)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 0
+"""
+
+# KEYS: otp hash
+# ARGV: submitted otp, max attempts
+# The OTP is consumed on success and burnt once attempts run out
+VERIFY_SCRIPT = """
+local code = redis.call('HGET', KEYS[1], 'code')
+if not code then
+    return -1
+end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if code == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+if attempts >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+    return -2
+end
+return 0
+"""
+
+
+class OTPCooldownActive(Exception):
+    """Raised when an OTP is requested again before the resend cooldown ends"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"OTP resend cooldown active for {retry_after}s")
+        self.retry_after = retry_after
+
 
 class OTPService:
+    @staticmethod
+    def get_client():
+        """Redis client used for OTP storage (swap for a fake in tests)"""
+        return get_redis_connection('default')
+
+    @staticmethod
+    def get_async_client():
+        """redis.asyncio client for the async views"""
+        return get_async_redis()
+
     @staticmethod
     def generate_otp(length=6):
         """Generate a random numeric OTP"""
         return ''.join(random.choices('0123456789', k=length))
 
+    @staticmethod
+    def normalize_identifier(identifier):
+        """
+        One key per email address or phone number however it is typed,
+        so formatting variants share the attempt limit and resend cooldown
+        """
+        field, value = IdentifierService.normalize(identifier)
+        return f"{field}:{value.lower() if field == 'email' else value.lstrip('+')}"
+
     @staticmethod
     def create_otp_key(purpose, identifier):
         """Create a Redis key for OTP storage"""
-        return f"otp:{purpose}:{identifier}"
+        return cache.make_key(f"otp:{purpose}:{OTPService.normalize_identifier(identifier)}")
+
+    @staticmethod
+    def create_cooldown_key(purpose, identifier):
+        """Create a Redis key for the resend cooldown, next to the OTP itself"""
+        return cache.make_key(f"otp:{purpose}:{OTPService.normalize_identifier(identifier)}:cooldown")
 
     @staticmethod
     def store_otp(purpose, identifier, otp=None):
-        """Store OTP in Redis with expiration"""
+        """
+        Store OTP in Redis with expiration and start the resend cooldown.
+
+        Cooldown check, OTP write and attempt reset happen in one script
+        call, so concurrent requests cannot both issue a code.
+        """
         if not otp:
             otp = OTPService.generate_otp()
-            
-        key = OTPService.create_otp_key(purpose, identifier)
-        cache.set(key, otp, timeout=settings.OTP_EXPIRY)
+
+        client = OTPService.get_client()
+        retry_after = client.register_script(STORE_SCRIPT)(
+            keys=[
+                OTPService.create_otp_key(purpose, identifier),
+                OTPService.create_cooldown_key(purpose, identifier),
+            ],
+            args=[otp, settings.OTP_EXPIRY, settings.OTP_RESEND_COOLDOWN],
+        )
+        if retry_after:
+            raise OTPCooldownActive(int(retry_after))
         return otp
 
+    @staticmethod
+    def check_otp(purpose, identifier, otp):
+        """Verify and consume an OTP atomically, returning one of the OTP_* results"""
+        client = OTPService.get_client()
+        return int(client.register_script(VERIFY_SCRIPT)(
+            keys=[OTPService.create_otp_key(purpose, identifier)],
+            args=[otp, settings.OTP_MAX_ATTEMPTS],
+        ))
+
+    @staticmethod
+    async def astore_otp(purpose, identifier, otp=None):
+        """Async counterpart of store_otp()"""
+        if not otp:
+            otp = OTPService.generate_otp()
+
+        client = OTPService.get_async_client()
+        retry_after = await client.register_script(STORE_SCRIPT)(
+            keys=[
+                OTPService.create_otp_key(purpose, identifier),
+                OTPService.create_cooldown_key(purpose, identifier),
+            ],
+            args=[otp, settings.OTP_EXPIRY, settings.OTP_RESEND_COOLDOWN],
+        )
+        if retry_after:
+            raise OTPCooldownActive(int(retry_after))
+        return otp
+
+    @staticmethod
+    async def acheck_otp(purpose, identifier, otp):
+        """Async counterpart of check_otp()"""
+        client = OTPService.get_async_client()
+        return int(await client.register_script(VERIFY_SCRIPT)(
+            keys=[OTPService.create_otp_key(purpose, identifier)],
+            args=[otp, settings.OTP_MAX_ATTEMPTS],
+        ))
+
     @staticmethod
     def verify_otp(purpose, identifier, otp):
         """Verify OTP against stored value"""
-        key = OTPService.create_otp_key(purpose, identifier)
-        stored_otp = cache.get(key)
-        
-        if stored_otp and stored_otp == otp:
-            cache.delete(key)  # Delete after successful verification
-            return True
-        return False
+        return OTPService.check_otp(purpose, identifier, otp) == OTP_VALID
 
     @staticmethod
     def get_otp(purpose, identifier):
         """Retrieve stored OTP without deleting it"""
-        key = OTPService.create_otp_key(purpose, identifier)
-        return cache.get(key)
\ No newline at end of file
+        client = OTPService.get_client()
+        otp = client.hget(OTPService.create_otp_key(purpose, identifier), 'code')
+        return otp.decode() if otp is not None else None
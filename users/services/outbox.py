@@ -0,0 +1,182 @@
+import json
+import time
+import uuid
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from users.services.redis_utils import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+REDACTED = '[redacted]'
+
+# KEYS: queue, claimed zset, retry zset
+# ARGV: batch size, now
+# Moves due retries back onto the queue, then claims up to a batch of items,
+# scored by when they were claimed
+CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[2])
+for _, item in ipairs(due) do
+    redis.call('LPUSH', KEYS[1], item)
+end
+if #due > 0 then
+    redis.call('ZREM', KEYS[3], unpack(due))
+end
+local claimed = {}
+for i = 1, tonumber(ARGV[1]) do
+    local item = redis.call('RPOP', KEYS[1])
+    if not item then
+        break
+    end
+    redis.call('ZADD', KEYS[2], ARGV[2], item)
+    claimed[i] = item
+end
+return claimed
+"""
+
+# KEYS: claimed zset, queue
+# ARGV: claimed-before cutoff
+# Returns items claimed before the cutoff to the queue
+RECOVER_SCRIPT = """
+local stale = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+for _, item in ipairs(stale) do
+    redis.call('LPUSH', KEYS[2], item)
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+return #stale
+"""
+
+
+class Outbox:
+    """
+    Durable Redis work queue. Claimed items are kept with their claim time
+    until they are acknowledged; recover() requeues those a worker held
+    for longer than `processing_timeout`. Failed items are retried with
+    exponential backoff and end up on a dead-letter list after
+    `max_attempts`, with the payload keys in `redact` blanked out. The
+    dead-letter list is capped at OUTBOX_DEAD_LETTER_LIMIT entries and
+    expires OUTBOX_DEAD_LETTER_TTL seconds after the last one.
+    """
+
+    def __init__(self, name, max_attempts=5, backoff=5, processing_timeout=None, redact=()):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.processing_timeout = processing_timeout or settings.OUTBOX_PROCESSING_TIMEOUT
+        self.redact = redact
+
+    @property
+    def client(self):
+        return get_redis_connection('default')
+
+    def key(self, suffix):
+        return cache.make_key(f"outbox:{self.name}:{suffix}")
+
+    @staticmethod
+    def build_item(payload):
+        # The id keeps equal payloads apart in the claimed set
+        return json.dumps({'id': uuid.uuid4().hex, 'payload': payload, 'attempts': 0})
+
+    def enqueue(self, payload):
+        """Push a JSON-serializable payload onto the queue"""
+        self.client.lpush(self.key('queue'), self.build_item(payload))
+
+    async def aenqueue(self, payload):
+        """Async counterpart of enqueue() for views served by keya/asgi.py"""
+        await get_async_redis().lpush(self.key('queue'), self.build_item(payload))
+
+    def claim(self, batch_size):
+        """Claim up to batch_size raw items for processing"""
+        return self.client.register_script(CLAIM_SCRIPT)(
+            keys=[self.key('queue'), self.key('claimed'), self.key('retry')],
+            args=[batch_size, time.time()],
+        )
+
+    def ack(self, items):
+        """Drop delivered items from the claimed set"""
+        if items:
+            self.client.zrem(self.key('claimed'), *items)
+
+    def fail(self, item, error):
+        """Schedule a retry, or dead-letter the item once attempts run out"""
+        entry = json.loads(item)
+        entry['attempts'] += 1
+        entry['last_error'] = str(error)
+
+        pipe = self.client.pipeline()
+        pipe.zrem(self.key('claimed'), item)
+        if entry['attempts'] >= self.max_attempts:
+            logger.error("Outbox %s dead-lettered item after %s attempts: %s", self.name, entry['attempts'], error)
+            entry['payload'] = {
+                key: REDACTED if key in self.redact else value for key, value in entry['payload'].items()
+            }
+            pipe.lpush(self.key('dead'), json.dumps(entry))
+            pipe.ltrim(self.key('dead'), 0, settings.OUTBOX_DEAD_LETTER_LIMIT - 1)
+            pipe.expire(self.key('dead'), settings.OUTBOX_DEAD_LETTER_TTL)
+        else:
+            retry_at = time.time() + self.backoff * 2 ** (entry['attempts'] - 1)
+            pipe.zadd(self.key('retry'), {json.dumps(entry): retry_at})
+        pipe.execute()
+
+    def recover(self):
+        """
+        Return items claimed more than processing_timeout seconds ago, i.e.
+        stranded by a crashed worker, to the queue. Items still being
+        delivered are left alone, so this is safe while workers run.
+        """
+        return self.client.register_script(RECOVER_SCRIPT)(
+            keys=[self.key('claimed'), self.key('queue')],
+            args=[time.time() - self.processing_timeout],
+        )
+
+    def stats(self):
+        pipe = self.client.pipeline()
+        pipe.llen(self.key('queue'))
+        pipe.zcard(self.key('claimed'))
+        pipe.zcard(self.key('retry'))
+        pipe.llen(self.key('dead'))
+        queued, processing, retrying, dead = pipe.execute()
+        return {'queued': queued, 'processing': processing, 'retrying': retrying, 'dead': dead}
+
+
+def run_worker(worker, batch_size, stop_event, poll_interval=1.0, exit_when_empty=False):
+    """
+    Drain an outbox with `worker` until stop_event is set (or, with
+    exit_when_empty, until the queue has nothing left to claim).
+
+    `worker` provides the outbox, open()/close() for its long-lived
+    connection and deliver(payload) for a single item. Workers that also
+    define deliver_batch(payloads) get the whole claimed batch at once;
+    if that fails the batch is retried item by item.
+    """
+    outbox = worker.outbox
+    worker.open()
+    try:
+        while not stop_event.is_set():
+            items = outbox.claim(batch_size)
+            if not items:
+                if exit_when_empty:
+                    break
+                stop_event.wait(poll_interval)
+                continue
+
+            if hasattr(worker, 'deliver_batch'):
+                try:
+                    worker.deliver_batch([json.loads(item)['payload'] for item in items])
+                    outbox.ack(items)
+                    continue
+                except Exception as exc:
+                    logger.warning("Outbox %s batch delivery failed, retrying items one by one: %s", outbox.name, exc)
+
+            delivered = []
+            for item in items:
+                try:
+                    worker.deliver(json.loads(item)['payload'])
+                    delivered.append(item)
+                except Exception as exc:
+                    logger.warning("Outbox %s delivery failed: %s", outbox.name, exc)
+                    outbox.fail(item, exc)
+            outbox.ack(delivered)
+    finally:
+        worker.close()
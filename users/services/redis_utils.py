@@ -0,0 +1,126 @@
+import asyncio
+from weakref import WeakKeyDictionary
+from redis import asyncio as aioredis
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+# redis.asyncio connections belong to the loop that opened them
+_async_clients = WeakKeyDictionary()
+
+# KEYS: pairs of (live key, flushing key)
+# Moves each live key aside unless a previous flush left one behind
+SWAP_SCRIPT = """
+for i = 1, #KEYS, 2 do
+    if redis.call('EXISTS', KEYS[i + 1]) == 0 and redis.call('EXISTS', KEYS[i]) == 1 then
+        redis.call('RENAME', KEYS[i], KEYS[i + 1])
+    end
+end
+return 1
+"""
+
+# KEYS: generation key, entry key
+# ARGV: generation read before the entry was built ('' when unset), encoded entry, ttl
+SET_IF_GENERATION_SCRIPT = """
+local generation = redis.call('GET', KEYS[1]) or ''
+if generation ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+def swap_for_flush(client, keys):
+    """
+    Atomically move write-behind buffers aside for flushing.
+
+    Returns the flushing key for each live key. New writes go to fresh
+    live keys while the flushing copies are written to the database;
+    copies left behind by a failed flush are picked up again first.
+    """
+    flushing = [f"{key}:flushing" for key in keys]
+    pairs = [key for pair in zip(keys, flushing) for key in pair]
+    client.register_script(SWAP_SCRIPT)(keys=pairs)
+    return flushing
+
+
+def make_key(*parts):
+    return cache.make_key(':'.join(map(str, parts)))
+
+
+def cache_generation(key):
+    """
+    Current value of a generation counter, '' when unset.
+
+    Read it before building a cache entry from the database and write the
+    entry with cache_set_if_generation(): invalidations bump the counter
+    (bump_generations) after their transaction commits, so an entry built
+    from rows read before that commit is never cached after it.
+    """
+    value = get_redis_connection('default').get(cache.make_key(key))
+    return value.decode() if value is not None else ''
+
+
+def cache_set_if_generation(generation_key, generation, key, value, timeout):
+    """cache.set() skipped when the generation counter moved; returns whether it was stored"""
+    client = get_redis_connection('default')
+    return bool(client.register_script(SET_IF_GENERATION_SCRIPT)(
+        keys=[cache.make_key(generation_key), cache.make_key(key)],
+        args=[generation, cache.client.encode(value), int(timeout)],
+    ))
+
+
+def bump_generations(keys, timeout):
+    """
+    Advance generation counters. They only need to outlive the rebuilds in
+    flight, since a counter that expires also reads as changed.
+    """
+    pipe = get_redis_connection('default').pipeline(transaction=False)
+    for key in keys:
+        pipe.incr(cache.make_key(key))
+        pipe.expire(cache.make_key(key), timeout)
+    pipe.execute()
+
+
+def get_async_redis():
+    """Async client for the default cache's Redis server, one per event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = aioredis.Redis.from_url(settings.CACHES['default']['LOCATION'])
+        _async_clients[loop] = client
+    return client
+
+
+async def acache_get(key):
+    """
+    cache.get() over redis.asyncio: django-redis's own cache.aget() is a
+    thread-sensitive sync_to_async wrapper, which funnels every async
+    caller through one thread. Values are decoded by the cache client, so
+    entries are shared with sync code.
+    """
+    value = await get_async_redis().get(cache.make_key(key))
+    return None if value is None else cache.client.decode(value)
+
+
+async def acache_set(key, value, timeout):
+    await get_async_redis().set(cache.make_key(key), cache.client.encode(value), ex=timeout)
+
+
+async def acache_add(key, value, timeout=None):
+    """cache.add(): set only if missing; timeout None keeps the key forever"""
+    return bool(await get_async_redis().set(cache.make_key(key), cache.client.encode(value), ex=timeout, nx=True))
+
+
+async def acache_generation(key):
+    value = await get_async_redis().get(cache.make_key(key))
+    return value.decode() if value is not None else ''
+
+
+async def acache_set_if_generation(generation_key, generation, key, value, timeout):
+    client = get_async_redis()
+    return bool(await client.register_script(SET_IF_GENERATION_SCRIPT)(
+        keys=[cache.make_key(generation_key), cache.make_key(key)],
+        args=[generation, cache.client.encode(value), int(timeout)],
+    ))
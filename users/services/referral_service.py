@@ -0,0 +1,66 @@
+import random
+import string
+import logging
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+REFERRAL_CODE_ALPHABET = string.ascii_uppercase + string.digits
+REFERRAL_CODE_LENGTH = 10
+
+
+class ReferralCodeService:
+    """
+    Hands out referral codes from a Redis set of pre-generated codes that
+    are known not to be in use. SPOP is atomic, so two registrations can
+    never receive the same code and no existence query is needed.
+    """
+
+    @staticmethod
+    def pool_key():
+        return cache.make_key('referral:pool')
+
+    @staticmethod
+    def generate_code():
+        return ''.join(random.choices(REFERRAL_CODE_ALPHABET, k=REFERRAL_CODE_LENGTH))
+
+    @staticmethod
+    def allocate():
+        """Pop one code from the pool, or None when it is empty or unreachable"""
+        codes = ReferralCodeService.allocate_many(1)
+        return codes[0] if codes else None
+
+    @staticmethod
+    def allocate_many(count):
+        """Pop up to `count` codes from the pool"""
+        try:
+            codes = get_redis_connection('default').spop(ReferralCodeService.pool_key(), count)
+        except Exception as e:
+            logger.warning("Referral code pool unavailable: %s", e)
+            return []
+        return [code.decode() for code in codes or []]
+
+    @staticmethod
+    def pool_size():
+        return get_redis_connection('default').scard(ReferralCodeService.pool_key())
+
+    @staticmethod
+    def refill(target, batch_size=10000):
+        """Top the pool up to `target` codes; returns how many were added"""
+        User = get_user_model()
+        client = get_redis_connection('default')
+        key = ReferralCodeService.pool_key()
+        added = 0
+
+        while True:
+            missing = target - client.scard(key)
+            if missing <= 0:
+                return added
+            candidates = {ReferralCodeService.generate_code() for _ in range(min(missing, batch_size))}
+            # One query per batch filters out codes already assigned to users
+            taken = set(User.objects.filter(referral_code__in=candidates).values_list('referral_code', flat=True))
+            fresh = candidates - taken
+            if fresh:
+                added += client.sadd(key, *fresh)
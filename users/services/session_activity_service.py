@@ -0,0 +1,122 @@
+import time
+import threading
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection, transaction
+from django_redis import get_redis_connection
+from users.models import DeviceSession
+from users.services.redis_utils import make_key, swap_for_flush
+
+FLUSH_CHUNK_SIZE = 1000
+MAX_LOCAL_ENTRIES = 10000
+
+
+class SessionActivityTracker:
+    """
+    Write-behind buffer for DeviceSession.last_activity.
+
+    Requests record activity in a Redis hash (session id -> timestamp),
+    so repeated requests on one session coalesce into one field. Each
+    process also skips Redis writes for a session touched less than
+    SESSION_ACTIVITY_RESOLUTION seconds ago. flush() writes the hash to
+    the database with one UPDATE per chunk of sessions.
+    """
+    _lock = threading.Lock()
+    _last_write = {}
+    _unreported_requests = 0
+
+    @staticmethod
+    def key(*parts):
+        return make_key('session-activity', *parts)
+
+    @classmethod
+    def touch(cls, session_id, now=None):
+        now = now or time.time()
+        with cls._lock:
+            cls._unreported_requests += 1
+            if now - cls._last_write.get(session_id, 0) < settings.SESSION_ACTIVITY_RESOLUTION:
+                return
+            if len(cls._last_write) > MAX_LOCAL_ENTRIES:
+                cls._last_write.clear()
+            cls._last_write[session_id] = now
+            requests, cls._unreported_requests = cls._unreported_requests, 0
+
+        pipe = get_redis_connection('default').pipeline(transaction=False)
+        pipe.hset(cls.key('pending'), session_id, now)
+        pipe.hincrby(cls.key('stats'), 'requests', requests)
+        pipe.execute()
+
+    @classmethod
+    def buffered(cls, session_ids):
+        """Activity times not yet flushed, as {session id: datetime}"""
+        session_ids = [str(session_id) for session_id in session_ids]
+        if not session_ids:
+            return {}
+        client = get_redis_connection('default')
+        result = {}
+        for key in (cls.key('pending:flushing'), cls.key('pending')):
+            for session_id, value in zip(session_ids, client.hmget(key, session_ids)):
+                if value is not None:
+                    result[session_id] = datetime.fromtimestamp(float(value), tz=dt_timezone.utc)
+        return result
+
+    @classmethod
+    def refresh(cls, sessions):
+        """Overlay buffered activity onto DeviceSession instances for listing/expiry"""
+        sessions = list(sessions)
+        buffered = cls.buffered(session.id for session in sessions)
+        for session in sessions:
+            last_activity = buffered.get(str(session.id))
+            if last_activity and last_activity > session.last_activity:
+                session.last_activity = last_activity
+        return sessions
+
+    @classmethod
+    def flush(cls):
+        """Write buffered activity to the database; returns rows updated"""
+        client = get_redis_connection('default')
+        flushing, = swap_for_flush(client, [cls.key('pending')])
+        rows = [
+            (session_id.decode(), datetime.fromtimestamp(float(value), tz=dt_timezone.utc))
+            for session_id, value in client.hgetall(flushing).items()
+        ]
+
+        updated = 0
+        for offset in range(0, len(rows), FLUSH_CHUNK_SIZE):
+            updated += cls.bulk_update(rows[offset:offset + FLUSH_CHUNK_SIZE])
+
+        pipe = client.pipeline(transaction=False)
+        pipe.delete(flushing)
+        pipe.hincrby(cls.key('stats'), 'flushed_rows', updated)
+        pipe.hincrby(cls.key('stats'), 'flushes', 1 if rows else 0)
+        pipe.execute()
+        return updated
+
+    @staticmethod
+    def bulk_update(rows):
+        values = ', '.join(['(%s::uuid, %s::timestamptz)'] * len(rows))
+        params = [value for row in rows for value in row]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {DeviceSession._meta.db_table} AS s
+                SET last_activity = v.last_activity
+                FROM (VALUES {values}) AS v(id, last_activity)
+                WHERE s.id = v.id AND s.last_activity < v.last_activity
+                """,
+                params
+            )
+            return cursor.rowcount
+
+    @classmethod
+    def stats(cls):
+        """Authenticated requests seen vs rows written since the counters were reset"""
+        raw = get_redis_connection('default').hgetall(cls.key('stats'))
+        stats = {name.decode(): int(value) for name, value in raw.items()}
+        stats.setdefault('requests', 0)
+        stats.setdefault('flushed_rows', 0)
+        return stats
+
+    @classmethod
+    def reset_stats(cls):
+        get_redis_connection('default').delete(cls.key('stats'))
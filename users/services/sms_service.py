@@ -1,20 +1,167 @@
-from twilio.rest import Client
+import time
+import logging
 from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from django.utils.module_loading import import_string
 from django.utils.translation import gettext as _
+from users.services.outbox import Outbox
 
-def send_otp_sms(phone, otp, purpose):
+logger = logging.getLogger(__name__)
+
+sms_outbox = Outbox(
+    'sms',
+    max_attempts=settings.SMS_OUTBOX_MAX_ATTEMPTS,
+    backoff=settings.SMS_OUTBOX_BACKOFF,
+    # Dead letters outlive the OTP's use; the code itself is not kept
+    redact=('otp',),
+)
+
+
+class BaseSmsTransport:
+    """Sends a single SMS; instances are reused for many messages"""
+    name = 'base'
+
+    def send(self, phone, message):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class TwilioTransport(BaseSmsTransport):
+    name = 'twilio'
+
+    def __init__(self):
+        from twilio.rest import Client
+        from twilio.http.http_client import TwilioHttpClient
+
+        # One client and pooled HTTP session for the transport's lifetime
+        self.http_client = TwilioHttpClient(pool_connections=True)
+        self.client = Client(
+            settings.TWILIO_ACCOUNT_SID,
+            settings.TWILIO_AUTH_TOKEN,
+            http_client=self.http_client
+        )
+
+    def send(self, phone, message):
+        self.client.messages.create(
+            body=message,
+            from_=settings.TWILIO_PHONE_NUMBER,
+            to=phone
+        )
+
+    def close(self):
+        if self.http_client.session is not None:
+            self.http_client.session.close()
+
+
+class ConsoleTransport(BaseSmsTransport):
+    """Logs messages instead of sending them (development)"""
+    name = 'console'
+
+    def send(self, phone, message):
+        logger.info("SMS to %s: %s", phone, message)
+
+
+class LocMemTransport(BaseSmsTransport):
+    """Keeps sent messages in memory for tests"""
+    name = 'locmem'
+    outbox = []
+
+    def send(self, phone, message):
+        LocMemTransport.outbox.append((phone, message))
+
+
+def get_transport_class():
+    return import_string(settings.SMS_TRANSPORT)
+
+
+_transport = None
+
+
+def get_transport():
+    """Process-wide transport for direct sends"""
+    global _transport
+    if _transport is None:
+        _transport = get_transport_class()()
+    return _transport
+
+
+class RateLimiter:
+    """Fixed one-second window shared by every worker through Redis"""
+
+    def __init__(self, provider, per_second):
+        self.provider = provider
+        self.per_second = per_second
+
+    def acquire(self):
+        """Block until a send slot is free in the current second"""
+        if not self.per_second:
+            return
+        client = get_redis_connection('default')
+        while True:
+            now = time.time()
+            window = int(now)
+            key = cache.make_key(f"sms:rate:{self.provider}:{window}")
+            pipe = client.pipeline()
+            pipe.incr(key)
+            pipe.expire(key, 2)
+            count, _ = pipe.execute()
+            if count <= self.per_second:
+                return
+            time.sleep(window + 1 - now)
+
+
+def build_otp_sms(otp, purpose):
     # Customize message based on purpose
     if purpose == 'phone-login':
-        message = _("Your login verification code is: {otp}").format(otp=otp)
+        return _("Your login verification code is: {otp}").format(otp=otp)
     elif purpose == 'phone-verify':
-        message = _("Your phone verification code is: {otp}").format(otp=otp)
-    else:
-        message = _("Your verification code is: {otp}").format(otp=otp)
-    
-    client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-    
-    client.messages.create(
-        body=message,
-        from_=settings.TWILIO_PHONE_NUMBER,
-        to=phone
-    )
\ No newline at end of file
+        return _("Your phone verification code is: {otp}").format(otp=otp)
+    return _("Your verification code is: {otp}").format(otp=otp)
+
+
+def send_otp_sms(phone, otp, purpose):
+    """Send an OTP SMS immediately through the configured transport"""
+    get_transport().send(phone, build_otp_sms(otp, purpose))
+
+
+def queue_otp_sms(phone, otp, purpose):
+    """Hand an OTP SMS to the outbox; delivery happens in process_outbox"""
+    try:
+        sms_outbox.enqueue({'phone': phone, 'otp': otp, 'purpose': purpose})
+        return True
+    except Exception as e:
+        logger.error("Failed to queue SMS: %s", e)
+        return False
+
+
+async def aqueue_otp_sms(phone, otp, purpose):
+    try:
+        await sms_outbox.aenqueue({'phone': phone, 'otp': otp, 'purpose': purpose})
+        return True
+    except Exception as e:
+        logger.error("Failed to queue SMS: %s", e)
+        return False
+
+
+class SmsOutboxWorker:
+    """Delivers queued OTP SMS through one transport, within the provider rate limit"""
+    outbox = sms_outbox
+
+    def __init__(self):
+        self.transport = None
+        self.limiter = None
+
+    def open(self):
+        self.transport = get_transport_class()()
+        self.limiter = RateLimiter(self.transport.name, settings.SMS_RATE_LIMIT)
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+    def deliver(self, payload):
+        self.limiter.acquire()
+        self.transport.send(payload['phone'], build_otp_sms(payload['otp'], payload['purpose']))
@@ -0,0 +1,167 @@
+import time
+import hashlib
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django_redis import get_redis_connection
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.models import DeviceSession
+from users.services.redis_utils import get_async_redis, make_key
+from users.services.login_throttle_service import get_client_ip
+from rbac.services.permission_resolver import PermissionResolver
+
+ROTATE_OK = 'ok'
+ROTATE_REVOKED = 'revoked'
+ROTATE_REUSED = 'reused'
+
+# KEYS: family hash, user revoked-before key
+# ARGV: presented jti, new jti, ttl
+# Rotates the family to the new jti if the presented token is its current one.
+# Presenting an older jti means a rotated token was replayed: the family is
+# dropped so neither the attacker's nor the owner's copy works any more.
+ROTATE_SCRIPT = """
+local family = redis.call('HMGET', KEYS[1], 'jti', 'created')
+if not family[1] then
+    return 'revoked'
+end
+local revoked_before = redis.call('GET', KEYS[2])
+if revoked_before and tonumber(family[2]) <= tonumber(revoked_before) then
+    redis.call('DEL', KEYS[1])
+    return 'revoked'
+end
+if family[1] ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 'reused'
+end
+redis.call('HSET', KEYS[1], 'jti', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 'ok'
+"""
+
+
+class RefreshTokenStore:
+    """
+    Tracks refresh token families in Redis.
+
+    A family is the chain of rotated refresh tokens descending from one
+    login and shares its id with the login's DeviceSession (the `sid`
+    claim). Only the newest jti of each family is accepted. Revoking all of
+    a user's tokens writes a single revoked-before timestamp rather than
+    touching every family.
+    """
+
+    @staticmethod
+    def ttl():
+        return int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+
+    @staticmethod
+    def family_key(family_id):
+        return make_key('token-family', family_id)
+
+    @staticmethod
+    def revoked_key(user_id):
+        return make_key('token-revoked-before', user_id)
+
+    @staticmethod
+    def now_ms():
+        return int(time.time() * 1000)
+
+    @staticmethod
+    def register(family_id, user_id, jti):
+        pipe = get_redis_connection('default').pipeline()
+        key = RefreshTokenStore.family_key(family_id)
+        pipe.hset(key, mapping={'user': str(user_id), 'jti': jti, 'created': RefreshTokenStore.now_ms()})
+        pipe.expire(key, RefreshTokenStore.ttl())
+        pipe.execute()
+
+    @staticmethod
+    async def aregister(family_id, user_id, jti):
+        pipe = get_async_redis().pipeline()
+        key = RefreshTokenStore.family_key(family_id)
+        pipe.hset(key, mapping={'user': str(user_id), 'jti': jti, 'created': RefreshTokenStore.now_ms()})
+        pipe.expire(key, RefreshTokenStore.ttl())
+        await pipe.execute()
+
+    @staticmethod
+    def rotate(family_id, user_id, jti, new_jti):
+        """Returns ROTATE_OK, ROTATE_REVOKED or ROTATE_REUSED"""
+        client = get_redis_connection('default')
+        result = client.register_script(ROTATE_SCRIPT)(
+            keys=[RefreshTokenStore.family_key(family_id), RefreshTokenStore.revoked_key(user_id)],
+            args=[jti, new_jti, RefreshTokenStore.ttl()],
+        )
+        return result.decode()
+
+    @staticmethod
+    def is_current(family_id, user_id, jti):
+        """Whether jti is the live, newest token of the user's family (i.e. not rotated or revoked)"""
+        pipe = get_redis_connection('default').pipeline(transaction=False)
+        pipe.hmget(RefreshTokenStore.family_key(family_id), 'user', 'jti', 'created')
+        pipe.get(RefreshTokenStore.revoked_key(user_id))
+        (owner, current_jti, created), revoked_before = pipe.execute()
+        if current_jti is None or owner.decode() != str(user_id) or current_jti.decode() != jti:
+            return False
+        return revoked_before is None or int(created) > int(revoked_before)
+
+    @staticmethod
+    def revoke(*family_ids):
+        if family_ids:
+            get_redis_connection('default').delete(*[RefreshTokenStore.family_key(family_id) for family_id in family_ids])
+
+    @staticmethod
+    def revoke_all(user_id):
+        """Invalidate every family issued to the user so far"""
+        # Outlives any refresh token issued before now
+        get_redis_connection('default').set(
+            RefreshTokenStore.revoked_key(user_id), RefreshTokenStore.now_ms(), ex=RefreshTokenStore.ttl()
+        )
+
+
+def build_device_session(user, request):
+    """Unsaved DeviceSession for the device a user just logged in from"""
+    meta = request.META if request is not None else {}
+    user_agent = meta.get('HTTP_USER_AGENT', '')
+    fingerprint = '|'.join([user_agent, meta.get('HTTP_ACCEPT_LANGUAGE', '')])
+    return DeviceSession(
+        user=user,
+        device_hash=hashlib.sha256(fingerprint.encode()).hexdigest(),
+        ip_address=get_client_ip(request) or '0.0.0.0',
+        user_agent=user_agent,
+    )
+
+
+def add_permission_claims(token, user_id):
+    """Embed the user's compiled RBAC permissions (copied into access tokens)"""
+    if settings.RBAC_TOKEN_CLAIMS:
+        token['perms'] = PermissionResolver.token_claims(user_id)
+    return token
+
+
+def create_refresh_token(user, session):
+    refresh = RefreshToken.for_user(user)
+    refresh['sid'] = str(session.id)
+    return refresh
+
+
+def issue_tokens(user, request):
+    """
+    Create a DeviceSession and a refresh token bound to it.
+
+    The session id travels in the `sid` claim (copied to access tokens)
+    so activity tracking can attribute requests to the session, and is
+    also the token family id in RefreshTokenStore.
+    """
+    session = build_device_session(user, request)
+    session.save()
+    refresh = add_permission_claims(create_refresh_token(user, session), user.pk)
+    RefreshTokenStore.register(session.id, user.pk, refresh[api_settings.JTI_CLAIM])
+    return refresh
+
+
+async def aissue_tokens(user, request):
+    """Async counterpart of issue_tokens()"""
+    session = build_device_session(user, request)
+    await session.asave()
+    refresh = await sync_to_async(add_permission_claims)(create_refresh_token(user, session), user.pk)
+    await RefreshTokenStore.aregister(session.id, user.pk, refresh[api_settings.JTI_CLAIM])
+    return refresh
@@ -0,0 +1,281 @@
+import io
+import csv
+import json
+import time
+import uuid
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.validators import validate_email
+from django.core.exceptions import ValidationError
+from django.utils.dateparse import parse_date
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+from django_redis import get_redis_connection
+from users.models import Profile, User
+from users.services.outbox import Outbox
+from users.services.redis_utils import make_key
+from users.services.referral_service import ReferralCodeService
+from users.services.identifier_service import IdentifierService
+
+USER_FIELDS = ('phone', 'primary_language', 'country', 'user_timezone')
+PROFILE_FIELDS = ('first_name', 'last_name', 'company')
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+COUNTERS = ('processed', 'inserted', 'skipped', 'invalid')
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_RETRYING = 'retrying'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+user_import_outbox = Outbox(
+    'user-import',
+    max_attempts=settings.USER_IMPORT_OUTBOX_MAX_ATTEMPTS,
+    backoff=settings.USER_IMPORT_OUTBOX_BACKOFF,
+    processing_timeout=settings.USER_IMPORT_OUTBOX_PROCESSING_TIMEOUT,
+)
+
+
+def read_records(lines, fmt):
+    """Yield dict records from an iterable of CSV or JSONL text lines"""
+    if fmt == 'csv':
+        yield from csv.DictReader(lines)
+    else:
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in TRUE_VALUES
+
+
+def copy_rows(cursor, table, fields, rows):
+    columns = ', '.join(f'"{field.column}"' for field in fields)
+    with cursor.copy(f'COPY {table} ({columns}) FROM STDIN') as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+def clean_columns(instance, names):
+    """Run the model field validation (max_length, choices, validators) for the named fields only"""
+    instance.clean_fields(exclude=[field.name for field in instance._meta.concrete_fields if field.name not in names])
+
+
+def prepare_row(instance, fields):
+    """Column values for an unsaved instance, with defaults and auto_now applied"""
+    return [field.get_db_prep_save(field.pre_save(instance, True), connection) for field in fields]
+
+
+class UserImporter:
+    """
+    Streams user records into users_user and users_profile.
+
+    Passwords are hashed on a process pool and referral codes come from
+    the pre-generated pool. Each chunk is COPYed into a temporary table
+    and moved over with INSERT ... ON CONFLICT DO NOTHING, so users that
+    already exist (e.g. from an interrupted run) are skipped rather than
+    failing the chunk.
+    """
+
+    def __init__(self, chunk_size=5000, processes=None, on_progress=None, stats=None):
+        self.chunk_size = chunk_size
+        self.processes = processes
+        self.on_progress = on_progress
+        # Counts carried over when resuming an interrupted run
+        self.stats = {counter: 0 for counter in COUNTERS}
+        self.stats.update(stats or {})
+
+    def run(self, records, skip=0):
+        records = iter(records)
+        # Records before `skip` were committed by a previous run
+        for _ in islice(records, skip):
+            pass
+        self.stats['processed'] = skip
+
+        started = time.monotonic()
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            while True:
+                chunk = list(islice(records, self.chunk_size))
+                if not chunk:
+                    break
+                self.import_chunk(chunk, pool)
+                self.stats['processed'] += len(chunk)
+                if self.on_progress:
+                    self.on_progress(dict(self.stats, elapsed=time.monotonic() - started))
+        return self.stats
+
+    def build(self, record):
+        """
+        Unsaved (user, profile) for a record, or None when it is invalid.
+
+        Every column taken from the record is validated here (lengths,
+        choices, the phone format, the birth date): a value the table
+        rejects would otherwise abort the COPY of the whole chunk.
+        """
+        email = (record.get('email') or '').strip()
+        try:
+            validate_email(email)
+        except ValidationError:
+            return None
+
+        user = User(
+            email=User.objects.normalize_email(email),
+            marketing_consent=parse_bool(record.get('marketing_consent')),
+            is_verified=parse_bool(record.get('is_verified')),
+            **{field: record[field] for field in USER_FIELDS if record.get(field)}
+        )
+        if user.phone:
+            user.phone = IdentifierService.normalize_phone(user.phone)
+
+        try:
+            birth_date = parse_date(record['birth_date']) if record.get('birth_date') else None
+        except ValueError:
+            # Well formed but not a real date, e.g. 2001-02-30
+            return None
+        if record.get('birth_date') and birth_date is None:
+            return None
+
+        profile = Profile(
+            user=user,
+            type=record.get('type') or 'personal',
+            birth_date=birth_date,
+            **{field: record[field] for field in PROFILE_FIELDS if record.get(field)}
+        )
+        try:
+            clean_columns(user, ('email',) + USER_FIELDS)
+            clean_columns(profile, ('type', 'birth_date') + PROFILE_FIELDS)
+        except ValidationError:
+            return None
+        return user, profile
+
+    def import_chunk(self, chunk, pool):
+        built = [self.build(record) for record in chunk]
+        valid = [(record, pair) for record, pair in zip(chunk, built) if pair is not None]
+        self.stats['invalid'] += len(chunk) - len(valid)
+        if not valid:
+            return
+
+        passwords = [record.get('password') or None for record, _ in valid]
+        hashes = pool.map(make_password, passwords, chunksize=max(1, len(passwords) // 64))
+        codes = ReferralCodeService.allocate_many(len(valid))
+        codes += [ReferralCodeService.generate_code() for _ in range(len(valid) - len(codes))]
+
+        users = []
+        for (_, (user, _)), encoded, code in zip(valid, hashes, codes):
+            user.password = encoded
+            user.referral_code = code
+            users.append(user)
+
+        user_fields = User._meta.concrete_fields
+        profile_fields = Profile._meta.concrete_fields
+        columns = ', '.join(f'"{field.column}"' for field in user_fields)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE import_users (LIKE {User._meta.db_table} INCLUDING DEFAULTS) ON COMMIT DROP'
+            )
+            copy_rows(cursor, 'import_users', user_fields, (prepare_row(user, user_fields) for user in users))
+            cursor.execute(
+                f'INSERT INTO {User._meta.db_table} ({columns}) '
+                f'SELECT {columns} FROM import_users ON CONFLICT DO NOTHING RETURNING id'
+            )
+            inserted = {row[0] for row in cursor.fetchall()}
+
+            profiles = [profile for _, (user, profile) in valid if user.pk in inserted]
+            copy_rows(cursor, Profile._meta.db_table, profile_fields,
+                      (prepare_row(profile, profile_fields) for profile in profiles))
+
+        # COPY bypasses signals; drop any negative identifier lookups for the new users
+        for user in users:
+            if user.pk in inserted:
+                IdentifierService.invalidate(email=user.email, phone=user.phone)
+
+        self.stats['inserted'] += len(inserted)
+        self.stats['skipped'] += len(users) - len(inserted)
+
+
+class UserImportJob:
+    """
+    An uploaded import file and its status, kept in a Redis hash for
+    USER_IMPORT_JOB_TTL seconds. The counters are written after every
+    committed chunk, so a retried job resumes after the last one.
+    """
+
+    @staticmethod
+    def key(job_id):
+        return make_key('user-import', job_id)
+
+    @staticmethod
+    def create(upload, fmt, user_id):
+        """Store the upload, queue it for the user_import workers and return the job id"""
+        job_id = uuid.uuid4().hex
+        path = default_storage.save(f"{settings.USER_IMPORT_UPLOAD_DIR}/{job_id}.{fmt}", upload)
+        UserImportJob.update(
+            job_id, status=JOB_QUEUED, format=fmt, path=path, created_by=user_id, attempts=0,
+            created_at=timezone.now().isoformat(), **{counter: 0 for counter in COUNTERS}
+        )
+        user_import_outbox.enqueue({'job_id': job_id})
+        return job_id
+
+    @staticmethod
+    def get(job_id):
+        data = get_redis_connection('default').hgetall(UserImportJob.key(job_id))
+        if not data:
+            return None
+        job = {key.decode(): value.decode() for key, value in data.items()}
+        for counter in COUNTERS + ('attempts',):
+            job[counter] = int(job[counter])
+        return job
+
+    @staticmethod
+    def update(job_id, **fields):
+        pipe = get_redis_connection('default').pipeline()
+        pipe.hset(UserImportJob.key(job_id), mapping={key: str(value) for key, value in fields.items()})
+        pipe.expire(UserImportJob.key(job_id), settings.USER_IMPORT_JOB_TTL)
+        pipe.execute()
+
+
+class UserImportOutboxWorker:
+    """Runs queued UserImportJobs one at a time, recording progress on the job"""
+    outbox = user_import_outbox
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def deliver(self, payload):
+        job_id = payload['job_id']
+        job = UserImportJob.get(job_id)
+        if job is None or job['status'] == JOB_DONE:
+            # Expired, or finished by an attempt that was not acknowledged
+            return
+
+        attempts = job['attempts'] + 1
+        UserImportJob.update(job_id, status=JOB_RUNNING, attempts=attempts, error='')
+        importer = UserImporter(
+            chunk_size=settings.USER_IMPORT_CHUNK_SIZE,
+            on_progress=lambda stats: UserImportJob.update(job_id, **{counter: stats[counter] for counter in COUNTERS}),
+            stats={counter: job[counter] for counter in COUNTERS},
+        )
+        try:
+            with default_storage.open(job['path'], 'rb') as f:
+                lines = io.TextIOWrapper(f, encoding='utf-8', newline='')
+                importer.run(read_records(lines, job['format']), skip=job['processed'])
+        except Exception as exc:
+            retrying = attempts < user_import_outbox.max_attempts
+            UserImportJob.update(job_id, status=JOB_RETRYING if retrying else JOB_FAILED, error=str(exc))
+            if not retrying:
+                # The upload holds plaintext passwords; it is not kept once the job gives up
+                default_storage.delete(job['path'])
+            raise
+
+        UserImportJob.update(job_id, status=JOB_DONE, finished_at=timezone.now().isoformat())
+        default_storage.delete(job['path'])
@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_init, post_save
+from users.models import DeviceSession, User
+from users.authentication import invalidate_user_snapshot
+from users.services.identifier_service import IdentifierService
+from users.services.token_service import RefreshTokenStore
+
+
+def loaded_identifiers(instance):
+    # Read from __dict__ so deferred fields are not fetched just to compare
+    return instance.__dict__.get('email'), instance.__dict__.get('phone')
+
+
+@receiver(post_init, sender=User)
+def remember_identifiers(sender, instance, **kwargs):
+    # Keep the loaded email/phone so a change can invalidate the old lookups
+    instance._loaded_identifiers = loaded_identifiers(instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_identifiers_on_save(sender, instance, created, **kwargs):
+    old_email, old_phone = getattr(instance, '_loaded_identifiers', (None, None))
+    email, phone = loaded_identifiers(instance)
+    if created:
+        # New identifiers may have been negatively cached
+        IdentifierService.invalidate(email=email, phone=phone)
+    else:
+        if old_email != email:
+            IdentifierService.invalidate(email=old_email)
+            IdentifierService.invalidate(email=email)
+        if old_phone != phone:
+            IdentifierService.invalidate(phone=old_phone)
+            IdentifierService.invalidate(phone=phone)
+    instance._loaded_identifiers = (email, phone)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_identifiers_on_delete(sender, instance, **kwargs):
+    IdentifierService.invalidate(email=instance.email, phone=instance.phone)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_snapshot(sender, instance, **kwargs):
+    # After the commit: dropped any earlier, a concurrent request could cache the
+    # old row again and keep a deactivated user authenticated for USER_SNAPSHOT_TTL
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_user_snapshot(user_id))
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_disable(sender, instance, created, **kwargs):
+    # Deactivated or soft-deleted users lose every refresh token at once
+    if not created and (instance.__dict__.get('is_active') is False or instance.__dict__.get('deleted_at')):
+        RefreshTokenStore.revoke_all(instance.pk)
+
+
+@receiver(post_save, sender=DeviceSession)
+def revoke_tokens_on_session_end(sender, instance, **kwargs):
+    if not instance.is_active:
+        RefreshTokenStore.revoke(instance.pk)
+
+
+@receiver(post_delete, sender=DeviceSession)
+def revoke_tokens_on_session_delete(sender, instance, **kwargs):
+    RefreshTokenStore.revoke(instance.pk)
@@ -0,0 +1,390 @@
+import json
+import socket
+import tempfile
+import threading
+from unittest import mock
+
+import fakeredis
+from aiosmtpd.controller import Controller
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from customers.models import Customer
+from users.authentication import CachedJWTAuthentication, create_snapshot_key
+from users.models import DeviceSession, User
+from users.services import redis_utils
+from users.services.token_service import RefreshTokenStore, issue_tokens
+from users.services.identifier_service import IdentifierService
+from users.services.login_throttle_service import LoginLocked, LoginThrottle
+from users.services.email_service import EmailOutboxWorker, email_outbox, queue_otp_email
+from users.services.outbox import REDACTED, Outbox, run_worker
+from users.services.user_import_service import UserImportJob, UserImportOutboxWorker
+from users.services.otp_service import (
+    OTP_EXPIRED, OTP_INVALID, OTP_LOCKED, OTP_VALID, OTPCooldownActive, OTPService,
+)
+
+
+# django-redis keeps connection pools per URL for the whole process, so one server is shared and flushed per test
+FAKE_REDIS_SERVER = fakeredis.FakeServer()
+
+
+class FakeRedisMixin:
+    """
+    Runs each test against an empty in-process fake Redis server, shared by
+    the default cache, get_redis_connection() and the redis.asyncio clients
+    """
+
+    def setUp(self):
+        super().setUp()
+        server = FAKE_REDIS_SERVER
+        caches = {'default': dict(settings.CACHES['default'], OPTIONS={
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'CONNECTION_POOL_KWARGS': {'connection_class': fakeredis.FakeConnection, 'server': server},
+        })}
+        for patcher in (
+            override_settings(CACHES=caches),
+            mock.patch.dict(redis_utils._async_clients, clear=True),
+            mock.patch.object(redis_utils.aioredis.Redis, 'from_url',
+                              side_effect=lambda *args, **kwargs: fakeredis.FakeAsyncRedis(server=server)),
+        ):
+            patcher.enable() if hasattr(patcher, 'enable') else patcher.start()
+            self.addCleanup(patcher.disable if hasattr(patcher, 'disable') else patcher.stop)
+        self.redis = get_redis_connection('default')
+        self.redis.flushall()
+
+
+@override_settings(OTP_MAX_ATTEMPTS=3, OTP_EXPIRY=300, OTP_RESEND_COOLDOWN=60)
+class OTPServiceTests(FakeRedisMixin, SimpleTestCase):
+    def test_otp_is_consumed_once(self):
+        otp = OTPService.store_otp('login', 'ann@example.com')
+
+        self.assertEqual(OTPService.check_otp('login', 'ann@example.com', otp), OTP_VALID)
+        self.assertEqual(OTPService.check_otp('login', 'ann@example.com', otp), OTP_EXPIRED)
+
+    def test_attempts_run_out(self):
+        otp = OTPService.store_otp('login', 'ann@example.com', '123456')
+
+        self.assertEqual(OTPService.check_otp('login', 'ann@example.com', '000000'), OTP_INVALID)
+        self.assertEqual(OTPService.check_otp('login', 'ann@example.com', '000001'), OTP_INVALID)
+        self.assertEqual(OTPService.check_otp('login', 'ann@example.com', '000002'), OTP_LOCKED)
+        # Burnt: the right code no longer works either
+        self.assertEqual(OTPService.check_otp('login', 'ann@example.com', otp), OTP_EXPIRED)
+
+    def test_resend_cooldown(self):
+        OTPService.store_otp('login', 'ann@example.com')
+
+        with self.assertRaises(OTPCooldownActive) as cm:
+            OTPService.store_otp('login', 'ann@example.com')
+        self.assertTrue(0 < cm.exception.retry_after <= 60)
+
+        # Another purpose has its own OTP and cooldown
+        OTPService.store_otp('mfa', 'ann@example.com')
+
+    def test_formatting_variants_share_attempts_and_cooldown(self):
+        OTPService.store_otp('login', '+1 (555) 010-2030', '123456')
+
+        with self.assertRaises(OTPCooldownActive):
+            OTPService.store_otp('login', '15550102030')
+        self.assertEqual(OTPService.check_otp('login', '1-555-010-2030', '000000'), OTP_INVALID)
+        self.assertEqual(OTPService.check_otp('login', '+15550102030', '000001'), OTP_INVALID)
+        self.assertEqual(OTPService.check_otp('login', '1 555 010 2030', '000002'), OTP_LOCKED)
+
+        OTPService.store_otp('login', 'Ann@Example.com', '654321')
+        with self.assertRaises(OTPCooldownActive):
+            OTPService.store_otp('login', 'ann@example.COM')
+        self.assertEqual(OTPService.check_otp('login', ' ANN@example.com ', '654321'), OTP_VALID)
+
+    def test_async_path_shares_keys_with_sync(self):
+        otp = async_to_sync(OTPService.astore_otp)('login', 'ann@example.com')
+
+        with self.assertRaises(OTPCooldownActive):
+            OTPService.store_otp('login', 'Ann@example.com')
+        self.assertEqual(async_to_sync(OTPService.acheck_otp)('login', 'ann@example.com', otp), OTP_VALID)
+        self.assertEqual(OTPService.check_otp('login', 'ann@example.com', otp), OTP_EXPIRED)
+
+
+class TokenRevokeTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='ann@example.com', password='correct-horse-7')
+        self.refresh = str(issue_tokens(self.user, None))
+
+    def post(self, name, **data):
+        return self.client.post(reverse(name), data, content_type='application/json')
+
+    def test_current_token_revokes_every_session(self):
+        other = issue_tokens(self.user, None)
+
+        self.assertEqual(self.post('token-revoke', refresh=self.refresh, all=True).status_code, 204)
+        self.assertEqual(self.post('token-refresh', refresh=str(other)).status_code, 401)
+        self.assertFalse(DeviceSession.objects.filter(user=self.user, is_active=True).exists())
+
+    def test_rotated_token_cannot_revoke(self):
+        rotated = self.post('token-refresh', refresh=self.refresh).json()['refresh']
+        other = issue_tokens(self.user, None)
+
+        # A stale token (e.g. from logs or an old device) no longer logs the user out
+        self.assertEqual(self.post('token-revoke', refresh=self.refresh, all=True).status_code, 401)
+        self.assertIsNone(self.redis.get(RefreshTokenStore.revoked_key(self.user.pk)))
+        self.assertEqual(self.post('token-revoke', refresh=self.refresh).status_code, 401)
+        self.assertEqual(DeviceSession.objects.filter(user=self.user, is_active=True).count(), 2)
+
+        self.assertEqual(self.post('token-refresh', refresh=rotated).status_code, 200)
+        self.assertEqual(self.post('token-refresh', refresh=str(other)).status_code, 200)
+
+    def test_revoked_token_cannot_revoke_again(self):
+        self.assertEqual(self.post('token-revoke', refresh=self.refresh).status_code, 204)
+        self.assertEqual(self.post('token-revoke', refresh=self.refresh, all=True).status_code, 401)
+
+
+class CachedJWTAuthenticationTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='ann@example.com', password='correct-horse-7')
+        Customer.objects.create(email='ann@example.com', is_guest=False, linked_user=self.user)
+        self.authorization = f"Bearer {AccessToken.for_user(self.user)}"
+
+    def get_current_customer(self):
+        return self.client.get(reverse('current-customer'), HTTP_AUTHORIZATION=self.authorization)
+
+    def test_warm_snapshot_authenticates_without_sql(self):
+        self.assertEqual(self.get_current_customer().status_code, 200)
+
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=self.authorization)
+        with self.assertNumQueries(0):
+            user, _ = CachedJWTAuthentication().authenticate(request)
+        self.assertEqual(user.pk, self.user.pk)
+
+        # The whole request only loads the customer it returns
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_current_customer().status_code, 200)
+
+    def test_snapshot_is_dropped_after_commit(self):
+        self.assertEqual(self.get_current_customer().status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+            # Requests before the commit still see the committed (active) row
+            self.assertIsNotNone(cache.get(create_snapshot_key(self.user.pk)))
+
+        self.assertIsNone(cache.get(create_snapshot_key(self.user.pk)))
+        self.assertEqual(self.get_current_customer().status_code, 401)
+
+
+@override_settings(SECURITY_POLICY_DEFAULTS=dict(settings.SECURITY_POLICY_DEFAULTS, login_attempt=dict(
+    settings.LOGIN_ATTEMPT_POLICY_DEFAULTS, max_attempts=3, max_attempts_per_ip=50)))
+class AsyncLoginServicesTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='ann@example.com', password='correct-horse-7', phone='+15550102030')
+
+    def test_aresolve_shares_cache_entries_with_resolve(self):
+        self.assertEqual(IdentifierService.resolve('ann@example.com'), self.user)
+        # Cached by the sync path: only the primary-key lookup remains
+        with self.assertNumQueries(1):
+            self.assertEqual(async_to_sync(IdentifierService.aresolve)('ann@example.com'), self.user)
+
+        self.assertEqual(async_to_sync(IdentifierService.aresolve)('+1 555 010 2030'), self.user)
+        self.assertIsNone(async_to_sync(IdentifierService.aresolve)('bob@example.com'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(IdentifierService.resolve('bob@example.com'))
+
+    def test_async_failures_lock_out(self):
+        for _ in range(3):
+            async_to_sync(LoginThrottle.acheck)(self.user, '10.0.0.1')
+            async_to_sync(LoginThrottle.arecord_failure)(self.user, '10.0.0.1')
+
+        with self.assertRaises(LoginLocked):
+            async_to_sync(LoginThrottle.acheck)(self.user, '10.0.0.2')
+        with self.assertRaises(LoginLocked):
+            LoginThrottle.check(self.user, None)
+        self.assertEqual(self.redis.hget(LoginThrottle.key('pending'), str(self.user.pk)), b'3')
+
+        async_to_sync(LoginThrottle.arecord_success)(self.user)
+        self.assertIsNone(self.redis.hget(LoginThrottle.key('pending'), str(self.user.pk)))
+        self.assertTrue(self.redis.sismember(LoginThrottle.key('resets'), str(self.user.pk)))
+
+
+class LoginFailureFlushTests(FakeRedisMixin, TestCase):
+    def test_flush_retried_after_a_failed_chunk_counts_each_failure_once(self):
+        users = [User.objects.create_user(email=f"user{index}@example.com") for index in range(3)]
+        for user in users:
+            LoginThrottle.record_failure(user, None)
+        bulk_update = LoginThrottle.bulk_update
+        calls = []
+
+        def failing_last_chunk(rows):
+            calls.append(rows)
+            if len(calls) == len(users):
+                raise RuntimeError('connection lost')
+            return bulk_update(rows)
+
+        with mock.patch('users.services.login_throttle_service.FLUSH_CHUNK_SIZE', 1):
+            with mock.patch.object(LoginThrottle, 'bulk_update', side_effect=failing_last_chunk), \
+                    self.assertRaises(RuntimeError):
+                LoginThrottle.flush()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(LoginThrottle.flush(), 3)
+
+        self.assertEqual(
+            sorted(User.objects.filter(pk__in=[user.pk for user in users]).values_list('failed_login_attempts', flat=True)),
+            [1, 1, 1]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(LoginThrottle.flush(), 0)
+
+
+class UserImportJobTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        patcher = override_settings(MEDIA_ROOT=media_root.name)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        admin = User.objects.create_superuser(email='admin@example.com', password='correct-horse-7')
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {AccessToken.for_user(admin)}"
+
+    def upload(self, content):
+        upload = SimpleUploadedFile('users.csv', content.encode(), content_type='text/csv')
+        return self.client.post(reverse('user-import'), {'file': upload})
+
+    def run_workers(self):
+        run_worker(UserImportOutboxWorker(), 10, threading.Event(), exit_when_empty=True)
+
+    def test_upload_is_queued_and_imported_by_the_worker(self):
+        response = self.upload("email,password,first_name\nann@example.com,correct-horse-7,Ann\nnot-an-email,,\n")
+
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        self.assertEqual((job['status'], job['processed']), ('queued', 0))
+        self.assertFalse(User.objects.filter(email='ann@example.com').exists())
+
+        self.run_workers()
+
+        job = self.client.get(job['status_url']).json()
+        self.assertEqual(
+            (job['status'], job['processed'], job['inserted'], job['invalid']), ('done', 2, 1, 1)
+        )
+        self.assertTrue(User.objects.get(email='ann@example.com').check_password('correct-horse-7'))
+        self.assertFalse(default_storage.listdir(settings.USER_IMPORT_UPLOAD_DIR)[1])
+
+    def test_rows_the_table_would_reject_are_counted_invalid(self):
+        job_id = self.upload(
+            "email,phone,country,type,birth_date\n"
+            "ann@example.com,+1 555 010 2030,US,personal,1990-04-01\n"
+            "bob@example.com,call me,US,,\n"
+            "cat@example.com,,USA,,\n"
+            "dan@example.com,,,household,\n"
+            "eve@example.com,,,,2001-02-30\n"
+        ).json()['job_id']
+
+        self.run_workers()
+
+        job = UserImportJob.get(job_id)
+        self.assertEqual((job['status'], job['inserted'], job['invalid']), ('done', 1, 4))
+        self.assertEqual(User.objects.get(email='ann@example.com').phone, '+15550102030')
+
+    def test_retried_job_resumes_after_committed_records(self):
+        job_id = self.upload("email\nann@example.com\nbob@example.com\n").json()['job_id']
+        # An earlier attempt committed the first record before it was interrupted
+        UserImportJob.update(job_id, status='retrying', attempts=1, processed=1, inserted=1)
+
+        self.run_workers()
+
+        job = UserImportJob.get(job_id)
+        self.assertEqual((job['status'], job['attempts'], job['processed'], job['inserted']), ('done', 2, 2, 2))
+        self.assertEqual(list(User.objects.filter(email__endswith='@example.com').exclude(is_staff=True)
+                              .values_list('email', flat=True)), ['bob@example.com'])
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get(reverse('user-import-status', args=['missing'])).status_code, 404)
+
+
+class SmtpSink:
+    """aiosmtpd handler keeping every message it receives"""
+
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return '250 OK'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class OutboxTests(FakeRedisMixin, SimpleTestCase):
+    def test_recover_only_requeues_claims_past_the_processing_timeout(self):
+        outbox = Outbox('test', processing_timeout=300)
+        outbox.enqueue({'n': 1})
+        outbox.enqueue({'n': 2})
+        with mock.patch('users.services.outbox.time.time', return_value=1000.0):
+            stale, = outbox.claim(1)
+        with mock.patch('users.services.outbox.time.time', return_value=1250.0):
+            outbox.claim(1)
+
+            # Claimed 250s ago: still being delivered
+            self.assertEqual(outbox.recover(), 0)
+        with mock.patch('users.services.outbox.time.time', return_value=1301.0):
+            self.assertEqual(outbox.recover(), 1)
+
+        self.assertEqual(outbox.stats(), {'queued': 1, 'processing': 1, 'retrying': 0, 'dead': 0})
+        self.assertEqual(outbox.claim(1), [stale])
+
+    def test_equal_payloads_are_claimed_and_acknowledged_separately(self):
+        outbox = Outbox('test')
+        outbox.enqueue({'n': 1})
+        outbox.enqueue({'n': 1})
+
+        items = outbox.claim(2)
+        outbox.ack(items[:1])
+
+        self.assertEqual(outbox.stats()['processing'], 1)
+
+    @override_settings(OUTBOX_DEAD_LETTER_LIMIT=2, OUTBOX_DEAD_LETTER_TTL=60)
+    def test_dead_letters_are_redacted_capped_and_expire(self):
+        outbox = Outbox('test', max_attempts=1, redact=('otp',))
+        with self.assertLogs('users.services.outbox', 'ERROR'):
+            for index in range(3):
+                outbox.enqueue({'email': f"user{index}@example.com", 'otp': '123456'})
+                item, = outbox.claim(1)
+                outbox.fail(item, 'mailbox unavailable')
+
+        dead = [json.loads(item) for item in self.redis.lrange(outbox.key('dead'), 0, -1)]
+        self.assertEqual([entry['payload'] for entry in dead], [
+            {'email': 'user2@example.com', 'otp': REDACTED},
+            {'email': 'user1@example.com', 'otp': REDACTED},
+        ])
+        self.assertTrue(0 < self.redis.ttl(outbox.key('dead')) <= 60)
+
+    def test_email_worker_delivers_over_smtp(self):
+        sink = SmtpSink()
+        controller = Controller(sink, hostname='127.0.0.1', port=free_port())
+        controller.start()
+        self.addCleanup(controller.stop)
+
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=controller.port, EMAIL_USE_TLS=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+        ):
+            self.assertTrue(queue_otp_email('ann@example.com', '123456', 'email-login'))
+            self.assertTrue(queue_otp_email('bob@example.com', '654321', 'email-verify'))
+            run_worker(EmailOutboxWorker(), 10, threading.Event(), exit_when_empty=True)
+
+        self.assertEqual(sorted(envelope.rcpt_tos[0] for envelope in sink.envelopes),
+                         ['ann@example.com', 'bob@example.com'])
+        self.assertIn(b'123456', next(e.content for e in sink.envelopes if e.rcpt_tos == ['ann@example.com']))
+        self.assertEqual(email_outbox.stats(), {'queued': 0, 'processing': 0, 'retrying': 0, 'dead': 0})
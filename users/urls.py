@@ -1,8 +1,24 @@
 from django.urls import path
+from django.conf import settings
 
-from users.views.otp_views import OtpRequestView, OtpVerifyView
+from users.views.admin_views import UserImportStatusView, UserImportView
+from users.views.token_views import TokenRefreshView, TokenRevokeView
 
-from .views.auth_views import EmailLoginView, EmailRegisterView, PhoneLoginView
+if settings.ASYNC_AUTH_VIEWS:
+    # Served by keya/asgi.py: password hashing runs off the event loop and
+    # Redis is awaited through redis.asyncio
+    from .views.async_auth_views import (
+        AsyncEmailLoginView as EmailLoginView,
+        AsyncEmailRegisterView as EmailRegisterView,
+        AsyncPhoneLoginView as PhoneLoginView,
+    )
+    from .views.async_otp_views import (
+        AsyncOtpRequestView as OtpRequestView,
+        AsyncOtpVerifyView as OtpVerifyView,
+    )
+else:
+    from .views.auth_views import EmailLoginView, EmailRegisterView, PhoneLoginView
+    from .views.otp_views import OtpRequestView, OtpVerifyView
 
 urlpatterns = [
     path('auth/email-login/', EmailLoginView.as_view(), name='email-login'),
@@ -12,4 +28,12 @@ urlpatterns = [
     # OTP Endpoints
     path('auth/otp/request/', OtpRequestView.as_view(), name='otp-request'),
     path('auth/otp/verify/', OtpVerifyView.as_view(), name='otp-verify'),
-]
\ No newline at end of file
+
+    # Token Endpoints
+    path('auth/token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
+    path('auth/token/revoke/', TokenRevokeView.as_view(), name='token-revoke'),
+
+    # Admin Endpoints
+    path('admin/users/import/', UserImportView.as_view(), name='user-import'),
+    path('admin/users/import/<str:job_id>/', UserImportStatusView.as_view(), name='user-import-status'),
+]
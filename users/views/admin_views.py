@@ -0,0 +1,48 @@
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from rest_framework.parsers import MultiPartParser
+from django.urls import reverse
+from django.utils.translation import gettext as _
+from users.services.user_import_service import UserImportJob
+
+
+def serialize_job(job_id, job):
+    data = {key: value for key, value in job.items() if key not in ('path', 'created_by')}
+    return dict(data, job_id=job_id)
+
+
+class UserImportView(APIView):
+    """
+    Queue an uploaded CSV or JSONL file for bulk import. The upload is
+    stored and imported by `manage.py process_outbox user_import`; poll
+    the returned status URL for progress.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": _("A CSV or JSONL file is required")}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = request.data.get('format') or ('csv' if upload.name.endswith('.csv') else 'jsonl')
+        if fmt not in ('csv', 'jsonl'):
+            return Response({"error": _("Format must be csv or jsonl")}, status=status.HTTP_400_BAD_REQUEST)
+
+        job_id = UserImportJob.create(upload, fmt, request.user.pk)
+        url = reverse('user-import-status', args=[job_id])
+        return Response(serialize_job(job_id, UserImportJob.get(job_id)) | {'status_url': url},
+                        status=status.HTTP_202_ACCEPTED, headers={'Location': url})
+
+
+class UserImportStatusView(APIView):
+    """Status and progress counters of a queued user import"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, job_id):
+        job = UserImportJob.get(job_id)
+        if job is None:
+            return Response({"error": _("Import job not found")}, status=status.HTTP_404_NOT_FOUND)
+        return Response(serialize_job(job_id, job))
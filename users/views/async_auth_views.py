@@ -0,0 +1,179 @@
+import json
+from django.views import View
+from rest_framework import status
+from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.utils.translation import gettext as _
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from users.services.token_service import aissue_tokens
+from users.models import User
+from users.services.identifier_service import IdentifierService
+from users.services.login_throttle_service import LoginLocked, LoginThrottle, get_client_ip
+from users.services.hashing_service import HashingPoolSaturated, get_hashing_pool
+from users.services.auth_history_service import arecord_auth_event
+from users.serializers.auth import EmailCredentialsSerializer, PhoneCredentialsSerializer, UserRegisterSerializer
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncJSONView(View):
+    """
+    Base for async JSON endpoints served by keya/asgi.py.
+    DRF's APIView cannot await its handlers, so these views parse and
+    render JSON themselves while keeping the sync views' payloads.
+    """
+
+    def parse_json(self, request):
+        """Return the request body as a dict, or None when it is not a JSON object"""
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    def parse_error(self):
+        return JsonResponse({'detail': _('JSON parse error')}, status=status.HTTP_400_BAD_REQUEST)
+
+    def locked(self):
+        return JsonResponse(
+            {'error': _('Too many failed login attempts, please try again later')},
+            status=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+    def saturated(self):
+        response = JsonResponse(
+            {'error': _('Too many login attempts in progress, please retry shortly')},
+            status=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        response['Retry-After'] = '1'
+        return response
+
+
+async def authenticate_password(identifier, password, ip):
+    """Async counterpart of EmailPhoneAuthBackend.authenticate"""
+    pool = get_hashing_pool()
+    user = await IdentifierService.aresolve(identifier)
+    # Raises LoginLocked before any hashing is queued
+    await LoginThrottle.acheck(user, ip)
+
+    if user is None:
+        # Run the hasher anyway so unknown identifiers take as long as known ones
+        await pool.make_password(password)
+        await LoginThrottle.arecord_failure(None, ip)
+        return None
+
+    is_correct, must_update = await pool.verify_password(password, user.password)
+    if not is_correct or not user.is_active:
+        await LoginThrottle.arecord_failure(user, ip)
+        await arecord_auth_event(user, 'login', 'password', False, ip)
+        return None
+    await LoginThrottle.arecord_success(user)
+    await arecord_auth_event(user, 'login', 'password', True, ip)
+    if must_update:
+        user.password = await pool.make_password(password)
+        await User.objects.filter(pk=user.pk).aupdate(password=user.password)
+    return user
+
+
+class AsyncEmailLoginView(AsyncJSONView):
+    async def post(self, request):
+        data = self.parse_json(request)
+        if data is None:
+            return self.parse_error()
+
+        serializer = EmailCredentialsSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            user = await authenticate_password(
+                serializer.validated_data['email'],
+                serializer.validated_data['password'],
+                get_client_ip(request)
+            )
+        except LoginLocked:
+            return self.locked()
+        except HashingPoolSaturated:
+            return self.saturated()
+
+        if not user:
+            return JsonResponse(
+                {'non_field_errors': [_('Invalid email or password.')]},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        refresh = await aissue_tokens(user, request)
+        return JsonResponse({
+            'access': str(refresh.access_token),
+            'refresh': str(refresh),
+            'user_id': str(user.id),
+            'email': user.email,
+            'is_verified': user.is_verified,
+            'is_active': user.is_active
+        })
+
+
+class AsyncEmailRegisterView(AsyncJSONView):
+    async def post(self, request):
+        data = self.parse_json(request)
+        if data is None:
+            return self.parse_error()
+
+        serializer = UserRegisterSerializer(data=data)
+        # Validation checks email uniqueness against the database
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            encoded_password = await get_hashing_pool().make_password(serializer.validated_data['password'])
+        except HashingPoolSaturated:
+            return self.saturated()
+
+        user = await sync_to_async(serializer.save)(encoded_password=encoded_password)
+        refresh = await aissue_tokens(user, request)
+
+        return JsonResponse({
+            'access': str(refresh.access_token),
+            'refresh': str(refresh),
+            'user_id': str(user.id),
+            'email': user.email
+        }, status=status.HTTP_201_CREATED)
+
+
+# Phone
+class AsyncPhoneLoginView(AsyncJSONView):
+    async def post(self, request):
+        data = self.parse_json(request)
+        if data is None:
+            return self.parse_error()
+
+        serializer = PhoneCredentialsSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            user = await authenticate_password(
+                serializer.validated_data['phone'],
+                serializer.validated_data['password'],
+                get_client_ip(request)
+            )
+        except LoginLocked:
+            return self.locked()
+        except HashingPoolSaturated:
+            return self.saturated()
+
+        if not user:
+            return JsonResponse(
+                {'non_field_errors': [_('Invalid phone number or password.')]},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        refresh = await aissue_tokens(user, request)
+        return JsonResponse({
+            'access': str(refresh.access_token),
+            'refresh': str(refresh),
+            'user_id': str(user.id),
+            'phone': user.phone,
+            'is_verified': user.is_verified,
+            'is_active': user.is_active
+        })
@@ -0,0 +1,108 @@
+from django.conf import settings
+from rest_framework import status
+from django.http import JsonResponse
+from django.utils.translation import gettext as _
+from users.views.async_auth_views import AsyncJSONView
+from users.services.otp_service import OTP_LOCKED, OTP_VALID, OTPCooldownActive, OTPService
+from users.services.sms_service import aqueue_otp_sms
+from users.services.email_service import aqueue_otp_email
+from users.services.identifier_service import IdentifierService
+from users.services.login_throttle_service import get_client_ip
+from users.services.auth_history_service import arecord_auth_event
+from users.services.token_service import aissue_tokens
+from users.serializers.otp_serializers import OtpRequestSerializer, OtpVerifySerializer
+
+
+class AsyncOtpRequestView(AsyncJSONView):
+    """Async counterpart of OtpRequestView; only awaits Redis"""
+
+    async def post(self, request):
+        data = self.parse_json(request)
+        if data is None:
+            return self.parse_error()
+
+        serializer = OtpRequestSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        purpose = data.get('purpose', 'login')
+        identifier = data['identifier']
+
+        try:
+            otp = await OTPService.astore_otp(purpose, identifier)
+        except OTPCooldownActive as exc:
+            return JsonResponse({
+                "error": _("Please wait before requesting another OTP"),
+                "retry_after": exc.retry_after
+            }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Delivered by the outbox workers
+        if '@' in identifier:
+            if not await aqueue_otp_email(identifier, otp, purpose):
+                return JsonResponse(
+                    {"error": _("Failed to send OTP email")},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+        elif not await aqueue_otp_sms(identifier, otp, purpose):
+            return JsonResponse(
+                {"error": _("Failed to send OTP SMS")},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return JsonResponse({
+            "message": _("OTP sent successfully"),
+            "expiry": settings.OTP_EXPIRY
+        })
+
+
+class AsyncOtpVerifyView(AsyncJSONView):
+    """Async counterpart of OtpVerifyView"""
+
+    async def post(self, request):
+        data = self.parse_json(request)
+        if data is None:
+            return self.parse_error()
+
+        serializer = OtpVerifySerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        purpose = data.get('purpose', 'login')
+        identifier = data['identifier']
+        ip = get_client_ip(request)
+
+        result = await OTPService.acheck_otp(purpose, identifier, data['otp'])
+        action = 'login' if purpose.endswith('login') else 'mfa_attempt'
+        user = await IdentifierService.aresolve(identifier)
+        if user and result != OTP_VALID:
+            await arecord_auth_event(user, action, 'otp', False, ip)
+
+        if result == OTP_LOCKED:
+            return JsonResponse({
+                "error": _("Too many invalid attempts, request a new OTP")
+            }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+        if result != OTP_VALID:
+            return JsonResponse({
+                "error": _("Invalid OTP or OTP expired")
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not user:
+            # Verified, but there is no account to issue tokens for
+            return JsonResponse({
+                "message": _("OTP verified successfully"),
+                "user_exists": False
+            })
+
+        await arecord_auth_event(user, action, 'otp', True, ip)
+        refresh = await aissue_tokens(user, request)
+        return JsonResponse({
+            "access": str(refresh.access_token),
+            "refresh": str(refresh),
+            "user_id": str(user.id),
+            "identifier": identifier,
+            "is_verified": user.is_verified,
+            "is_active": user.is_active
+        })
@@ -2,7 +2,7 @@ from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.utils.translation import gettext as _
-from rest_framework_simplejwt.tokens import RefreshToken
+from users.services.token_service import issue_tokens
 from users.serializers.auth import EmailAuthSerializer, PhoneAuthSerializer, UserRegisterSerializer
 
 class EmailLoginView(APIView):
@@ -14,7 +14,7 @@ class EmailLoginView(APIView):
         
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
+            refresh = issue_tokens(user, request)
             
             return Response({
                 'access': str(refresh.access_token),
@@ -33,7 +33,7 @@ class EmailRegisterView(APIView):
         
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = issue_tokens(user, request)
             
             return Response({
                 'access': str(refresh.access_token),
@@ -50,7 +50,7 @@ class EmailRegisterView(APIView):
         
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = issue_tokens(user, request)
             
             return Response({
                 'access': str(refresh.access_token),
@@ -70,7 +70,7 @@ class PhoneLoginView(APIView):
         
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
+            refresh = issue_tokens(user, request)
             
             return Response({
                 'access': str(refresh.access_token),
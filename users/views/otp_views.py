@@ -1,13 +1,16 @@
 import logging
-from users.models import User
 from django.conf import settings
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.utils.translation import gettext as _
-from users.services.otp_service import OTPService
-from users.services.email_service import send_otp_email
-from rest_framework_simplejwt.tokens import RefreshToken
+from users.services.otp_service import OTP_LOCKED, OTP_VALID, OTPCooldownActive, OTPService
+from users.services.sms_service import queue_otp_sms
+from users.services.email_service import queue_otp_email
+from users.services.identifier_service import IdentifierService
+from users.services.login_throttle_service import get_client_ip
+from users.services.auth_history_service import record_auth_event
+from users.services.token_service import issue_tokens
 from users.serializers.otp_serializers import OtpRequestSerializer, OtpVerifySerializer
 
 logger = logging.getLogger(__name__)
@@ -21,24 +24,31 @@ class OtpRequestView(APIView):
             identifier = data['identifier']
             
             # Generate and store OTP
-            otp = OTPService.store_otp(purpose, identifier)
+            try:
+                otp = OTPService.store_otp(purpose, identifier)
+            except OTPCooldownActive as exc:
+                return Response({
+                    "error": _("Please wait before requesting another OTP"),
+                    "retry_after": exc.retry_after
+                }, status=status.HTTP_429_TOO_MANY_REQUESTS)
             
             # Send OTP via appropriate channel
             if '@' in identifier:
-                # Email OTP
-                success = send_otp_email(identifier, otp, purpose)
+                # Email OTP, delivered by the outbox worker
+                success = queue_otp_email(identifier, otp, purpose)
                 if not success:
                     return Response(
                         {"error": _("Failed to send OTP email")},
                         status=status.HTTP_500_INTERNAL_SERVER_ERROR
                     )
             else:
-                # Phone OTP - log to terminal
-                logger.info(f"OTP for {identifier}: {otp}")
-                print(f"\n\n--- OTP FOR {identifier} ---")
-                print(f"OTP: {otp}")
-                print(f"Purpose: {purpose}")
-                print(f"Expires in: {settings.OTP_EXPIRY} seconds\n")
+                # Phone OTP, delivered by the outbox worker
+                success = queue_otp_sms(identifier, otp, purpose)
+                if not success:
+                    return Response(
+                        {"error": _("Failed to send OTP SMS")},
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                    )
                 
             return Response({
                 "message": _("OTP sent successfully"),
@@ -57,16 +67,26 @@ class OtpVerifyView(APIView):
             otp = data['otp']
             
             # Verify OTP
-            if OTPService.verify_otp(purpose, identifier, otp):
+            result = OTPService.check_otp(purpose, identifier, otp)
+            action = 'login' if purpose.endswith('login') else 'mfa_attempt'
+            if result != OTP_VALID:
+                user = IdentifierService.resolve(identifier)
+                if user:
+                    record_auth_event(user, action, 'otp', False, get_client_ip(request))
+
+            if result == OTP_LOCKED:
+                return Response({
+                    "error": _("Too many invalid attempts, request a new OTP")
+                }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+            if result == OTP_VALID:
                 # Find user by identifier
-                if '@' in identifier:
-                    user = User.objects.filter(email=identifier).first()
-                else:
-                    user = User.objects.filter(phone=identifier).first()
+                user = IdentifierService.resolve(identifier)
                 
                 if user:
+                    record_auth_event(user, action, 'otp', True, get_client_ip(request))
                     # Generate tokens
-                    refresh = RefreshToken.for_user(user)
+                    refresh = issue_tokens(user, request)
                     return Response({
                         "access": str(refresh.access_token),
                         "refresh": str(refresh),
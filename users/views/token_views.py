@@ -0,0 +1,95 @@
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from django.utils.translation import gettext as _
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from users.models import DeviceSession
+from users.authentication import CachedJWTAuthentication
+from users.serializers.token_serializers import TokenRefreshSerializer, TokenRevokeSerializer
+from users.services.session_activity_service import SessionActivityTracker
+from users.services.token_service import ROTATE_OK, ROTATE_REUSED, RefreshTokenStore, add_permission_claims
+
+
+def parse_refresh_token(raw):
+    """Validated RefreshToken with a token family, or None"""
+    try:
+        refresh = RefreshToken(raw)
+    except TokenError:
+        return None
+    return refresh if refresh.get('sid') else None
+
+
+class TokenRefreshView(APIView):
+    """Rotate a refresh token; replaying an already rotated one revokes its family"""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = TokenRefreshSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        refresh = parse_refresh_token(serializer.validated_data['refresh'])
+        if refresh is None:
+            return Response({"error": _("Invalid or expired refresh token")}, status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            # Cached snapshot, so an active user refreshes without SQL
+            user = CachedJWTAuthentication().get_user(refresh)
+        except AuthenticationFailed:
+            RefreshTokenStore.revoke(refresh['sid'])
+            return Response({"error": _("Invalid or expired refresh token")}, status=status.HTTP_401_UNAUTHORIZED)
+
+        jti = refresh[api_settings.JTI_CLAIM]
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+
+        result = RefreshTokenStore.rotate(refresh['sid'], user.pk, jti, refresh[api_settings.JTI_CLAIM])
+        if result == ROTATE_REUSED:
+            return Response({"error": _("Refresh token reuse detected, please log in again")},
+                            status=status.HTTP_401_UNAUTHORIZED)
+        if result != ROTATE_OK:
+            return Response({"error": _("Invalid or expired refresh token")}, status=status.HTTP_401_UNAUTHORIZED)
+
+        SessionActivityTracker.touch(refresh['sid'])
+        # New access tokens carry the permissions as they are now
+        add_permission_claims(refresh, user.pk)
+        return Response({
+            'access': str(refresh.access_token),
+            'refresh': str(refresh),
+        })
+
+
+class TokenRevokeView(APIView):
+    """Log out a token family, or with `all` every session of the token's user"""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = TokenRevokeSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        refresh = parse_refresh_token(serializer.validated_data['refresh'])
+        if refresh is None:
+            return Response({"error": _("Invalid or expired refresh token")}, status=status.HTTP_401_UNAUTHORIZED)
+
+        user_id = refresh[api_settings.USER_ID_CLAIM]
+        # A validly signed but already rotated (or revoked) token must not log anyone out
+        if not RefreshTokenStore.is_current(refresh['sid'], user_id, refresh[api_settings.JTI_CLAIM]):
+            return Response({"error": _("Invalid or expired refresh token")}, status=status.HTTP_401_UNAUTHORIZED)
+
+        if serializer.validated_data['all']:
+            RefreshTokenStore.revoke_all(user_id)
+            sessions = DeviceSession.objects.filter(user_id=user_id, is_active=True)
+        else:
+            RefreshTokenStore.revoke(refresh['sid'])
+            sessions = DeviceSession.objects.filter(pk=refresh['sid'], is_active=True)
+        # update() skips the post_save revocation, which already happened above
+        sessions.update(is_active=False)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)